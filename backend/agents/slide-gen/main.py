@@ -13,6 +13,7 @@ from colorlog import ColoredFormatter
 os.environ["USE_BRIDGE"] = "false"
 
 from src.agent.graph import SlideGenerationAgent
+from src.utils.pdf_pool import start_pdf_pool
 
 
 def setup_logging():
@@ -44,6 +45,9 @@ def main():
     # Setup logging
     setup_logging()
     
+    # Fork the PDF workers while this is still the only thread
+    start_pdf_pool()
+    
     logger = logging.getLogger(__name__)
     
     # Hardcoded test parameters
@@ -61,6 +65,7 @@ def main():
     logger.info("="*60)
     logger.info("")
     
+    agent = None
     try:
         # Initialize agent
         agent = SlideGenerationAgent()
@@ -104,6 +109,9 @@ def main():
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if agent is not None:
+            agent.close()
 
 
 if __name__ == "__main__":
@@ -3,13 +3,13 @@ LangGraph workflow definition for slide generation
 """
 
 import logging
-from typing import Dict, Any
+from typing import Callable, Dict, Any, Optional
 from pathlib import Path
 from langgraph.graph import StateGraph, END
 from src.agent.state import SlideGenerationState
 from src.agent.nodes import SlideGenerationNodes
 from src.renderer.image_exporter import ImageExporter
-from src.renderer.pdf_exporter import PDFExporter
+from src.renderer.pdf_exporter import PDFExporter, submit_pdf_export
 from src.renderer.ppt_exporter import PPTExporter
 from src.utils.validators import InputValidator
 from src.utils.template_validator import TemplateValidator
@@ -27,8 +27,13 @@ class SlideGenerationAgent:
         self.image_exporter = ImageExporter()
         self.pdf_exporter = PDFExporter()
         self.ppt_exporter = PPTExporter()
+        self._on_slide_ready: Optional[Callable[[int, str], None]] = None
         self.workflow = self._build_workflow()
     
+    def close(self) -> None:
+        """Release resources held by the workflow nodes"""
+        self.nodes.close()
+    
     def _build_workflow(self) -> StateGraph:
         """
         Build LangGraph workflow
@@ -44,6 +49,7 @@ class SlideGenerationAgent:
         workflow.add_node("generate_layout", self.nodes.generate_slide_layout_node)
         workflow.add_node("generate_images", self.nodes.generate_images_node)
         workflow.add_node("render_html", self.nodes.render_slide_html_node)
+        workflow.add_node("export_slide_image", self._export_slide_image)
         workflow.add_node("increment_index", self.nodes.increment_slide_index_node)
         workflow.add_node("export_final", self._export_final_outputs)
         
@@ -54,7 +60,8 @@ class SlideGenerationAgent:
         workflow.add_edge("generate_outline", "generate_layout")
         workflow.add_edge("generate_layout", "generate_images")
         workflow.add_edge("generate_images", "render_html")
-        workflow.add_edge("render_html", "increment_index")
+        workflow.add_edge("render_html", "export_slide_image")
+        workflow.add_edge("export_slide_image", "increment_index")
         
         # Conditional edge for loop
         workflow.add_conditional_edges(
@@ -70,6 +77,54 @@ class SlideGenerationAgent:
         
         return workflow.compile()
     
+    def _export_slide_image(self, state: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Export the current slide to PNG as soon as its HTML is rendered
+        
+        Exporting inside the per-slide loop makes each slide image available
+        (and reported through the on_slide_ready callback) while later slides
+        are still being generated, instead of only after the whole deck.
+        
+        Args:
+            state: Current workflow state
+            
+        Returns:
+            Updated state with the slide image path
+        """
+        current_idx = state['current_slide_index']
+        
+        if current_idx >= len(state['slides']):
+            return state
+        
+        slide_data = state['slides'][current_idx]
+        if not slide_data.get('html_path'):
+            return state
+        
+        slide_number = slide_data['slide_number']
+        image_path = config.slide_images_dir / f"slide_{slide_number}.png"
+        
+        logger.info(f"→ Step 2.5: Exporting slide {slide_number} to PNG")
+        
+        success = self.image_exporter.export_html_to_image(
+            html_path=Path(slide_data['html_path']),
+            output_path=image_path,
+            aspect_ratio=state['aspect_ratio']
+        )
+        
+        if success:
+            slide_data['image_path'] = str(image_path)
+            logger.info(f"✓ Slide {slide_number} exported to PNG")
+            if self._on_slide_ready is not None:
+                try:
+                    self._on_slide_ready(slide_number, str(image_path))
+                except Exception as e:
+                    logger.warning(f"Slide ready callback failed for slide {slide_number}: {str(e)}")
+        else:
+            # Retried during final export
+            logger.warning(f"⚠ Failed to export slide {slide_number}, will retry during final export")
+        
+        return state
+    
     def _export_final_outputs(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Export final outputs (slide images, PDF, and PPT)
@@ -85,7 +140,7 @@ class SlideGenerationAgent:
         logger.info("=" * 60)
         
         # Log comprehensive template distribution analysis
-        TemplateValidator.log_template_distribution(state['slides'])
+        TemplateValidator.log_template_distribution(state['slides'], state.get('template_types'))
         
         try:
             # Export individual slide images
@@ -93,6 +148,11 @@ class SlideGenerationAgent:
             exported_image_paths = []
             
             for slide_data in state['slides']:
+                if slide_data.get('image_path'):
+                    # Already exported right after rendering
+                    exported_image_paths.append(Path(slide_data['image_path']))
+                    continue
+                
                 if slide_data.get('html_path'):
                     html_path = Path(slide_data['html_path'])
                     slide_number = slide_data['slide_number']
@@ -117,7 +177,8 @@ class SlideGenerationAgent:
             # Generate PDF from exported images
             logger.info("→ Step 3.2: Generating PDF from slide images")
             
-            # Collect image files in order
+            # Collect image files in order; existence is checked here once, so
+            # the exporter is told to skip its own check
             image_files = [
                 Path(slide['image_path']) 
                 for slide in state['slides'] 
@@ -131,26 +192,22 @@ class SlideGenerationAgent:
                 if slide.get('html_path')
             ]
             
+            pdf_future = None
             if image_files:
                 logger.info(f"Using {len(image_files)} pre-rendered PNG images for PDF generation")
                 logger.debug(f"Image files: {[img.name for img in image_files]}")
                 
                 pdf_path = config.output_dir / "final_presentation.pdf"
                 
-                # Pass both image files (preferred) and HTML files (fallback)
-                success = self.pdf_exporter.export_to_pdf(
+                # Pass both image files (preferred) and HTML files (fallback).
+                # Assembly runs in a worker process while the PPTX is built below.
+                pdf_future = submit_pdf_export(
                     html_files=html_files,
                     output_path=pdf_path,
                     aspect_ratio=state['aspect_ratio'],
-                    image_files=image_files
+                    image_files=image_files,
+                    skip_exist_check=True
                 )
-                
-                if success:
-                    state['pdf_path'] = str(pdf_path)
-                    logger.info(f"  ✓ PDF generated successfully: {pdf_path.name}")
-                else:
-                    logger.error("  ✗ PDF generation failed")
-                    state['errors'].append("PDF generation failed")
             else:
                 logger.warning("  ⚠ No slide images available for PDF generation")
                 state['errors'].append("No slide images available for PDF generation")
@@ -184,6 +241,26 @@ class SlideGenerationAgent:
                 logger.warning("  ⚠ No slides available for PowerPoint generation")
                 state['errors'].append("No slides available for PowerPoint generation")
             
+            if pdf_future is not None:
+                try:
+                    success = pdf_future.result()
+                except Exception as e:
+                    logger.warning(f"PDF worker failed ({e}), retrying in-process")
+                    success = self.pdf_exporter.export_to_pdf(
+                        html_files=html_files,
+                        output_path=pdf_path,
+                        aspect_ratio=state['aspect_ratio'],
+                        image_files=image_files,
+                        skip_exist_check=True
+                    )
+                
+                if success:
+                    state['pdf_path'] = str(pdf_path)
+                    logger.info(f"  ✓ PDF generated successfully: {pdf_path.name}")
+                else:
+                    logger.error("  ✗ PDF generation failed")
+                    state['errors'].append("PDF generation failed")
+            
         except Exception as e:
             error_msg = f"Final export failed: {str(e)}"
             logger.error(error_msg)
@@ -200,7 +277,8 @@ class SlideGenerationAgent:
         aspect_ratio: str,
         style: str,
         content_richness: str,
-        color_scheme: str = "light_blue"
+        color_scheme: str = "light_blue",
+        on_slide_ready: Optional[Callable[[int, str], None]] = None
     ) -> Dict[str, Any]:
         """
         Generate presentation slides
@@ -212,6 +290,8 @@ class SlideGenerationAgent:
             style: Visual style
             content_richness: Content detail level
             color_scheme: Color scheme for slides
+            on_slide_ready: Optional callback invoked with (slide_number, image_path)
+                as soon as each slide image has been exported
             
         Returns:
             Result dictionary with output paths
@@ -257,6 +337,8 @@ class SlideGenerationAgent:
             'outline': [],
             'current_slide_index': 0,
             'slides': [],
+            'template_types': [],
+            'prefetched_layouts': {},
             'output_dir': str(config.output_dir),
             'pdf_path': None,
             'ppt_path': None,
@@ -264,15 +346,20 @@ class SlideGenerationAgent:
         }
         
         # Run workflow with appropriate recursion limit
-        # Calculate required limit: 1 (outline) + num_slides * 4 (layout/images/html/increment) + 1 (export) + buffer
-        recursion_limit = max(50, num_slides * 5 + 10)
+        # Calculate required limit: 1 (outline) + num_slides * 5 (layout/images/html/png/increment) + 1 (export) + buffer
+        recursion_limit = max(50, num_slides * 6 + 10)
         
         logger.debug(f"Setting recursion limit to {recursion_limit} for {num_slides} slides")
         
-        final_state = self.workflow.invoke(
-            initial_state,
-            config={"recursion_limit": recursion_limit}
-        )
+        self.nodes.reset_pending_jobs()
+        self._on_slide_ready = on_slide_ready
+        try:
+            final_state = self.workflow.invoke(
+                initial_state,
+                config={"recursion_limit": recursion_limit}
+            )
+        finally:
+            self._on_slide_ready = None
         
         # Prepare result
         result = {
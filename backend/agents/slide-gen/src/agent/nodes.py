@@ -4,30 +4,85 @@ LangGraph workflow nodes for slide generation
 
 import logging
 from pathlib import Path
-from typing import Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
 from src.llm.client import LLMClient
 from src.llm.prompts import PromptTemplates
 from src.image.generator import ImageGenerator
 from src.image.refiner import ImagePromptRefiner
+from src.image.cache import ImageCache, get_image_cache
 from src.renderer.html_renderer import HTMLRenderer
 from src.utils.validators import InputValidator
 from src.utils.template_validator import TemplateValidator
 from src.utils.icon_selector import IconSelector
 from src.utils.config import config
+from src.utils.http import create_http2_client, create_session
 
 logger = logging.getLogger(__name__)
 
+# Completion tokens budgeted for one slide layout (per-slide and batched requests)
+_LAYOUT_TOKENS_PER_SLIDE = 2000
+
 
 class SlideGenerationNodes:
     """Collection of node functions for LangGraph workflow"""
     
     def __init__(self):
         """Initialize node dependencies"""
-        self.llm_client = LLMClient()
-        self.image_generator = ImageGenerator()
-        self.image_refiner = ImagePromptRefiner()
+        # Image jobs of the current slide and of up to slide_concurrency - 1
+        # upcoming slides (whose layouts are already known) run on one pool
+        image_workers = config.image_concurrency * config.slide_concurrency
+        self._image_executor = ThreadPoolExecutor(max_workers=image_workers, thread_name_prefix="slide-image")
+        # Image jobs started ahead of their slide, keyed by (slide number, block index)
+        self._pending_images: Dict[Tuple[int, int], Tuple[Dict[str, Any], Future]] = {}
+        # Batched layout request issued ahead for the slides after the current batch
+        self._layout_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slide-layout")
+        self._pending_layouts: Optional[Tuple[Tuple[int, ...], Future]] = None
+        # Outline index up to which layouts have already been requested in batches
+        self._layouts_requested_until = 0
+        # Batched output is budgeted per slide against the model's context window;
+        # without a configured window the budget cannot be checked, so request per slide
+        self._layout_batch_size = config.llm_batch_size if config.llm_context_window > 0 else 1
+        if self._layout_batch_size < config.llm_batch_size:
+            logger.warning("LLM_BATCH_SIZE > 1 requires LLM_CONTEXT_WINDOW; requesting layouts per slide")
+        
+        # One pooled session for every API call of the deck, sized for the
+        # concurrent image workers plus their prompt refinement calls
+        self.http_session = create_session(pool_maxsize=2 * image_workers)
+        self.llm_client = LLMClient(session=self.http_session)
+        # Image API calls can be multiplexed over a single HTTP/2 connection
+        self.image_client = None
+        if config.image_http2:
+            self.image_client = create_http2_client(
+                pool_maxsize=2 * image_workers,
+                timeout=config.default_timeout
+            )
+        self.image_generator = ImageGenerator(session=self.image_client or self.http_session)
+        self.image_refiner = ImagePromptRefiner(llm_client=self.llm_client)
+        self.image_cache = get_image_cache()
         self.html_renderer = HTMLRenderer()
     
+    def reset_pending_jobs(self) -> None:
+        """Wait for image and layout jobs left over from a previous deck and forget them"""
+        for _, future in self._pending_images.values():
+            future.result()
+        self._pending_images.clear()
+        if self._pending_layouts is not None:
+            self._pending_layouts[1].result()
+            self._pending_layouts = None
+        self._layouts_requested_until = 0
+    
+    def close(self) -> None:
+        """Release pooled HTTP connections held by the API clients"""
+        self._image_executor.shutdown(wait=True, cancel_futures=True)
+        self._layout_executor.shutdown(wait=True, cancel_futures=True)
+        self._pending_images.clear()
+        self._pending_layouts = None
+        self._layouts_requested_until = 0
+        if self.image_client is not None:
+            self.image_client.close()
+        self.http_session.close()
+    
     def generate_outline_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Node: Generate presentation outline
@@ -136,37 +191,41 @@ class SlideGenerationNodes:
         
         try:
             logger.info(f"→ Step 2.1: Generating layout and rich content for slide {slide_number}")
-            logger.debug(f"Requesting LLM to analyze content and select appropriate template based on:")
-            logger.debug(f"  - Content type and structure")
-            logger.debug(f"  - Slide position: {slide_number}/{state['num_slides']}")
-            logger.debug(f"  - Previous templates used for variety")
-            
-            system_prompt, user_prompt = PromptTemplates.layout_generation_prompt(
-                slide_outline=slide_outline,
-                style=state['style'],
-                content_richness=state['content_richness'],
-                aspect_ratio=state['aspect_ratio'],
-                slide_number=slide_number,
-                total_slides=state['num_slides']
-            )
-            
-            logger.debug(f"LLM prompt emphasizes template variety, position-based selection, and proper image margins")
-            logger.debug(f"Content richness level: {state['content_richness']}")
-            
-            response = self.llm_client.generate_json_completion(
-                prompt=user_prompt,
-                system_prompt=system_prompt,
-                temperature=0.7,
-                max_tokens=2000
-            )
+            response = self._take_prefetched_layout(state, current_idx)
+            if response is not None:
+                logger.debug("Using layout from batched LLM request")
+            else:
+                logger.debug(f"Requesting LLM to analyze content and select appropriate template based on:")
+                logger.debug(f"  - Content type and structure")
+                logger.debug(f"  - Slide position: {slide_number}/{state['num_slides']}")
+                logger.debug(f"  - Previous templates used for variety")
+                
+                system_prompt, user_prompt = PromptTemplates.layout_generation_prompt(
+                    slide_outline=slide_outline,
+                    style=state['style'],
+                    content_richness=state['content_richness'],
+                    aspect_ratio=state['aspect_ratio'],
+                    slide_number=slide_number,
+                    total_slides=state['num_slides']
+                )
+                
+                logger.debug(f"LLM prompt emphasizes template variety, position-based selection, and proper image margins")
+                logger.debug(f"Content richness level: {state['content_richness']}")
+                
+                response = self.llm_client.generate_json_completion(
+                    prompt=user_prompt,
+                    system_prompt=system_prompt,
+                    temperature=0.7,
+                    max_tokens=_LAYOUT_TOKENS_PER_SLIDE
+                )
             
             # Extract template selection from LLM response
             llm_selected_template = response.get('template_type', 'title_and_content')
             logger.debug(f"LLM initially selected template: '{llm_selected_template}'")
             
             # Get list of previously used templates for validation
-            previous_templates = [slide.get('template_type', '') for slide in state.get('slides', [])]
-            logger.debug(f"Previously used templates: {previous_templates}")
+            previous_templates = state['template_types']
+            logger.debug("Previously used templates: %s", previous_templates)
             
             # Validate and potentially correct template selection
             validated_template = TemplateValidator.validate_and_enforce_template(
@@ -231,6 +290,7 @@ class SlideGenerationNodes:
             
             # Add slide to state
             state['slides'].append(slide_data)
+            state['template_types'].append(validated_template)
             
             return state
             
@@ -240,6 +300,128 @@ class SlideGenerationNodes:
             state['errors'].append(error_msg)
             return state
     
+    def _take_prefetched_layout(self, state: Dict[str, Any], current_idx: int) -> Optional[Dict[str, Any]]:
+        """
+        Return the batched layout response for the current slide, if any
+        
+        When LLM batching is enabled and the current slide has not been
+        covered by a batch yet, one request is issued for the next batch of
+        slides and the valid responses are kept in state['prefetched_layouts'].
+        The request for the following batch is started in the background right
+        away, so it overlaps with image generation and rendering of the current
+        one. A slide missing from its batch falls back to a per-slide request
+        while the prefetch for later slides stays in flight.
+        
+        Args:
+            state: Current workflow state
+            current_idx: Index of the current slide in the outline
+            
+        Returns:
+            Layout response dict, or None to use a per-slide request
+        """
+        prefetched = state['prefetched_layouts']
+        slide_number = state['outline'][current_idx]['slide_number']
+        batch_size = self._layout_batch_size
+        
+        if slide_number in prefetched or batch_size <= 1:
+            return prefetched.pop(slide_number, None)
+        
+        pending = self._pending_layouts
+        if pending is not None and slide_number in pending[0]:
+            self._pending_layouts = None
+            prefetched.update(pending[1].result())
+        elif current_idx < self._layouts_requested_until:
+            # Already requested in a batch whose response lacked this slide
+            return None
+        else:
+            self._pending_layouts = None
+            batch = state['outline'][current_idx:current_idx + batch_size]
+            self._layouts_requested_until = current_idx + len(batch)
+            if len(batch) > 1:
+                prefetched.update(self._request_layout_batch(state, batch))
+        
+        next_start = self._layouts_requested_until
+        next_batch = state['outline'][next_start:next_start + batch_size]
+        if len(next_batch) > 1:
+            self._layouts_requested_until = next_start + len(next_batch)
+            self._pending_layouts = (
+                tuple(entry['slide_number'] for entry in next_batch),
+                self._layout_executor.submit(self._request_layout_batch, state, next_batch)
+            )
+        
+        return prefetched.pop(slide_number, None)
+    
+    def _request_layout_batch(
+        self,
+        state: Dict[str, Any],
+        batch: List[Dict[str, Any]]
+    ) -> Dict[int, Dict[str, Any]]:
+        """
+        Request layouts for several slides with a single LLM call
+        
+        The batch is shortened until the prompt plus the per-slide output
+        budget fits the context window; slides dropped from it get per-slide
+        requests later.
+        
+        Args:
+            state: Current workflow state
+            batch: Outline entries of the slides to design
+            
+        Returns:
+            Mapping of slide number to layout response (only valid entries)
+        """
+        try:
+            while True:
+                system_prompt, user_prompt = PromptTemplates.batch_layout_generation_prompt(
+                    slide_outlines=batch,
+                    style=state['style'],
+                    content_richness=state['content_richness'],
+                    aspect_ratio=state['aspect_ratio'],
+                    total_slides=state['num_slides']
+                )
+                room = self.llm_client.completion_room(user_prompt, system_prompt)
+                fitting = len(batch) if room is None else room // _LAYOUT_TOKENS_PER_SLIDE
+                if fitting >= len(batch):
+                    break
+                if fitting < 2:
+                    logger.info("Batched layout request does not fit the context window, using per-slide requests")
+                    return {}
+                batch = batch[:fitting]
+            
+            slide_numbers = [entry['slide_number'] for entry in batch]
+            logger.info(f"→ Requesting layouts for slides {slide_numbers[0]}-{slide_numbers[-1]} in one LLM call")
+            response = self.llm_client.generate_json_completion(
+                prompt=user_prompt,
+                system_prompt=system_prompt,
+                temperature=0.7,
+                max_tokens=_LAYOUT_TOKENS_PER_SLIDE * len(batch)
+            )
+        except Exception as e:
+            logger.warning(f"Batched layout request failed, falling back to per-slide requests: {str(e)}")
+            return {}
+        
+        layouts = response.get('slides')
+        if not isinstance(layouts, list):
+            logger.warning("Batched layout response has no 'slides' array, falling back to per-slide requests")
+            return {}
+        
+        if len(layouts) != len(batch):
+            logger.warning(f"Batched layout count mismatch: expected {len(batch)}, got {len(layouts)}")
+        
+        valid = {}
+        for slide_number, layout in zip(slide_numbers, layouts):
+            if (
+                isinstance(layout, dict)
+                and isinstance(layout.get('layout'), dict)
+                and isinstance(layout['layout'].get('content_blocks'), list)
+            ):
+                valid[slide_number] = layout
+            else:
+                logger.warning(f"Invalid batched layout for slide {slide_number}, will request it separately")
+        
+        logger.info(f"✓ Batched layouts received: {len(valid)}/{len(batch)} usable")
+        return valid
+    
     def generate_images_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Node: Generate images for current slide
@@ -273,92 +455,202 @@ class SlideGenerationNodes:
         logger.info(f"→ Step 2.2 & 2.3: Generating {len(image_blocks)} image(s) for slide {slide_number}")
         logger.debug(f"Image generation style: {state['style']}")
         
-        for block_idx, block in image_blocks:
-            try:
-                raw_prompt = block.get('image_prompt', 'placeholder image')
-                position = block.get('position', {})
-                width = position.get('width', 800)
-                height = position.get('height', 600)
-                x_pos = position.get('x', 0)
-                y_pos = position.get('y', 0)
-                
-                # Validate aspect ratio
-                aspect_ratio = width / height if height > 0 else 1.0
-                logger.debug(f"  Image {block_idx + 1} details:")
-                logger.debug(f"    - Position: ({x_pos}, {y_pos})")
-                logger.debug(f"    - Dimensions: {width}x{height}")
-                logger.debug(f"    - Aspect ratio: {aspect_ratio:.3f} ({width}:{height})")
-                logger.debug(f"    - Raw prompt length: {len(raw_prompt)} chars")
-                
-                # Check for extreme aspect ratios that could cause distortion
-                if aspect_ratio < 0.33:  # Narrower than 1:3
-                    logger.warning(f"    ⚠ Image has very narrow aspect ratio ({aspect_ratio:.3f})")
-                    logger.warning(f"      This may cause distortion. Recommended: use ratios between 1:3 and 3:1")
-                elif aspect_ratio > 3.0:  # Wider than 3:1
-                    logger.warning(f"    ⚠ Image has very wide aspect ratio ({aspect_ratio:.3f})")
-                    logger.warning(f"      This may cause distortion. Recommended: use ratios between 1:3 and 3:1")
-                else:
-                    # Log standard aspect ratio if it matches common ones
-                    standard_ratios = {
-                        16/9: "16:9 landscape",
-                        4/3: "4:3 landscape",
-                        1.0: "1:1 square",
-                        3/4: "3:4 portrait",
-                        2/3: "2:3 portrait",
-                        21/9: "21:9 ultrawide"
-                    }
-                    for std_ratio, name in standard_ratios.items():
-                        if abs(aspect_ratio - std_ratio) < 0.05:  # Within 5% tolerance
-                            logger.debug(f"    ✓ Standard aspect ratio detected: {name}")
-                            break
-                
-                # Refine prompt
-                logger.info(f"  Image {block_idx + 1}: Refining prompt for professional quality...")
-                refined_prompt = self.image_refiner.refine_prompt(
-                    raw_prompt=raw_prompt,
-                    style=state['style'],
-                    slide_number=slide_number
-                )
-                logger.debug(f"    - Refined prompt length: {len(refined_prompt)} chars")
-                if logger.isEnabledFor(logging.DEBUG):
-                    prompt_preview = refined_prompt[:100] + "..." if len(refined_prompt) > 100 else refined_prompt
-                    logger.debug(f"    - Refined prompt preview: {prompt_preview}")
-                
-                # Generate image
-                image_filename = f"slide_{slide_number}_img_{block_idx + 1}.png"
-                image_path = config.images_dir / image_filename
-                
-                logger.info(f"  Image {block_idx + 1}: Generating {width}x{height} image...")
-                logger.debug(f"    - Output path: {image_path}")
-                
-                success, error = self.image_generator.generate_image(
-                    prompt=refined_prompt,
-                    width=width,
-                    height=height,
-                    output_path=image_path
-                )
-                
-                if success:
-                    logger.info(f"  ✓ Image {block_idx + 1} generated successfully")
-                    logger.debug(f"    - Saved to: {image_filename}")
-                else:
-                    logger.warning(f"  ⚠ Image {block_idx + 1} generation failed, using placeholder")
-                    if error:
-                        logger.error(f"    - Error details: {error}")
-                        state['errors'].append(error)
-                
-                # Update block with image path
-                content_blocks[block_idx]['image_path'] = str(image_path)
-                logger.debug(f"    - Image path updated in content block")
-                
-            except Exception as e:
-                error_msg = f"Image generation error (slide {slide_number}, block {block_idx}): {str(e)}"
-                logger.error(f"  ✗ {error_msg}", exc_info=True)
-                state['errors'].append(error_msg)
+        # Image blocks are independent, so they run concurrently; blocks of this
+        # slide may already have been started while an earlier slide was processed
+        futures = self._submit_block_images(image_blocks, slide_number, state['style'])
+        self._prefetch_upcoming_images(state, slide_number)
+        
+        # Results are collected in block order to keep error reporting stable
+        errors = [future.result() for future in futures]
+        
+        state['errors'].extend(error for error in errors if error)
         
         logger.info(f"✓ Completed image generation for slide {slide_number}")
         return state
     
+    def _submit_block_images(
+        self,
+        image_blocks: List[Tuple[int, Dict[str, Any]]],
+        slide_number: int,
+        style: str
+    ) -> List[Future]:
+        """
+        Start image jobs for the given placeholder blocks, reusing jobs already in flight
+        
+        Args:
+            image_blocks: (block index, block) pairs of image placeholders
+            slide_number: Slide the blocks belong to
+            style: Visual style passed to the prompt refiner
+            
+        Returns:
+            Futures resolving to each block's error message (or None), in block order
+        """
+        futures = []
+        for block_idx, block in image_blocks:
+            pending = self._pending_images.pop((slide_number, block_idx), None)
+            if pending is not None:
+                prefetched_block, future = pending
+                if prefetched_block is block:
+                    futures.append(future)
+                    continue
+                # The layout changed since the job started; let it finish so the two
+                # jobs never write the same file (a matching prompt then hits the cache)
+                future.result()
+            futures.append(self._image_executor.submit(
+                self._generate_block_image, block_idx, block, slide_number, style
+            ))
+        return futures
+    
+    def _prefetch_upcoming_images(self, state: Dict[str, Any], slide_number: int) -> None:
+        """
+        Start image jobs for upcoming slides whose layouts were already fetched
+        
+        Batched layout responses are used as-is by generate_slide_layout_node,
+        so their image placeholder blocks are the ones that end up in the slide
+        and can be generated ahead of time while this slide renders.
+        
+        Args:
+            state: Current workflow state
+            slide_number: Slide currently being processed
+        """
+        lookahead = config.slide_concurrency - 1
+        if lookahead <= 0 or not state['prefetched_layouts']:
+            return
+        
+        upcoming = [entry['slide_number'] for entry in state['outline'] if entry['slide_number'] > slide_number]
+        for upcoming_number in upcoming[:lookahead]:
+            layout = state['prefetched_layouts'].get(upcoming_number)
+            if layout is None:
+                continue
+            
+            content_blocks = layout['layout']['content_blocks']
+            started = 0
+            for block_idx, block in enumerate(content_blocks):
+                key = (upcoming_number, block_idx)
+                if block.get('type') != 'image_placeholder' or key in self._pending_images:
+                    continue
+                future = self._image_executor.submit(
+                    self._generate_block_image, block_idx, block, upcoming_number, state['style']
+                )
+                self._pending_images[key] = (block, future)
+                started += 1
+            
+            if started:
+                logger.debug(f"Started {started} image(s) for upcoming slide {upcoming_number}")
+    
+    def _generate_block_image(
+        self,
+        block_idx: int,
+        block: Dict[str, Any],
+        slide_number: int,
+        style: str
+    ) -> Optional[str]:
+        """
+        Refine the prompt for one image placeholder and generate its image
+        
+        Args:
+            block_idx: Index of the block within the slide's content blocks
+            block: Image placeholder block (updated in place with image_path)
+            slide_number: Slide number used for file naming and logging
+            style: Visual style passed to the prompt refiner
+            
+        Returns:
+            Error message if generation failed, None otherwise
+        """
+        try:
+            raw_prompt = block.get('image_prompt', 'placeholder image')
+            position = block.get('position', {})
+            width = position.get('width', 800)
+            height = position.get('height', 600)
+            x_pos = position.get('x', 0)
+            y_pos = position.get('y', 0)
+            
+            # Validate aspect ratio
+            aspect_ratio = width / height if height > 0 else 1.0
+            logger.debug(f"  Image {block_idx + 1} details:")
+            logger.debug(f"    - Position: ({x_pos}, {y_pos})")
+            logger.debug(f"    - Dimensions: {width}x{height}")
+            logger.debug(f"    - Aspect ratio: {aspect_ratio:.3f} ({width}:{height})")
+            logger.debug(f"    - Raw prompt length: {len(raw_prompt)} chars")
+            
+            # Check for extreme aspect ratios that could cause distortion
+            if aspect_ratio < 0.33:  # Narrower than 1:3
+                logger.warning(f"    ⚠ Image has very narrow aspect ratio ({aspect_ratio:.3f})")
+                logger.warning(f"      This may cause distortion. Recommended: use ratios between 1:3 and 3:1")
+            elif aspect_ratio > 3.0:  # Wider than 3:1
+                logger.warning(f"    ⚠ Image has very wide aspect ratio ({aspect_ratio:.3f})")
+                logger.warning(f"      This may cause distortion. Recommended: use ratios between 1:3 and 3:1")
+            else:
+                # Log standard aspect ratio if it matches common ones
+                standard_ratios = {
+                    16/9: "16:9 landscape",
+                    4/3: "4:3 landscape",
+                    1.0: "1:1 square",
+                    3/4: "3:4 portrait",
+                    2/3: "2:3 portrait",
+                    21/9: "21:9 ultrawide"
+                }
+                for std_ratio, name in standard_ratios.items():
+                    if abs(aspect_ratio - std_ratio) < 0.05:  # Within 5% tolerance
+                        logger.debug(f"    ✓ Standard aspect ratio detected: {name}")
+                        break
+            
+            image_filename = f"slide_{slide_number}_img_{block_idx + 1}.png"
+            image_path = config.images_dir / image_filename
+            
+            # Reuse a previously generated image for the same prompt, style and size
+            cache_key = ImageCache.make_key(self.image_generator.model, style, f"{width}x{height}", raw_prompt)
+            if self.image_cache.fetch(cache_key, image_path):
+                logger.info(f"  ✓ Image {block_idx + 1} served from cache")
+                block['image_path'] = str(image_path)
+                return None
+            
+            # The output file may be a hardlink into the cache from an earlier run;
+            # drop it so the new image is never written through to a cache entry
+            image_path.unlink(missing_ok=True)
+            
+            # Refine prompt
+            logger.info(f"  Image {block_idx + 1}: Refining prompt for professional quality...")
+            refined_prompt = self.image_refiner.refine_prompt(
+                raw_prompt=raw_prompt,
+                style=style,
+                slide_number=slide_number
+            )
+            logger.debug(f"    - Refined prompt length: {len(refined_prompt)} chars")
+            if logger.isEnabledFor(logging.DEBUG):
+                prompt_preview = refined_prompt[:100] + "..." if len(refined_prompt) > 100 else refined_prompt
+                logger.debug(f"    - Refined prompt preview: {prompt_preview}")
+            
+            # Generate image
+            logger.info(f"  Image {block_idx + 1}: Generating {width}x{height} image...")
+            logger.debug(f"    - Output path: {image_path}")
+            
+            success, error = self.image_generator.generate_image(
+                prompt=refined_prompt,
+                width=width,
+                height=height,
+                output_path=image_path
+            )
+            
+            if success:
+                logger.info(f"  ✓ Image {block_idx + 1} generated successfully")
+                logger.debug(f"    - Saved to: {image_filename}")
+                self.image_cache.store(cache_key, image_path)
+            else:
+                logger.warning(f"  ⚠ Image {block_idx + 1} generation failed, using placeholder")
+                if error:
+                    logger.error(f"    - Error details: {error}")
+            
+            # Update block with image path
+            block['image_path'] = str(image_path)
+            logger.debug(f"    - Image path updated in content block")
+            return error
+
+        except Exception as e:
+            error_msg = f"Image generation error (slide {slide_number}, block {block_idx}): {str(e)}"
+            logger.error(f"  ✗ {error_msg}", exc_info=True)
+            return error_msg
+    
     def render_slide_html_node(self, state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Node: Render slide to HTML
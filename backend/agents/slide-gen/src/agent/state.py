@@ -52,6 +52,8 @@ class SlideGenerationState(TypedDict):
     outline: List[SlideOutlineEntry]
     current_slide_index: int
     slides: List[SlideData]
+    template_types: List[str]  # template_type of each entry in slides, kept in step
+    prefetched_layouts: Dict[int, Dict[str, Any]]  # batched LLM layouts keyed by slide number
     
     # Output paths
     output_dir: str
@@ -4,5 +4,7 @@ Image generation and processing modules
 
 from .generator import ImageGenerator
 from .refiner import ImagePromptRefiner
+from .cache import ImageCache, get_image_cache
+from .poller import TaskPoller
 
-__all__ = ["ImageGenerator", "ImagePromptRefiner"]
+__all__ = ["ImageGenerator", "ImagePromptRefiner", "ImageCache", "get_image_cache", "TaskPoller"]
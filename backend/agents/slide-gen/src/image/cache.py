@@ -0,0 +1,212 @@
+"""
+Content-addressed on-disk cache for generated images
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import threading
+from pathlib import Path
+from typing import Optional
+from src.utils.config import get_config
+
+logger = logging.getLogger(__name__)
+
+
+def _fast_copy(src: Path, dst: Path) -> None:
+    """
+    Copy src to dst without moving bytes through user space when possible
+    
+    Tries a hardlink first (no data copied), then os.sendfile for
+    cross-device copies, and finally shutil.copyfile on filesystems or
+    platforms that support neither.
+    
+    Args:
+        src: Existing file
+        dst: Destination path (must not exist)
+    """
+    try:
+        os.link(src, dst)
+        return
+    except FileNotFoundError:
+        raise
+    except OSError:
+        pass
+    
+    if hasattr(os, "sendfile"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                size = os.fstat(fsrc.fileno()).st_size
+                offset = 0
+                while offset < size:
+                    sent = os.sendfile(fdst.fileno(), fsrc.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            if offset == size:
+                return
+        except FileNotFoundError:
+            raise
+        except OSError:
+            pass
+    
+    shutil.copyfile(src, dst)
+
+
+class ImageCache:
+    """Stores generated images under the SHA-256 of their generation parameters"""
+    
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        """
+        Initialize image cache
+        
+        Args:
+            cache_dir: Directory holding cached PNG files
+            max_bytes: Size cap for the cache directory (0 disables caching)
+        """
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        
+        if self.enabled:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether the cache is active"""
+        return self.max_bytes > 0
+    
+    @staticmethod
+    def make_key(*parts: object) -> str:
+        """
+        Build a cache key from generation parameters
+        
+        Args:
+            *parts: Values that determine the generated image (model, style, size, prompt...)
+        
+        Returns:
+            Hex digest identifying the image
+        """
+        return hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+    
+    def fetch(self, key: str, output_path: Path) -> bool:
+        """
+        Materialize a cached image at output_path
+        
+        Args:
+            key: Cache key from make_key()
+            output_path: Destination path for the image
+        
+        Returns:
+            True on cache hit, False otherwise
+        """
+        if not self.enabled:
+            return False
+        
+        cached_path = self.cache_dir / f"{key}.png"
+        try:
+            self._link_or_copy(cached_path, output_path)
+            # Refresh access time explicitly; many filesystems are mounted noatime
+            os.utime(cached_path)
+        except FileNotFoundError:
+            return False
+        except OSError as e:
+            logger.warning(f"Failed to read cached image {cached_path.name}: {e}")
+            return False
+        
+        logger.debug(f"Image cache hit: {key[:12]} -> {output_path.name}")
+        return True
+    
+    def store(self, key: str, image_path: Path) -> None:
+        """
+        Add a freshly generated image to the cache
+        
+        Args:
+            key: Cache key from make_key()
+            image_path: Path of the generated image
+        """
+        if not self.enabled:
+            return
+        
+        cached_path = self.cache_dir / f"{key}.png"
+        try:
+            self._link_or_copy(image_path, cached_path)
+        except OSError as e:
+            logger.warning(f"Failed to cache image {image_path.name}: {e}")
+            return
+        
+        logger.debug(f"Image cached: {image_path.name} -> {key[:12]}")
+        self._evict()
+    
+    @staticmethod
+    def _link_or_copy(src: Path, dst: Path) -> None:
+        """
+        Place src at dst atomically, hardlinking when possible
+        
+        The file is staged under a temporary name and moved into place with
+        os.replace(), so readers never observe a partially written image.
+        """
+        tmp_path = dst.with_name(f"{dst.name}.{threading.get_ident()}.tmp")
+        try:
+            _fast_copy(src, tmp_path)
+            os.replace(tmp_path, dst)
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
+    
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits max_bytes"""
+        with self._lock:
+            entries = []
+            total = 0
+            with os.scandir(self.cache_dir) as it:
+                for entry in it:
+                    if not entry.name.endswith(".png"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_atime, stat.st_size, entry.path))
+                    total += stat.st_size
+            
+            if total <= self.max_bytes:
+                return
+            
+            entries.sort()
+            removed = 0
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                removed += 1
+            
+            logger.info(f"Image cache evicted {removed} entries (now {total / (1024 * 1024):.1f} MB)")
+
+
+_image_cache: Optional[ImageCache] = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    """
+    Get the shared image cache configured from config
+    
+    Returns:
+        ImageCache: Shared cache instance
+    """
+    global _image_cache
+    if _image_cache is None:
+        with _image_cache_lock:
+            if _image_cache is None:
+                config = get_config()
+                _image_cache = ImageCache(
+                    cache_dir=config.image_cache_dir,
+                    max_bytes=int(config.image_cache_max_gb * 1024 ** 3)
+                )
+    return _image_cache
@@ -2,30 +2,97 @@
 Image generation API client for Z-Image-Turbo Flask backend
 """
 
+import functools
 import logging
+import shutil
 import time
+from io import BytesIO
 from pathlib import Path
 from typing import Optional, Tuple
 import requests
 from PIL import Image, ImageOps
-from io import BytesIO
 from src.utils.config import config
+from src.utils.http import REQUEST_ERRORS, TIMEOUT_ERRORS, create_session, stream_get
+from src.utils.retry import CircuitBreaker, RetryBudget
+from src.image.poller import TaskPoller
 
 logger = logging.getLogger(__name__)
 
+# Read size used when spooling a downloaded image to disk
+_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+@functools.lru_cache(maxsize=32)
+def _placeholder_png(width: int, height: int) -> bytes:
+    """
+    Render the placeholder shown for a failed image, encoded as PNG
+    
+    The placeholder depends only on its size, so each size is drawn once
+    and later failures just write the cached bytes.
+    
+    Args:
+        width: Image width
+        height: Image height
+        
+    Returns:
+        PNG file contents
+    """
+    from PIL import ImageDraw
+    
+    # Create gray placeholder
+    image = Image.new('RGB', (width, height), color='#E0E0E0')
+    draw = ImageDraw.Draw(image)
+    
+    # Draw border
+    draw.rectangle(
+        [(10, 10), (width - 10, height - 10)],
+        outline='#BDBDBD',
+        width=3
+    )
+    
+    # Add text
+    text = "Image Generation Failed"
+    
+    # Calculate text position (center)
+    bbox = draw.textbbox((0, 0), text)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+    x = (width - text_width) // 2
+    y = (height - text_height) // 2
+    
+    draw.text((x, y), text, fill='#757575')
+    
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return buffer.getvalue()
+
 
 class ImageGenerator:
     """Client for generating images via Z-Image-Turbo async API"""
     
-    def __init__(self):
-        """Initialize image generator with configuration"""
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        Initialize image generator with configuration
+        
+        Args:
+            session: Shared HTTP session (requests.Session or httpx.Client);
+                a private pooled session is created if omitted
+        """
+        self._owns_session = session is None
+        self.session = session or create_session()
         self.api_key = config.image_api_key  # Not used for Z-Image-Turbo
         self.api_url = config.image_api_url  # Base URL like http://localhost:5000
         self.model = config.image_model
         self.timeout = config.default_timeout
         self.max_retries = config.max_retries
-        self.poll_interval = 2  # Poll every 2 seconds
+        self.circuit = CircuitBreaker(
+            "image API",
+            failure_threshold=config.circuit_failure_threshold,
+            reset_timeout=config.circuit_reset_timeout
+        )
+        self.poll_interval = 2  # Poll at most every 2 seconds (starts faster, see TaskPoller)
         self.max_wait_time = 300  # Maximum wait time: 5 minutes
+        self.poller = TaskPoller(self.session, self.api_url, self.poll_interval)
         
         # Check if we should use internal bridge based on config
         # This is controlled by USE_BRIDGE environment variable
@@ -64,6 +131,11 @@ class ImageGenerator:
         else:
             logger.info("HTTP mode enabled (USE_BRIDGE=false) - Using direct API calls")
     
+    def close(self) -> None:
+        """Close the HTTP session if this generator created it"""
+        if self._owns_session:
+            self.session.close()
+    
     def generate_image(
         self,
         prompt: str,
@@ -88,8 +160,12 @@ class ImageGenerator:
         logger.debug(f"Prompt: {prompt_preview}")
         logger.debug(f"Output path: {output_path}")
         
+        budget = RetryBudget(config.retry_max_elapsed)
         last_error = None
         for attempt in range(self.max_retries):
+            if not self.circuit.allow():
+                last_error = Exception("circuit open after repeated failures")
+                break
             try:
                 logger.debug(f"Image generation attempt {attempt + 1}/{self.max_retries}")
                 
@@ -114,6 +190,7 @@ class ImageGenerator:
                 success = self._download_image(task_id, output_path, width, height)
                 if success:
                     logger.info(f"✓ Image saved successfully to {output_path.name}")
+                    self.circuit.record_success()
                     return True, None
                 else:
                     raise Exception("Failed to download image - no image data received")
@@ -121,10 +198,9 @@ class ImageGenerator:
             except Exception as e:
                 last_error = e
                 logger.warning(f"Image generation attempt {attempt + 1} failed: {str(e)}")
-                if attempt < self.max_retries - 1:
-                    backoff_time = 2 ** attempt
-                    logger.info(f"Retrying in {backoff_time} seconds...")
-                    time.sleep(backoff_time)  # Exponential backoff
+                self.circuit.record_failure()
+                if attempt < self.max_retries - 1 and not budget.sleep(attempt):
+                    break
         
         error_msg = f"Image generation failed after {self.max_retries} attempts: {str(last_error)}"
         logger.error(error_msg)
@@ -173,7 +249,7 @@ class ImageGenerator:
                 "num_inference_steps": 9
             }
             
-            response = requests.post(url, json=payload, timeout=30)
+            response = self.session.post(url, json=payload, timeout=30)
             logger.debug(f"HTTP response status: {response.status_code}")
             response.raise_for_status()
             
@@ -188,10 +264,10 @@ class ImageGenerator:
                 logger.error(f"API returned error code: {result.get('code')} - {error_msg}")
                 return None
                 
-        except requests.exceptions.Timeout as e:
+        except TIMEOUT_ERRORS as e:
             logger.error(f"Task submission timeout: {str(e)}")
             return None
-        except requests.exceptions.RequestException as e:
+        except REQUEST_ERRORS as e:
             logger.error(f"Task submission HTTP error: {str(e)}")
             return None
         except Exception as e:
@@ -228,62 +304,25 @@ class ImageGenerator:
                 logger.warning(f"Task {task_id} failed via internal bridge: {result[1]}")
             return result
         
-        # Fall back to HTTP
+        # Fall back to HTTP: one shared poller tracks all in-flight tasks
         logger.debug(f"Polling task {task_id} status via HTTP (max wait: {self.max_wait_time}s)")
         start_time = time.time()
-        poll_count = 0
-        
-        while True:
-            try:
-                poll_count += 1
-                elapsed = time.time() - start_time
-                
-                # Check timeout
-                if elapsed > self.max_wait_time:
-                    error_msg = f"Task timeout after {elapsed:.1f}s (max: {self.max_wait_time}s)"
-                    logger.error(error_msg)
-                    return False, error_msg
-                
-                # Query task status
-                url = f"{self.api_url}/api/task/{task_id}"
-                response = requests.get(url, timeout=30)
-                response.raise_for_status()
-                
-                result = response.json()
-                
-                if result.get("code") != 200:
-                    error_msg = result.get("message", "Unknown error")
-                    logger.error(f"Task query returned error: {error_msg}")
-                    return False, error_msg
-                
-                status = result.get("data", {}).get("status")
-                
-                if status == "completed":
-                    logger.info(f"✓ Task {task_id} completed after {elapsed:.1f}s ({poll_count} polls)")
-                    return True, None
-                elif status == "failed":
-                    error_msg = result.get("data", {}).get("error_message", "Task failed without error message")
-                    logger.error(f"Task {task_id} failed: {error_msg}")
-                    return False, error_msg
-                elif status in ["pending", "processing"]:
-                    # Still processing, wait and retry
-                    if poll_count % 5 == 0:  # Log every 5th poll
-                        logger.debug(f"Task {task_id} status: {status} (elapsed: {elapsed:.1f}s, poll #{poll_count})")
-                    time.sleep(self.poll_interval)
-                else:
-                    error_msg = f"Unknown status: {status}"
-                    logger.warning(error_msg)
-                    return False, error_msg
-                    
-            except requests.exceptions.Timeout as e:
-                logger.warning(f"Task status query timeout: {str(e)}")
-                return False, f"Status query timeout: {str(e)}"
-            except requests.exceptions.RequestException as e:
-                logger.error(f"Error polling task status: {str(e)}")
-                return False, f"Polling error: {str(e)}"
-            except Exception as e:
-                logger.error(f"Unexpected error polling task status: {str(e)}", exc_info=True)
-                return False, str(e)
+        pending = self.poller.register(task_id)
+        
+        if not pending.event.wait(timeout=self.max_wait_time):
+            self.poller.unregister(task_id)
+            elapsed = time.time() - start_time
+            error_msg = f"Task timeout after {elapsed:.1f}s (max: {self.max_wait_time}s)"
+            logger.error(error_msg)
+            return False, error_msg
+        
+        success, error_msg = pending.result
+        elapsed = time.time() - start_time
+        if success:
+            logger.info(f"✓ Task {task_id} completed after {elapsed:.1f}s")
+        else:
+            logger.error(f"Task {task_id} failed: {error_msg}")
+        return success, error_msg
     
     def _download_image(
         self, 
@@ -302,53 +341,97 @@ class ImageGenerator:
             # Use internal bridge if available
             if self.use_internal_bridge and self.internal_bridge:
                 logger.debug(f"Downloading image for task {task_id} via internal bridge")
-                image_bytes = self.internal_bridge.get_task_result(task_id)
+                # Open the generated file in place rather than copying its bytes
+                image_path = self.internal_bridge.get_task_result_path(task_id)
                 
-                if image_bytes:
-                    logger.debug(f"Received {len(image_bytes)} bytes from internal bridge")
+                if image_path:
+                    logger.debug(f"Opening image from internal bridge: {image_path}")
                     # Save and resize image
-                    image = Image.open(BytesIO(image_bytes))
-                    logger.debug(f"Image opened successfully, original size: {image.size}")
-                    image = self._resize_image(image, target_width, target_height)
-                    image.save(output_path)
+                    try:
+                        image = Image.open(image_path)
+                    except FileNotFoundError:
+                        logger.error(f"Output file not found: {image_path}")
+                        return False
+                    with image:
+                        logger.debug(f"Image opened successfully, original size: {image.size}")
+                        if self._can_keep_encoded(image, output_path, target_width, target_height):
+                            shutil.copyfile(image_path, output_path)
+                        else:
+                            resized = self._resize_image(image, target_width, target_height)
+                            resized.save(output_path)
                     logger.debug(f"Image saved to {output_path}")
                     return True
                 else:
-                    logger.error("Failed to get image data from internal bridge (received None)")
+                    logger.error("Failed to get image path from internal bridge (received None)")
                     return False
             
             # Fall back to HTTP
             url = f"{self.api_url}/api/result/{task_id}"
             logger.debug(f"Downloading image via HTTP from {url}")
-            response = requests.get(url, timeout=60)
-            logger.debug(f"Download response status: {response.status_code}")
-            response.raise_for_status()
-            
-            # Check if response is image
-            content_type = response.headers.get('content-type', '')
-            content_length = len(response.content)
-            logger.debug(f"Content type: {content_type}, size: {content_length} bytes")
-            
-            if 'image' in content_type:
-                # Save and resize image
-                image = Image.open(BytesIO(response.content))
-                logger.debug(f"Image opened successfully, original size: {image.size}")
-                image = self._resize_image(image, target_width, target_height)
-                image.save(output_path)
-                logger.debug(f"Image saved to {output_path}")
-                return True
-            else:
-                # Not an image, probably still processing or error
-                logger.error(f"Expected image content but received: {content_type}")
-                if logger.isEnabledFor(logging.DEBUG):
-                    preview = response.text[:200] if hasattr(response, 'text') else str(response.content[:200])
-                    logger.debug(f"Response preview: {preview}")
-                return False
+            with stream_get(self.session, url, timeout=60) as (response, body):
+                logger.debug(f"Download response status: {response.status_code}")
+                response.raise_for_status()
+                
+                # Check if response is image
+                content_type = response.headers.get('content-type', '')
+                content_length = response.headers.get('content-length', 'unknown')
+                logger.debug(f"Content type: {content_type}, size: {content_length} bytes")
+                
+                if 'image' in content_type:
+                    # Spool the body to disk in chunks rather than holding it in memory;
+                    # only the header is decoded unless the image has to be resized
+                    part_path = output_path.with_name(output_path.name + '.part')
+                    try:
+                        with part_path.open('wb') as part:
+                            shutil.copyfileobj(body, part, _DOWNLOAD_CHUNK_SIZE)
+                        with Image.open(part_path) as image:
+                            logger.debug(f"Image opened successfully, original size: {image.size}")
+                            if self._can_keep_encoded(image, output_path, target_width, target_height):
+                                resized = None
+                            else:
+                                resized = self._resize_image(image, target_width, target_height)
+                                resized.save(output_path)
+                        if resized is None:
+                            part_path.replace(output_path)
+                    finally:
+                        part_path.unlink(missing_ok=True)
+                    logger.debug(f"Image saved to {output_path}")
+                    return True
+                else:
+                    # Not an image, probably still processing or error
+                    logger.error(f"Expected image content but received: {content_type}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        preview = body.read(200)
+                        logger.debug(f"Response preview: {preview!r}")
+                    return False
                 
         except Exception as e:
             logger.error(f"Failed to download image for task {task_id}: {str(e)}", exc_info=True)
             return False
     
+    @staticmethod
+    def _can_keep_encoded(image: Image.Image, output_path: Path, target_width: int, target_height: int) -> bool:
+        """
+        Check whether the source file can be written out unchanged
+        
+        True when the image already has the target size and is a PNG going to
+        a .png path, in which case re-encoding would only reproduce the bytes.
+        
+        Args:
+            image: Opened (not yet decoded) source image
+            output_path: Destination path
+            target_width: Target width
+            target_height: Target height
+            
+        Returns:
+            True if the original bytes can be copied as-is
+        """
+        return (
+            image.size == (target_width, target_height)
+            and image.format == 'PNG'
+            and output_path.suffix.lower() == '.png'
+        )
+    
     def _resize_image(self, image: Image.Image, target_width: int, target_height: int) -> Image.Image:
         """
         Resize image to target dimensions while preserving aspect ratio (contain strategy)
@@ -374,6 +457,12 @@ class ImageGenerator:
         
         logger.debug(f"Aspect-ratio-preserving resize: {current_size} → {target_size}")
         
+        # JPEG can decode straight to 1/2, 1/4 or 1/8 scale; stay at 2x the target
+        # so the final resample still has detail to work with
+        if image.format == 'JPEG' and target_width < image.width and target_height < image.height:
+            image.draft('RGB', (target_width * 2, target_height * 2))
+            logger.debug(f"  JPEG draft decode at {image.size}")
+        
         # Calculate aspect ratios
         img_aspect = image.width / image.height
         target_aspect = target_width / target_height
@@ -395,9 +484,13 @@ class ImageGenerator:
         
         logger.debug(f"  Scaled dimensions: {new_width}x{new_height}")
         
-        # Resize with high quality
-        resized = image.resize((new_width, new_height), Image.Resampling.LANCZOS)
-        logger.debug(f"  Image resized to {resized.size} using LANCZOS resampling")
+        # LANCZOS only pays off for real downscales; BICUBIC is enough otherwise
+        if image.width > new_width * 1.5:
+            resample, resample_name = Image.Resampling.LANCZOS, "LANCZOS"
+        else:
+            resample, resample_name = Image.Resampling.BICUBIC, "BICUBIC"
+        resized = image.resize((new_width, new_height), resample)
+        logger.debug(f"  Image resized to {resized.size} using {resample_name} resampling")
         
         # Create canvas with target size and neutral background
         canvas = Image.new('RGB', (target_width, target_height), color='#F5F5F5')
@@ -431,34 +524,9 @@ class ImageGenerator:
             height: Image height
             error_msg: Error message to display
         """
-        from PIL import ImageDraw
-
         logger.info(f"Creating placeholder image: {width}x{height}")
         logger.debug(f"Placeholder will be saved to: {output_path}")
         logger.debug(f"Error message: {error_msg[:100]}...")
         
-        # Create gray placeholder
-        image = Image.new('RGB', (width, height), color='#E0E0E0')
-        draw = ImageDraw.Draw(image)
-        
-        # Draw border
-        draw.rectangle(
-            [(10, 10), (width - 10, height - 10)],
-            outline='#BDBDBD',
-            width=3
-        )
-        
-        # Add text
-        text = "Image Generation Failed"
-        
-        # Calculate text position (center)
-        bbox = draw.textbbox((0, 0), text)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        x = (width - text_width) // 2
-        y = (height - text_height) // 2
-        
-        draw.text((x, y), text, fill='#757575')
-        
-        image.save(output_path)
+        output_path.write_bytes(_placeholder_png(width, height))
         logger.debug(f"Placeholder image saved successfully")
@@ -0,0 +1,173 @@
+"""
+Shared status poller for in-flight image generation tasks
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from src.utils.http import REQUEST_ERRORS
+
+logger = logging.getLogger(__name__)
+
+# First polling delay after a task is registered; grows by _POLL_BACKOFF per round
+_MIN_POLL_INTERVAL = 0.2
+_POLL_BACKOFF = 1.5
+
+
+class _PendingTask:
+    """Completion handle for one registered task"""
+    
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Tuple[bool, Optional[str]] = (False, "Task still pending")
+    
+    def finish(self, success: bool, error: Optional[str] = None) -> None:
+        self.result = (success, error)
+        self.event.set()
+
+
+class TaskPoller:
+    """
+    Polls the status of every in-flight task from a single background thread
+    
+    Each tick queries all registered task IDs with one request to the batch
+    status endpoint (GET /api/tasks?ids=...). Servers without that endpoint
+    are detected on the first 404 (HTTP status or response code) and polled
+    per task instead, still from the one thread. Waiting callers block on a per-task event.
+    
+    The delay between rounds starts short and ramps up to poll_interval, so
+    fast tasks are noticed quickly while long ones are not polled needlessly.
+    Registering a task restarts the ramp.
+    """
+    
+    def __init__(self, session: Any, api_url: str, poll_interval: float = 2.0):
+        """
+        Initialize task poller
+        
+        Args:
+            session: HTTP session used for status requests
+            api_url: Base URL of the image API
+            poll_interval: Maximum seconds between polling rounds
+        """
+        self.session = session
+        self.api_url = api_url
+        self.poll_interval = poll_interval
+        self._tasks: Dict[str, _PendingTask] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._batch_supported = True
+        self._delay = _MIN_POLL_INTERVAL
+    
+    def register(self, task_id: str) -> _PendingTask:
+        """
+        Start tracking a task
+        
+        Args:
+            task_id: Task ID returned by the submit endpoint
+        
+        Returns:
+            Handle whose event is set once the task completes or fails
+        """
+        pending = _PendingTask()
+        with self._lock:
+            self._tasks[task_id] = pending
+            self._delay = min(_MIN_POLL_INTERVAL, self.poll_interval)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="image-task-poller", daemon=True)
+                self._thread.start()
+        return pending
+    
+    def unregister(self, task_id: str) -> None:
+        """Stop tracking a task (e.g. after the caller gave up waiting)"""
+        with self._lock:
+            self._tasks.pop(task_id, None)
+    
+    def _run(self) -> None:
+        """Polling loop; exits once no tasks are registered"""
+        while True:
+            with self._lock:
+                task_ids = list(self._tasks)
+                if not task_ids:
+                    self._thread = None
+                    return
+            
+            try:
+                statuses = self._fetch_statuses(task_ids)
+            except Exception as e:
+                logger.error(f"Error polling task status: {str(e)}")
+                statuses = {task_id: {"error": f"Polling error: {str(e)}"} for task_id in task_ids}
+            
+            for task_id, status in statuses.items():
+                self._apply_status(task_id, status)
+            
+            with self._lock:
+                delay = self._delay
+                self._delay = min(delay * _POLL_BACKOFF, self.poll_interval)
+            time.sleep(delay)
+    
+    def _fetch_statuses(self, task_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Query the current status of the given tasks
+        
+        Returns:
+            Mapping of task ID to the task's status payload, or to
+            {"error": message} when its status could not be read
+        """
+        if self._batch_supported:
+            url = f"{self.api_url}/api/tasks"
+            response = self.session.get(url, params={"ids": ",".join(task_ids)}, timeout=30)
+            result = None
+            if response.status_code != 404:
+                response.raise_for_status()
+                result = response.json()
+            # The backend reports errors, including unknown routes, as HTTP 200
+            # with the error code in the body
+            if result is None or result.get("code") == 404 or not isinstance(result.get("data"), dict):
+                logger.info("Batch status endpoint unavailable, polling tasks individually")
+                self._batch_supported = False
+            else:
+                if result.get("code") != 200:
+                    error_msg = result.get("message", "Unknown error")
+                    return {task_id: {"error": error_msg} for task_id in task_ids}
+                tasks = result["data"].get("tasks", {})
+                return {
+                    task_id: tasks.get(task_id) or {"error": "Task not found"}
+                    for task_id in task_ids
+                }
+        
+        statuses = {}
+        for task_id in task_ids:
+            try:
+                response = self.session.get(f"{self.api_url}/api/task/{task_id}", timeout=30)
+                response.raise_for_status()
+                result = response.json()
+            except REQUEST_ERRORS as e:
+                statuses[task_id] = {"error": f"Polling error: {str(e)}"}
+                continue
+            if result.get("code") != 200:
+                statuses[task_id] = {"error": result.get("message", "Unknown error")}
+            else:
+                statuses[task_id] = result.get("data", {})
+        return statuses
+    
+    def _apply_status(self, task_id: str, status: Dict[str, Any]) -> None:
+        """Resolve the waiter of a task that reached a terminal state"""
+        if "error" in status:
+            outcome: Optional[Tuple[bool, Optional[str]]] = (False, status["error"])
+        elif status.get("status") == "completed":
+            outcome = (True, None)
+        elif status.get("status") == "failed":
+            outcome = (False, status.get("error_message", "Task failed without error message"))
+        elif status.get("status") in ["pending", "processing"]:
+            outcome = None
+        else:
+            outcome = (False, f"Unknown status: {status.get('status')}")
+        
+        if outcome is None:
+            return
+        
+        with self._lock:
+            pending = self._tasks.pop(task_id, None)
+        if pending is not None:
+            pending.finish(*outcome)
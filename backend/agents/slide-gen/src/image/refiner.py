@@ -3,18 +3,31 @@ Image prompt refinement using LLM
 """
 
 import logging
+import threading
+from collections import OrderedDict
+from typing import Optional, Tuple
 from src.llm.client import LLMClient
 from src.llm.prompts import PromptTemplates
 
 logger = logging.getLogger(__name__)
 
+# Refined prompts remembered per refiner, keyed by (raw prompt, style)
+_REFINE_CACHE_SIZE = 256
+
 
 class ImagePromptRefiner:
     """Refines image generation prompts using LLM"""
     
-    def __init__(self):
-        """Initialize prompt refiner"""
-        self.llm_client = LLMClient()
+    def __init__(self, llm_client: Optional[LLMClient] = None):
+        """
+        Initialize prompt refiner
+        
+        Args:
+            llm_client: LLM client to reuse; a new one is created if omitted
+        """
+        self.llm_client = llm_client or LLMClient()
+        self._cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def refine_prompt(self, raw_prompt: str, style: str, slide_number: int) -> str:
         """
@@ -35,6 +48,16 @@ class ImagePromptRefiner:
             prompt_preview = raw_prompt[:100] + "..." if len(raw_prompt) > 100 else raw_prompt
             logger.debug(f"Raw prompt: {prompt_preview}")
         
+        # The slide number only labels the request, so identical prompts share one refinement
+        cache_key = (raw_prompt, style)
+        with self._cache_lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+        if cached is not None:
+            logger.debug(f"Reusing cached refinement for slide {slide_number}")
+            return cached
+        
         try:
             logger.debug("Preparing LLM prompts for image prompt refinement")
             system_prompt, user_prompt = PromptTemplates.image_prompt_refinement(
@@ -58,6 +81,11 @@ class ImagePromptRefiner:
                 refined_preview = refined_prompt[:120] + "..." if len(refined_prompt) > 120 else refined_prompt
                 logger.debug(f"Refined prompt: {refined_preview}")
             
+            with self._cache_lock:
+                self._cache[cache_key] = refined_prompt
+                if len(self._cache) > _REFINE_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+            
             return refined_prompt
             
         except Exception as e:
@@ -7,20 +7,173 @@ import logging
 from typing import Dict, Any, Optional
 import requests
 from src.utils.config import config
+from src.utils.http import create_session
+from src.utils.retry import CircuitBreaker, RetryBudget
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+# Tokens kept free between prompt and completion when capping max_tokens
+_CONTEXT_SAFETY_MARGIN = 64
+
+# Client error statuses that are still worth retrying (request timeout, rate limit)
+_RETRYABLE_CLIENT_STATUSES = frozenset({408, 429})
+
+# JSON codec for request and response bodies; orjson is faster when installed.
+# orjson.JSONDecodeError subclasses json.JSONDecodeError, so callers catch the latter.
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+    _json_loads = json.loads
+
 
 class LLMClient:
     """Client for interacting with OpenAI-compatible LLM APIs"""
     
-    def __init__(self):
-        """Initialize LLM client with configuration"""
+    # Token encoder shared by all clients, loaded on first use (False if unavailable)
+    _encoder = None
+    
+    def __init__(self, session: Optional[requests.Session] = None):
+        """
+        Initialize LLM client with configuration
+        
+        Args:
+            session: Shared HTTP session; a private pooled session is created if omitted
+        """
+        self._owns_session = session is None
+        self.session = session or create_session()
         self.api_key = config.llm_api_key
         self.api_url = config.llm_api_url
         self.model = config.llm_model
         self.timeout = config.default_timeout
         self.max_retries = config.max_retries
+        self.circuit = CircuitBreaker(
+            "LLM API",
+            failure_threshold=config.circuit_failure_threshold,
+            reset_timeout=config.circuit_reset_timeout
+        )
+        # Built once; kept per-request because the session may be shared with other hosts
+        self._headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {self.api_key}"
+        }
+    
+    def close(self) -> None:
+        """Close the HTTP session if this client created it"""
+        if self._owns_session:
+            self.session.close()
+    
+    def _count_tokens(self, text: str) -> int:
+        """
+        Count the tokens of a prompt
+        
+        Uses tiktoken when it is installed; otherwise estimates roughly three
+        ASCII characters per token plus one token per non-ASCII character, so
+        CJK prompts are not undercounted. The estimate errs on the high side.
+        
+        Args:
+            text: Prompt text
+            
+        Returns:
+            Token count
+        """
+        if LLMClient._encoder is None:
+            LLMClient._encoder = self._load_encoder()
+        
+        if LLMClient._encoder:
+            return len(LLMClient._encoder.encode(text))
+        if text.isascii():
+            return len(text) // 3 + 1
+        ascii_chars = len(text.encode("ascii", "ignore"))
+        return ascii_chars // 3 + (len(text) - ascii_chars) + 1
+    
+    def _load_encoder(self):
+        """
+        Load the tiktoken encoder for the configured model
+        
+        Returns:
+            Encoder, or False if tiktoken is missing or its encoding data cannot be loaded
+        """
+        if tiktoken is None:
+            return False
+        
+        encoding_name = None
+        try:
+            return tiktoken.encoding_for_model(self.model)
+        except KeyError:
+            # Model unknown to tiktoken; fall back to the common encoding
+            encoding_name = "cl100k_base"
+        except Exception as e:
+            logger.debug(f"tiktoken encoder unavailable, estimating token counts: {str(e)}")
+        
+        if encoding_name is not None:
+            try:
+                return tiktoken.get_encoding(encoding_name)
+            except Exception as e:
+                # e.g. the BPE file cannot be downloaded on an offline host
+                logger.debug(f"tiktoken encoder unavailable, estimating token counts: {str(e)}")
+        return False
+    
+    def completion_room(self, prompt: str, system_prompt: Optional[str] = None) -> Optional[int]:
+        """
+        Tokens left for the completion once the prompt fills the context window
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            
+        Returns:
+            Remaining completion tokens (may be zero or negative), or None when
+            no context window is configured
+        """
+        context_window = config.llm_context_window
+        if context_window <= 0:
+            return None
+        
+        prompt_tokens = self._count_tokens(prompt)
+        if system_prompt:
+            prompt_tokens += self._count_tokens(system_prompt)
+        return context_window - prompt_tokens - _CONTEXT_SAFETY_MARGIN
+    
+    def _fit_max_tokens(self, prompt: str, system_prompt: Optional[str], max_tokens: int) -> int:
+        """
+        Cap max_tokens to the room left in the context window after the prompt
+        
+        Args:
+            prompt: User prompt
+            system_prompt: Optional system prompt
+            max_tokens: Requested completion budget
+            
+        Returns:
+            Completion budget to send
+            
+        Raises:
+            Exception: If the prompt alone does not fit the context window
+        """
+        available = self.completion_room(prompt, system_prompt)
+        if available is None:
+            return max_tokens
+        if available <= 0:
+            raise Exception(
+                f"LLM prompt too long: it leaves no room in the "
+                f"{config.llm_context_window}-token context window"
+            )
+        if available < max_tokens:
+            logger.debug(f"Capping max_tokens from {max_tokens} to {available}")
+            return available
+        return max_tokens
     
     def generate_completion(
         self, 
@@ -55,11 +208,6 @@ class LLMClient:
         logger.debug(f"System Prompt Length: {len(system_prompt) if system_prompt else 0} chars")
         logger.debug(f"User Prompt Length: {len(prompt)} chars")
         
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}"
-        }
-        
         messages = []
         if system_prompt:
             messages.append({"role": "system", "content": system_prompt})
@@ -70,30 +218,37 @@ class LLMClient:
             "model": self.model,
             "messages": messages,
             "temperature": temperature,
-            "max_tokens": max_tokens
+            "max_tokens": self._fit_max_tokens(prompt, system_prompt, max_tokens)
         }
         
         if response_format:
             payload["response_format"] = response_format
             logger.debug(f"Response format constraint applied: {response_format}")
         
+        if not self.circuit.allow():
+            raise Exception("LLM API call skipped: circuit open after repeated failures")
+        
+        body = _json_dumps(payload)
+        budget = RetryBudget(config.retry_max_elapsed)
         last_error = None
+        attempts = 0
         for attempt in range(self.max_retries):
+            attempts += 1
             try:
                 logger.debug(f"LLM API call attempt {attempt + 1}/{self.max_retries}")
                 logger.debug(f"API URL: {self.api_url}")
                 
-                response = requests.post(
+                response = self.session.post(
                     self.api_url,
-                    headers=headers,
-                    json=payload,
+                    headers=self._headers,
+                    data=body,
                     timeout=self.timeout
                 )
                 
                 logger.debug(f"Response status code: {response.status_code}")
                 response.raise_for_status()
                 
-                result = response.json()
+                result = _json_loads(response.content)
                 content = result["choices"][0]["message"]["content"]
                 
                 logger.info(f"✓ LLM response received successfully")
@@ -101,6 +256,7 @@ class LLMClient:
                 logger.debug(f"Response preview: {content[:150]}..." if len(content) > 150 else f"Response: {content}")
                 logger.debug("=" * 50)
                 
+                self.circuit.record_success()
                 return content
                 
             except requests.exceptions.Timeout as e:
@@ -108,21 +264,30 @@ class LLMClient:
                 logger.warning(f"LLM API call timeout (attempt {attempt + 1}/{self.max_retries}): Request exceeded {self.timeout}s timeout")
             except requests.exceptions.HTTPError as e:
                 last_error = e
-                status_code = e.response.status_code if e.response else "unknown"
-                logger.warning(f"LLM API HTTP error (attempt {attempt + 1}/{self.max_retries}): Status {status_code} - {str(e)}")
-                if e.response and logger.isEnabledFor(logging.DEBUG):
+                # Response is falsy for error statuses, so compare against None
+                status_code = e.response.status_code if e.response is not None else None
+                logger.warning(f"LLM API HTTP error (attempt {attempt + 1}/{self.max_retries}): Status {status_code or 'unknown'} - {str(e)}")
+                if e.response is not None and logger.isEnabledFor(logging.DEBUG):
                     logger.debug(f"Error response body: {e.response.text[:200]}")
+                if status_code is not None and 400 <= status_code < 500 and status_code not in _RETRYABLE_CLIENT_STATUSES:
+                    # The request itself was rejected (e.g. it exceeds the context window):
+                    # resending it cannot succeed, and the API answered, so it is not a failure
+                    self.circuit.record_success()
+                    break
             except requests.exceptions.RequestException as e:
                 last_error = e
                 logger.warning(f"LLM API request exception (attempt {attempt + 1}/{self.max_retries}): {str(e)}")
+            except ValueError as e:
+                # Response body is not valid JSON
+                last_error = e
+                logger.warning(f"LLM API returned invalid JSON (attempt {attempt + 1}/{self.max_retries}): {str(e)}")
             
+            self.circuit.record_failure()
             if attempt < self.max_retries - 1:
-                backoff_time = 2 ** attempt
-                logger.info(f"Retrying in {backoff_time} seconds...")
-                import time
-                time.sleep(backoff_time)  # Exponential backoff
+                if not self.circuit.allow() or not budget.sleep(attempt):
+                    break
         
-        error_msg = f"LLM API call failed after {self.max_retries} attempts: {str(last_error)}"
+        error_msg = f"LLM API call failed after {attempts} attempt(s): {str(last_error)}"
         logger.error(error_msg)
         logger.debug("=" * 50)
         raise Exception(error_msg)
@@ -162,7 +327,7 @@ class LLMClient:
         
         logger.debug("Attempting to parse LLM response as JSON")
         try:
-            parsed_response = json.loads(response)
+            parsed_response = _json_loads(response)
             logger.info(f"✓ JSON response parsed successfully")
             logger.debug(f"JSON keys: {list(parsed_response.keys())}")
             return parsed_response
@@ -175,7 +340,7 @@ class LLMClient:
                 logger.debug("Attempting to extract JSON from markdown code block")
                 try:
                     json_str = response.split("```json")[1].split("```")[0].strip()
-                    parsed_response = json.loads(json_str)
+                    parsed_response = _json_loads(json_str)
                     logger.info(f"✓ Successfully extracted and parsed JSON from markdown code block")
                     logger.debug(f"JSON keys: {list(parsed_response.keys())}")
                     return parsed_response
@@ -2,7 +2,93 @@
 Prompt templates for LLM interactions
 """
 
-from typing import Dict, Any
+import functools
+import types
+from typing import Dict, Any, List
+
+# Slide dimensions by aspect ratio
+_SLIDE_DIMENSIONS = types.MappingProxyType({
+    "16:9": {"width": 1920, "height": 1080},
+    "4:3": {"width": 1600, "height": 1200},
+    "16:10": {"width": 1920, "height": 1200},
+    "3:4": {"width": 1080, "height": 1440}
+})
+
+# Character limits based on content richness - for bullet point text blocks
+_CHAR_LIMITS = types.MappingProxyType({
+    "concise": {"title": 60, "section_title": 40, "bullet_block": 200, "caption": 120},
+    "moderate": {"title": 70, "section_title": 50, "bullet_block": 300, "caption": 150},
+    "detailed": {"title": 80, "section_title": 60, "bullet_block": 400, "caption": 200}
+})
+
+# Visual guidelines appended to image prompts, by presentation style
+_STYLE_GUIDE = types.MappingProxyType({
+    "professional": "corporate, clean, modern, professional photography, high quality, sharp details, polished look",
+    "creative": "artistic, vibrant, creative composition, dynamic, eye-catching, bold colors, innovative design",
+    "minimal": "minimalist, simple, clean lines, elegant, uncluttered, sophisticated simplicity, refined aesthetic",
+    "academic": "educational, clear, informative, scholarly, technical illustration, professional, high-quality diagrams, research-grade visuals"
+})
+
+# Static head of the layout system prompt, shared verbatim by every call
+_LAYOUT_SYSTEM_PREFIX = """You are an expert slide designer specializing in academic and professional presentations. Create detailed, visually appealing slide layouts with MULTIPLE text blocks, each containing organized bullet points.
+
+CRITICAL REQUIREMENT: You MUST create visual variety by selecting different templates for different slides.
+DO NOT use "title_and_content" for every slide - this creates boring, repetitive presentations.
+
+CONTENT STRUCTURE REQUIREMENT - VERY IMPORTANT:
+- Rich content means MULTIPLE separate text blocks on each slide
+- Each text block should have a section title and 3-5 bullet points
+- Bullet points should be brief phrases (5-15 words), starting with •
+- DO NOT create large paragraphs - use structured bullet lists instead
+- Typical slide should have 2-3 text blocks + 1-2 images
+
+Available templates and when to use them:
+
+STANDARD TEMPLATES (for 16:9, 4:3, 16:10 aspect ratios):
+1. "title_and_content": Standard layout with multiple text sections and supporting images
+   - Use when: Content has multiple sections with bullet points and 1-2 supporting visuals
+   - Layout: Title at top, multiple text blocks (left/center) each with section title + bullets, 1-2 images on right
+   - Best for: Organized explanations, multiple concept areas with visual support
+   - Image margins: Minimum 60px from edges
+   
+2. "two_column": Side-by-side comparison or parallel information layout
+   - Use when: Comparing two things, showing before/after, pros/cons, or parallel concepts
+   - Layout: Title at top, left column (multiple text blocks), right column (text blocks or image)
+   - Best for: Detailed comparisons, contrasts, dual concepts
+   - Image margins: Minimum 60px from edges, 35px internal padding
+   
+3. "image_focus": Visual-dominant layout with structured text below
+   - Use when: The visual is the primary message
+   - Layout: Large centered image (85% width max) with organized bullet points below
+   - Best for: Demonstrations, visual examples, impactful showcases
+   - Image margins: 60px horizontal margins, 40px bottom margin
+
+XIAOHONGSHU TEMPLATES (for 3:4 portrait aspect ratio - social media cards):
+4. "xiaohongshu_minimal": Clean, minimalist design with large title and focused content
+   - Use when: Product showcases, lifestyle content, simple aesthetic presentations
+   - Layout: Large title (top 20%), centered main image (50-60%), concise bullet points (bottom 20-30%)
+   - Best for: Clean product displays, minimalist aesthetics, elegant presentations
+   - Design: Lots of white space, rounded corners, fresh and simple
+   
+5. "xiaohongshu_fashion": Fashion-forward design with decorative elements
+   - Use when: Fashion, beauty, trendy content, style-focused presentations
+   - Layout: Title with decorative elements, image with borders/shadows, card-style text blocks
+   - Best for: Fashion trends, beauty tips, style guides, trendy content
+   - Design: Gradient backgrounds, decorative icons, modern card layouts
+   
+6. "xiaohongshu_mixed": Flexible mixed layout for multiple images and text
+   - Use when: Tutorials, guides, lists, comparisons with multiple visuals
+   - Layout: Flexible arrangement - images and text can alternate or be side-by-side
+   - Best for: Step-by-step guides, comparison lists, multi-image showcases
+   - Design: Flexible grid, supports 2-4 images, organized text blocks
+   
+7. "xiaohongshu_bold": High-impact visual design with image overlay
+   - Use when: Scenic photos, food, art, visual showcases
+   - Layout: Large image (70-80% space), title overlaid on image, compact text at bottom
+   - Best for: Visual impact, scenic content, artistic presentations, food photography
+   - Design: High contrast, title with semi-transparent background, bold typography
+
+"""
 
 
 class PromptTemplates:
@@ -134,108 +220,31 @@ Please generate a structured outline with {num_slides} slides, each having multi
         return system_prompt, user_prompt
     
     @staticmethod
-    def layout_generation_prompt(
-        slide_outline: Dict[str, Any],
-        style: str,
-        content_richness: str,
-        aspect_ratio: str,
-        slide_number: int,
-        total_slides: int
-    ) -> tuple[str, str]:
+    @functools.lru_cache(maxsize=32)
+    def _layout_system_suffix(aspect_ratio: str, content_richness: str, total_slides: int) -> str:
         """
-        Generate prompt for creating slide layout and content
+        Build the deck-dependent part of the layout system prompt
         
+        Nothing slide-specific goes in here, so together with
+        _LAYOUT_SYSTEM_PREFIX the system prompt is byte-identical for every
+        slide of a deck and backends with prefix caching can reuse it.
+        
+        Args:
+            aspect_ratio: Aspect ratio string
+            content_richness: Content richness level
+            total_slides: Total number of slides
+            
         Returns:
-            tuple: (system_prompt, user_prompt)
+            System prompt suffix string
         """
-        # Calculate dimensions based on aspect ratio
-        dimensions = {
-            "16:9": {"width": 1920, "height": 1080},
-            "4:3": {"width": 1600, "height": 1200},
-            "16:10": {"width": 1920, "height": 1200},
-            "3:4": {"width": 1080, "height": 1440}
-        }
-        dims = dimensions.get(aspect_ratio, dimensions["16:9"])
-        
-        # Character limits based on content richness - for bullet point text blocks
-        char_limits = {
-            "concise": {"title": 60, "section_title": 40, "bullet_block": 200, "caption": 120},
-            "moderate": {"title": 70, "section_title": 50, "bullet_block": 300, "caption": 150},
-            "detailed": {"title": 80, "section_title": 60, "bullet_block": 400, "caption": 200}
-        }
-        limits = char_limits[content_richness]
-        
-        # Determine recommended template based on slide position, keywords, and aspect ratio
-        recommended_template = PromptTemplates._recommend_template(
-            slide_outline, slide_number, total_slides, aspect_ratio
-        )
+        dims = _SLIDE_DIMENSIONS.get(aspect_ratio, _SLIDE_DIMENSIONS["16:9"])
+        limits = _CHAR_LIMITS[content_richness]
         
-        system_prompt = f"""You are an expert slide designer specializing in academic and professional presentations. Create detailed, visually appealing slide layouts with MULTIPLE text blocks, each containing organized bullet points.
-
-CRITICAL REQUIREMENT: You MUST create visual variety by selecting different templates for different slides.
-DO NOT use "title_and_content" for every slide - this creates boring, repetitive presentations.
-
-CONTENT STRUCTURE REQUIREMENT - VERY IMPORTANT:
-- Rich content means MULTIPLE separate text blocks on each slide
-- Each text block should have a section title and 3-5 bullet points
-- Bullet points should be brief phrases (5-15 words), starting with •
-- DO NOT create large paragraphs - use structured bullet lists instead
-- Typical slide should have 2-3 text blocks + 1-2 images
-
-Available templates and when to use them:
-
-STANDARD TEMPLATES (for 16:9, 4:3, 16:10 aspect ratios):
-1. "title_and_content": Standard layout with multiple text sections and supporting images
-   - Use when: Content has multiple sections with bullet points and 1-2 supporting visuals
-   - Layout: Title at top, multiple text blocks (left/center) each with section title + bullets, 1-2 images on right
-   - Best for: Organized explanations, multiple concept areas with visual support
-   - Image margins: Minimum 60px from edges
-   
-2. "two_column": Side-by-side comparison or parallel information layout
-   - Use when: Comparing two things, showing before/after, pros/cons, or parallel concepts
-   - Layout: Title at top, left column (multiple text blocks), right column (text blocks or image)
-   - Best for: Detailed comparisons, contrasts, dual concepts
-   - Image margins: Minimum 60px from edges, 35px internal padding
-   
-3. "image_focus": Visual-dominant layout with structured text below
-   - Use when: The visual is the primary message
-   - Layout: Large centered image (85% width max) with organized bullet points below
-   - Best for: Demonstrations, visual examples, impactful showcases
-   - Image margins: 60px horizontal margins, 40px bottom margin
-
-XIAOHONGSHU TEMPLATES (for 3:4 portrait aspect ratio - social media cards):
-4. "xiaohongshu_minimal": Clean, minimalist design with large title and focused content
-   - Use when: Product showcases, lifestyle content, simple aesthetic presentations
-   - Layout: Large title (top 20%), centered main image (50-60%), concise bullet points (bottom 20-30%)
-   - Best for: Clean product displays, minimalist aesthetics, elegant presentations
-   - Design: Lots of white space, rounded corners, fresh and simple
-   
-5. "xiaohongshu_fashion": Fashion-forward design with decorative elements
-   - Use when: Fashion, beauty, trendy content, style-focused presentations
-   - Layout: Title with decorative elements, image with borders/shadows, card-style text blocks
-   - Best for: Fashion trends, beauty tips, style guides, trendy content
-   - Design: Gradient backgrounds, decorative icons, modern card layouts
-   
-6. "xiaohongshu_mixed": Flexible mixed layout for multiple images and text
-   - Use when: Tutorials, guides, lists, comparisons with multiple visuals
-   - Layout: Flexible arrangement - images and text can alternate or be side-by-side
-   - Best for: Step-by-step guides, comparison lists, multi-image showcases
-   - Design: Flexible grid, supports 2-4 images, organized text blocks
-   
-7. "xiaohongshu_bold": High-impact visual design with image overlay
-   - Use when: Scenic photos, food, art, visual showcases
-   - Layout: Large image (70-80% space), title overlaid on image, compact text at bottom
-   - Best for: Visual impact, scenic content, artistic presentations, food photography
-   - Design: High contrast, title with semi-transparent background, bold typography
-
-Slide dimensions: {dims['width']}x{dims['height']}
+        return f"""Slide dimensions: {dims['width']}x{dims['height']}
 
 MANDATORY TEMPLATE SELECTION RULES:
 {PromptTemplates._build_template_selection_rules(aspect_ratio, total_slides)}
 
-RECOMMENDED TEMPLATE FOR THIS SLIDE: {recommended_template}
-(You may override this if content strongly suggests a different template)
-
 IMAGE POSITIONING REQUIREMENTS (CRITICAL - STRICTLY ENFORCED):
 - ALL images MUST have MINIMUM 60px margin from ALL slide edges (top, bottom, left, right)
 - Images MUST NEVER touch or be close to the slide border
@@ -271,7 +280,7 @@ IMAGE ASPECT RATIO GUIDANCE (IMPORTANT FOR QUALITY):
 
 Example for "title_and_content" with MULTIPLE text blocks:
 {{
-  "slide_number": {slide_number},
+  "slide_number": 1,
   "template_type": "title_and_content",
   "layout": {{
     "title": "Main Slide Title",
@@ -308,7 +317,7 @@ Example for "title_and_content" with MULTIPLE text blocks:
 
 Example for "two_column" with multiple sections:
 {{
-  "slide_number": {slide_number},
+  "slide_number": 1,
   "template_type": "two_column",
   "layout": {{
     "title": "Comparison Title",
@@ -347,7 +356,7 @@ Example for "two_column" with multiple sections:
 
 Example for "image_focus":
 {{
-  "slide_number": {slide_number},
+  "slide_number": 1,
   "template_type": "image_focus",
   "layout": {{
     "title": "Visual Demonstration Title",
@@ -394,6 +403,32 @@ POSITIONING RULES:
 - Create visual balance with distributed text blocks and images
 - Templates will constrain images to safe zones automatically
 """
+    
+    @staticmethod
+    def layout_generation_prompt(
+        slide_outline: Dict[str, Any],
+        style: str,
+        content_richness: str,
+        aspect_ratio: str,
+        slide_number: int,
+        total_slides: int
+    ) -> tuple[str, str]:
+        """
+        Generate prompt for creating slide layout and content
+        
+        Returns:
+            tuple: (system_prompt, user_prompt)
+        """
+        dims = _SLIDE_DIMENSIONS.get(aspect_ratio, _SLIDE_DIMENSIONS["16:9"])
+        
+        # Determine recommended template based on slide position, keywords, and aspect ratio
+        recommended_template = PromptTemplates._recommend_template(
+            slide_outline, slide_number, total_slides, aspect_ratio
+        )
+        
+        system_prompt = _LAYOUT_SYSTEM_PREFIX + PromptTemplates._layout_system_suffix(
+            aspect_ratio, content_richness, total_slides
+        )
         
         user_prompt = f"""Design slide {slide_number} of {total_slides} with MULTIPLE structured text blocks based on the outline sections:
 
@@ -412,7 +447,7 @@ ANALYSIS CHECKLIST:
 2. Slide position: {slide_number} of {total_slides} (first? middle? last?)
 3. Content type: Multiple sections? Comparison? Visual-heavy? {"Fashion/beauty? Tutorial? Scenic?" if aspect_ratio == "3:4" else ""}
 4. Sections count: {len(slide_outline.get('sections', []))} sections to present
-5. Recommended template: {recommended_template} (strongly consider using this)
+5. Recommended template: {recommended_template} (strongly consider using this; you may override it if content strongly suggests a different template)
 
 CONTENT STRUCTURE REQUIREMENTS - VERY IMPORTANT:
 - Create MULTIPLE separate text blocks (one per section from outline)
@@ -451,11 +486,58 @@ REMEMBER:
 - Avoid repetition! Use different templates for different slides
 - Ensure images have proper margins and don't touch edges
 - Your response MUST include "template_type" at the top level
+- Set "slide_number" to {slide_number} in your response
 
 Create a visually appealing, well-structured layout with multiple content blocks."""
         
         return system_prompt, user_prompt
     
+    @staticmethod
+    def batch_layout_generation_prompt(
+        slide_outlines: List[Dict[str, Any]],
+        style: str,
+        content_richness: str,
+        aspect_ratio: str,
+        total_slides: int
+    ) -> tuple[str, str]:
+        """
+        Generate a single prompt that requests layouts for several slides at once
+        
+        Each slide is described exactly as in layout_generation_prompt(); the
+        response is expected to be {"slides": [<layout>, ...]} in outline order.
+        
+        Returns:
+            tuple: (system_prompt, user_prompt)
+        """
+        user_sections = []
+        system_prompt = ""
+        for slide_outline in slide_outlines:
+            slide_system_prompt, slide_user_prompt = PromptTemplates.layout_generation_prompt(
+                slide_outline=slide_outline,
+                style=style,
+                content_richness=content_richness,
+                aspect_ratio=aspect_ratio,
+                slide_number=slide_outline['slide_number'],
+                total_slides=total_slides
+            )
+            if not system_prompt:
+                system_prompt = slide_system_prompt
+            user_sections.append(f"=== SLIDE {slide_outline['slide_number']} ===\n{slide_user_prompt}")
+        
+        slide_numbers = ", ".join(str(outline['slide_number']) for outline in slide_outlines)
+        system_prompt += f"""
+
+BATCH MODE:
+- You are designing {len(slide_outlines)} slides in one response (slides {slide_numbers})
+- Follow the per-slide instructions in each "=== SLIDE N ===" section, including its recommended template
+- Respond with a JSON object of the form {{"slides": [<layout for each slide>]}}
+- The "slides" array MUST contain exactly {len(slide_outlines)} layouts, in the same order as the sections
+- Each layout uses the same JSON structure as a single-slide response, including "slide_number" and "template_type\""""
+        
+        user_prompt = "\n\n".join(user_sections)
+        
+        return system_prompt, user_prompt
+    
     @staticmethod
     def _recommend_template(
         slide_outline: Dict[str, Any],
@@ -562,13 +644,6 @@ Create a visually appealing, well-structured layout with multiple content blocks
         Returns:
             tuple: (system_prompt, user_prompt)
         """
-        style_guidelines = {
-            "professional": "corporate, clean, modern, professional photography, high quality, sharp details, polished look",
-            "creative": "artistic, vibrant, creative composition, dynamic, eye-catching, bold colors, innovative design",
-            "minimal": "minimalist, simple, clean lines, elegant, uncluttered, sophisticated simplicity, refined aesthetic",
-            "academic": "educational, clear, informative, scholarly, technical illustration, professional, high-quality diagrams, research-grade visuals"
-        }
-        
         system_prompt = """You are an expert prompt engineer for image generation, specializing in creating detailed, high-quality prompts for professional and academic presentations. Enhance image prompts with specific artistic direction, technical details, and visual clarity requirements.
 
 Respond with ONLY the enhanced prompt text, no JSON or additional formatting."""
@@ -578,7 +653,7 @@ Respond with ONLY the enhanced prompt text, no JSON or additional formatting."""
 Original prompt: {raw_prompt}
 
 Style: {style}
-Visual Guidelines: {style_guidelines.get(style, 'professional')}
+Visual Guidelines: {_STYLE_GUIDE.get(style, 'professional')}
 
 ENHANCEMENT REQUIREMENTS:
 Add comprehensive, specific details about:
@@ -3,9 +3,10 @@ HTML slide renderer using Jinja2 templates
 """
 
 import logging
+import types
 from pathlib import Path
 from typing import Dict, Any
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
 from src.utils.config import config
 from src.utils.validators import InputValidator, ColorScheme
 from src.utils.text_metrics import TextMetrics
@@ -16,6 +17,14 @@ logger = logging.getLogger(__name__)
 class HTMLRenderer:
     """Renders slides to HTML using Jinja2 templates"""
     
+    # Aspect ratio dimensions
+    dimensions = types.MappingProxyType({
+        "16:9": {"width": 1920, "height": 1080},
+        "4:3": {"width": 1600, "height": 1200},
+        "16:10": {"width": 1920, "height": 1200},
+        "3:4": {"width": 1080, "height": 1440}
+    })
+    
     def __init__(self):
         """Initialize HTML renderer with Jinja2 environment"""
         templates_dir = Path(__file__).parent.parent / "templates"
@@ -24,17 +33,21 @@ class HTMLRenderer:
             loader=FileSystemLoader(str(templates_dir)),
             autoescape=select_autoescape(['html', 'xml']),
             trim_blocks=True,  # Remove leading newlines after blocks
-            lstrip_blocks=True  # Strip leading spaces and tabs from blocks
+            lstrip_blocks=True,  # Strip leading spaces and tabs from blocks
+            auto_reload=False,  # Templates ship with the code; skip the mtime check per render
+            cache_size=-1,
+            bytecode_cache=FileSystemBytecodeCache(str(config.jinja_cache_dir))
         )
         logger.debug("Jinja2 environment initialized with trim_blocks and lstrip_blocks enabled")
         
-        # Aspect ratio dimensions
-        self.dimensions = {
-            "16:9": {"width": 1920, "height": 1080},
-            "4:3": {"width": 1600, "height": 1200},
-            "16:10": {"width": 1920, "height": 1200},
-            "3:4": {"width": 1080, "height": 1440}
-        }
+        # Compile every slide template once up front
+        self._templates: Dict[str, Template] = {}
+        for template_path in sorted(templates_dir.glob("*.html")):
+            try:
+                self._templates[template_path.name] = self.env.get_template(template_path.name)
+            except Exception as e:
+                logger.warning(f"Failed to precompile template '{template_path.name}': {str(e)}")
+        logger.debug(f"Precompiled {len(self._templates)} templates")
     
     def render_slide(
         self,
@@ -130,12 +143,12 @@ class HTMLRenderer:
         
         # Load template
         template_file = f"{template_type}.html"
-        try:
-            template = self.env.get_template(template_file)
+        template = self._templates.get(template_file)
+        if template is not None:
             logger.debug(f"Template '{template_file}' loaded successfully")
-        except Exception as e:
-            logger.warning(f"Template '{template_file}' not found, using title_and_content.html as fallback: {str(e)}")
-            template = self.env.get_template("title_and_content.html")
+        else:
+            logger.warning(f"Template '{template_file}' not found, using title_and_content.html as fallback")
+            template = self._templates.get("title_and_content.html") or self.env.get_template("title_and_content.html")
         
         # Render template
         logger.debug(f"Rendering template with data, color scheme, and font scale ({scale_factor:.2f})")
@@ -152,10 +165,12 @@ class HTMLRenderer:
         )
         
         # Save to file
+        # Encode once and write the bytes directly (no text-mode wrapper)
         output_path = config.html_dir / f"slide_{slide_number}.html"
-        output_path.write_text(html_content, encoding='utf-8')
+        html_bytes = html_content.encode('utf-8')
+        output_path.write_bytes(html_bytes)
         
-        logger.debug(f"HTML file saved to {output_path} ({len(html_content)} bytes)")
+        logger.debug(f"HTML file saved to {output_path} ({len(html_bytes)} bytes)")
         logger.info(f"✓ Slide {slide_number} rendered with {color_scheme} color scheme")
         return output_path
     
@@ -179,17 +194,17 @@ class HTMLRenderer:
             Validated and possibly truncated text
         """
         original_length = len(text)
-        if original_length > max_length:
-            logger.warning(
-                f"Slide {slide_number} {field_name} exceeds {max_length} chars "
-                f"({original_length}), truncating to fit"
-            )
-            truncated = InputValidator.truncate_text(text, max_length)
-            logger.debug(f"Truncated from {original_length} to {len(truncated)} characters")
-            return truncated
-        
-        logger.debug(f"Slide {slide_number} {field_name} within limits: {original_length}/{max_length} chars")
-        return text
+        if original_length <= max_length:
+            # Called for every text field; skip building the message unless it is logged
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Slide {slide_number} {field_name} within limits: {original_length}/{max_length} chars")
+            return text
+        
+        logger.warning(
+            f"Slide {slide_number} {field_name} exceeds {max_length} chars "
+            f"({original_length}), truncating to fit"
+        )
+        return InputValidator.truncate_text(text, max_length)
     
     def _normalize_text_indentation(self, text: str) -> str:
         """
@@ -4,6 +4,7 @@ HTML to PNG image export using Playwright
 
 import logging
 import asyncio
+import types
 from pathlib import Path
 from typing import Optional
 
@@ -13,14 +14,12 @@ logger = logging.getLogger(__name__)
 class ImageExporter:
     """Exports HTML slides to PNG images"""
     
-    def __init__(self):
-        """Initialize image exporter"""
-        self.dimensions = {
-            "16:9": {"width": 1920, "height": 1080},
-            "4:3": {"width": 1600, "height": 1200},
-            "16:10": {"width": 1920, "height": 1200},
-            "3:4": {"width": 1080, "height": 1440}  # Portrait format for social media cards (Xiaohongshu)
-        }
+    dimensions = types.MappingProxyType({
+        "16:9": {"width": 1920, "height": 1080},
+        "4:3": {"width": 1600, "height": 1200},
+        "16:10": {"width": 1920, "height": 1200},
+        "3:4": {"width": 1080, "height": 1440}  # Portrait format for social media cards (Xiaohongshu)
+    })
     
     def export_html_to_image(
         self,
@@ -46,14 +45,14 @@ class ImageExporter:
             # Use asyncio to run playwright
             asyncio.run(self._export_async(html_path, output_path, aspect_ratio))
             
-            # Verify output
-            if output_path.exists():
+            # Verify output; stat() doubles as the existence check
+            try:
                 file_size = output_path.stat().st_size
-                logger.debug(f"✓ PNG exported successfully: {output_path.name} ({file_size / 1024:.2f} KB)")
-                return True
-            else:
+            except FileNotFoundError:
                 logger.error(f"PNG file was not created: {output_path.name}")
                 return False
+            logger.debug("✓ PNG exported successfully: %s (%.2f KB)", output_path.name, file_size / 1024)
+            return True
                 
         except Exception as e:
             logger.error(f"Playwright export failed for {html_path.name}: {str(e)}")
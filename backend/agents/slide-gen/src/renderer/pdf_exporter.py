@@ -2,16 +2,46 @@
 PDF export from HTML slides
 """
 
+import functools
 import logging
+import multiprocessing
+import os
+import re
+import threading
+import types
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from io import BytesIO
+from itertools import repeat
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, List, Optional, Tuple
+from src.utils.config import config
+from src.utils.pdf_pool import get_pdf_pool
 
 logger = logging.getLogger(__name__)
 
+# Image sources in rendered slide HTML, and the schemes that are left untouched
+_SRC_ATTR_RE = re.compile(r'src="([^"]+)"')
+_ABSOLUTE_URL_PREFIXES = ('http://', 'https://', 'file://')
+
+# Slide images decoded ahead of the page being written in _export_from_images
+_IMAGE_DECODE_WORKERS = 4
+
+# Pixel size of the slide number on placeholder pages
+_PLACEHOLDER_FONT_SIZE = 48
+
 
 class PDFExporter:
     """Exports HTML slides to multi-page PDF"""
     
+    # Page dimensions in mm (A4 landscape approximation for 16:9)
+    page_dimensions = types.MappingProxyType({
+        "16:9": {"width": "297mm", "height": "167mm"},
+        "4:3": {"width": "280mm", "height": "210mm"},
+        "16:10": {"width": "297mm", "height": "185mm"},
+        "3:4": {"width": "210mm", "height": "280mm"}  # Portrait format for social media cards
+    })
+    
     def __init__(self):
         """Initialize PDF exporter"""
         pass
@@ -21,7 +51,8 @@ class PDFExporter:
         html_files: List[Path],
         output_path: Path,
         aspect_ratio: str = "16:9",
-        image_files: Optional[List[Path]] = None
+        image_files: Optional[List[Path]] = None,
+        skip_exist_check: bool = False
     ) -> bool:
         """
         Export HTML slides to PDF
@@ -31,14 +62,23 @@ class PDFExporter:
             output_path: Path for output PDF
             aspect_ratio: Aspect ratio for page dimensions
             image_files: Optional list of pre-rendered PNG images to use instead
+            skip_exist_check: Trust that every image in image_files exists
             
         Returns:
             Success status
         """
-        # If pre-rendered PNG images are provided, use them directly
-        if image_files and all(img.exists() for img in image_files):
+        # If pre-rendered PNG images are provided, use them directly.
+        # Missing images fail the export instead of silently falling back to
+        # the far slower WeasyPrint path.
+        if image_files:
+            if not skip_exist_check:
+                missing = [img.name for img in image_files if not img.exists()]
+                if missing:
+                    logger.error(f"Pre-rendered slide images missing, PDF not exported: {missing}")
+                    return False
             logger.info(f"Using {len(image_files)} pre-rendered PNG images for PDF generation")
-            logger.debug(f"Image files: {[img.name for img in image_files]}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Image files: %s", [img.name for img in image_files])
             return self._export_from_images(image_files, output_path)
         
         if not html_files:
@@ -46,7 +86,8 @@ class PDFExporter:
             return False
         
         logger.info(f"Attempting PDF export from {len(html_files)} HTML files")
-        logger.debug(f"HTML files: {[html.name for html in html_files]}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("HTML files: %s", [html.name for html in html_files])
         
         try:
             return self._export_with_weasyprint(html_files, output_path, aspect_ratio)
@@ -74,54 +115,54 @@ class PDFExporter:
             Success status
         """
         try:
-            from PIL import Image
-            
             logger.info(f"Starting PDF generation from {len(image_files)} PNG images")
             logger.debug(f"Output path: {output_path}")
             
-            # Load all images
-            images = []
-            for i, img_path in enumerate(image_files):
-                try:
-                    logger.debug(f"Loading image {i+1}/{len(image_files)}: {img_path.name}")
-                    img = Image.open(img_path)
-                    
-                    # Convert to RGB if necessary (PDFs require RGB mode)
-                    if img.mode != 'RGB':
-                        logger.debug(f"Converting image {i+1} from {img.mode} to RGB mode")
-                        img = img.convert('RGB')
-                    
-                    images.append(img)
-                    logger.debug(f"Successfully loaded image {i+1}, size: {img.size}")
-                    
-                except Exception as e:
-                    logger.error(f"Failed to load image {img_path.name}: {str(e)}")
-                    return False
-            
-            if not images:
+            if not image_files:
                 logger.error("No images were successfully loaded")
                 return False
             
-            # Save as PDF
-            logger.info(f"Combining {len(images)} images into PDF...")
-            images[0].save(
-                output_path,
-                save_all=True,
-                append_images=images[1:] if len(images) > 1 else [],
-                resolution=100.0,
-                quality=95
-            )
+            # Write one page at a time, appending to the file, so only the
+            # image being written is held in memory instead of the whole deck.
+            # The next few images are decoded on worker threads meanwhile
+            # (Pillow releases the GIL while inflating PNG data).
+            logger.info(f"Combining {len(image_files)} images into PDF...")
+            window = min(_IMAGE_DECODE_WORKERS, len(image_files))
+            with ThreadPoolExecutor(max_workers=window, thread_name_prefix="pdf-decode") as pool:
+                loading = deque(pool.submit(_load_rgb, img_path) for img_path in image_files[:window])
+                for i, img_path in enumerate(image_files):
+                    future = loading.popleft()
+                    if i + window < len(image_files):
+                        loading.append(pool.submit(_load_rgb, image_files[i + window]))
+                    try:
+                        if logger.isEnabledFor(logging.DEBUG):
+                            logger.debug("Loading image %d/%d: %s", i + 1, len(image_files), img_path.name)
+                        img = future.result()
+                    except ImportError:
+                        raise
+                    except Exception as e:
+                        logger.error(f"Failed to load image {img_path.name}: {str(e)}")
+                        return False
+                    
+                    img.save(
+                        output_path,
+                        format='PDF',
+                        append=i > 0,
+                        resolution=100.0,
+                        quality=95
+                    )
             
             # Verify PDF was created
-            if output_path.exists():
+            # stat() doubles as the existence check
+            try:
                 file_size = output_path.stat().st_size
-                logger.info(f"✓ PDF successfully generated: {output_path}")
-                logger.info(f"  File size: {file_size / 1024:.2f} KB")
-                logger.info(f"  Total pages: {len(images)}")
-                return True
-            else:
+            except FileNotFoundError:
                 logger.error("PDF file was not created")
                 return False
+            logger.info(f"✓ PDF successfully generated: {output_path}")
+            logger.info(f"  File size: {file_size / 1024:.2f} KB")
+            logger.info(f"  Total pages: {len(image_files)}")
+            return True
             
         except ImportError:
             logger.error("PIL/Pillow is required for image-to-PDF conversion")
@@ -154,95 +195,59 @@ class PDFExporter:
         logger.debug(f"Aspect ratio: {aspect_ratio}, Output: {output_path.name}")
         
         try:
-            from weasyprint import HTML, CSS
+            import weasyprint  # noqa: F401 - a missing install should fail before any rendering
         except ImportError:
             logger.error("WeasyPrint is not installed")
             logger.info("Install it with: pip install weasyprint")
             raise
         
-        # Dimensions in mm (A4 landscape approximation for 16:9)
-        dimensions = {
-            "16:9": {"width": "297mm", "height": "167mm"},
-            "4:3": {"width": "280mm", "height": "210mm"},
-            "16:10": {"width": "297mm", "height": "185mm"},
-            "3:4": {"width": "210mm", "height": "280mm"}  # Portrait format for social media cards
-        }
-        
-        dims = dimensions.get(aspect_ratio, dimensions["16:9"])
+        dims = self.page_dimensions.get(aspect_ratio, self.page_dimensions["16:9"])
         logger.debug(f"Using dimensions: {dims['width']} x {dims['height']}")
         
-        # Create CSS for page size and text alignment fix
-        page_css = CSS(string=f'''
-            @page {{
-                size: {dims['width']} {dims['height']};
-                margin: 0;
-            }}
-            body {{
-                margin: 0;
-                padding: 0;
-            }}
-            /* Fix text indentation alignment for PDF rendering */
-            .text-content {{
-                text-indent: 0 !important;
-                padding-left: 0 !important;
-                margin-left: 0 !important;
-            }}
-            .text-content::first-line {{
-                text-indent: 0 !important;
-                padding-left: 0 !important;
-                margin-left: 0 !important;
-            }}
-            .text-block-wrapper .text-content,
-            .text-block .text-content {{
-                text-indent: 0 !important;
-                padding-left: 0 !important;
-                margin-left: 0 !important;
-            }}
-        ''')
+        page_size = (dims['width'], dims['height'])
         
         logger.info(f"Exporting {len(html_files)} HTML slides to PDF...")
         logger.debug("Applying text alignment fix CSS rules for consistent indentation")
         
-        # More reliable: render each separately and combine
-        from PyPDF2 import PdfMerger
-        merger = PdfMerger()
-        
-        temp_pdfs = []
-        for i, html_file in enumerate(html_files):
-            logger.debug(f"Processing HTML file {i+1}/{len(html_files)}: {html_file.name}")
+        # Slides are independent and layout is CPU-bound, so render them in parallel
+        workers = min(config.pdf_render_workers, len(html_files), os.cpu_count() or 1)
+        # Only fork from a single-threaded process (e.g. a PDF pool worker);
+        # inline exports in a threaded server render the slides in turn
+        if (workers > 1 and threading.active_count() == 1
+                and "fork" in multiprocessing.get_all_start_methods()):
+            from pypdf import PdfReader, PdfWriter
             
-            temp_pdf = output_path.parent / f"temp_slide_{i}.pdf"
-            html_content = html_file.read_text(encoding='utf-8')
-            html_content = self._fix_image_paths(html_content, html_file.parent)
+            logger.debug(f"Rendering slides with {workers} worker processes")
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("fork")
+            ) as pool:
+                slide_pdfs = list(pool.map(_render_slide_pdf, html_files, repeat(page_size)))
             
-            logger.debug(f"Writing temporary PDF: {temp_pdf.name}")
-            logger.debug(f"Applying text indentation fix CSS to ensure all lines align consistently")
-            HTML(string=html_content, base_url=str(html_file.parent)).write_pdf(
-                temp_pdf,
-                stylesheets=[page_css]
-            )
-            merger.append(str(temp_pdf))
-            temp_pdfs.append(temp_pdf)
-            logger.debug(f"✓ Slide {i+1} converted to PDF")
-        
-        logger.info("Merging individual PDFs...")
-        merger.write(str(output_path))
-        merger.close()
-        
-        # Clean up temp files
-        logger.debug("Cleaning up temporary PDF files...")
-        for temp_pdf in temp_pdfs:
-            temp_pdf.unlink(missing_ok=True)
+            # Pages are appended by reference; their already-compressed content
+            # streams are copied as-is rather than re-encoded
+            logger.info("Merging individual PDFs...")
+            writer = PdfWriter()
+            for slide_pdf in slide_pdfs:
+                writer.append(PdfReader(BytesIO(slide_pdf)))
+            writer.write(output_path)
+            writer.close()
+        else:
+            # Lay out every slide, then write all pages as one document
+            stylesheet = _page_stylesheet(page_size)
+            documents = [_render_slide_document(html_file, stylesheet) for html_file in html_files]
+            all_pages = [page for document in documents for page in document.pages]
+            documents[0].copy(all_pages).write_pdf(output_path)
         
         # Verify output
-        if output_path.exists():
+        try:
             file_size = output_path.stat().st_size
-            logger.info(f"✓ PDF exported successfully using WeasyPrint: {output_path.name}")
-            logger.info(f"  File size: {file_size / 1024:.2f} KB")
-            return True
-        else:
+        except FileNotFoundError:
             logger.error("PDF file was not created")
             return False
+        logger.info(f"✓ PDF exported successfully using WeasyPrint: {output_path.name}")
+        logger.info(f"  File size: {file_size / 1024:.2f} KB")
+        return True
     
     def _export_with_alternative(
         self,
@@ -269,7 +274,7 @@ class PDFExporter:
         logger.info("For full HTML rendering, please ensure WeasyPrint is properly installed")
         
         try:
-            from PIL import Image, ImageDraw, ImageFont
+            from PIL import Image, ImageDraw
             
             # Create simple placeholder pages
             dimensions = {
@@ -282,26 +287,29 @@ class PDFExporter:
             dims = dimensions.get(aspect_ratio, dimensions["16:9"])
             logger.debug(f"Creating placeholder images at {dims[0]}x{dims[1]}")
             
+            # Every page shares the bordered background; draw it once and
+            # copy it, adding only the slide number per page
+            template = Image.new('RGB', dims, color='white')
+            ImageDraw.Draw(template).rectangle(
+                [(10, 10), (dims[0] - 10, dims[1] - 10)],
+                outline='gray',
+                width=3
+            )
+            font = _placeholder_font()
+            
             images = []
             for i, html_file in enumerate(html_files):
-                logger.debug(f"Creating placeholder for slide {i+1}")
-                
-                img = Image.new('RGB', dims, color='white')
-                draw = ImageDraw.Draw(img)
+                logger.debug("Creating placeholder for slide %d", i + 1)
                 
-                # Draw border
-                draw.rectangle(
-                    [(10, 10), (dims[0] - 10, dims[1] - 10)],
-                    outline='gray',
-                    width=3
-                )
+                img = template.copy()
                 
                 # Add text
                 text = f"Slide {i + 1}"
-                draw.text(
+                ImageDraw.Draw(img).text(
                     (dims[0] // 2 - 100, dims[1] // 2),
                     text,
-                    fill='black'
+                    fill='black',
+                    font=font
                 )
                 
                 images.append(img)
@@ -315,8 +323,11 @@ class PDFExporter:
                     resolution=100.0
                 )
                 
-                if output_path.exists():
+                try:
                     file_size = output_path.stat().st_size
+                except FileNotFoundError:
+                    file_size = None
+                if file_size is not None:
                     logger.warning(f"⚠ PDF created with PLACEHOLDERS only: {output_path.name}")
                     logger.info(f"  File size: {file_size / 1024:.2f} KB")
                     return True
@@ -334,7 +345,8 @@ class PDFExporter:
             logger.debug(f"Traceback: {traceback.format_exc()}")
             return False
     
-    def _fix_image_paths(self, html_content: str, base_path: Path) -> str:
+    @staticmethod
+    def _fix_image_paths(html_content: str, base_path: Path) -> str:
         """
         Convert relative image paths to absolute paths
         
@@ -345,14 +357,200 @@ class PDFExporter:
         Returns:
             Modified HTML content
         """
-        import re
+        base_dir = str(base_path)
         
         def replace_path(match):
             rel_path = match.group(1)
-            if not rel_path.startswith(('http://', 'https://', 'file://')):
-                abs_path = (base_path / rel_path).resolve()
+            if not rel_path.startswith(_ABSOLUTE_URL_PREFIXES):
+                # Pure string normalization; Path.resolve() would stat every component
+                abs_path = os.path.abspath(os.path.join(base_dir, rel_path))
                 return f'src="file://{abs_path}"'
             return match.group(0)
         
-        return re.sub(r'src="([^"]+)"', replace_path, html_content)
+        return _SRC_ATTR_RE.sub(replace_path, html_content)
+
+
+def _load_rgb(img_path: Path) -> Any:
+    """
+    Decode an image as RGB (the mode PDF pages need) and release its file
+    
+    Args:
+        img_path: Image file
+        
+    Returns:
+        Loaded PIL image
+    """
+    from PIL import Image
+    
+    img = Image.open(img_path)
+    # Decodes the pixels and closes the file of a single-frame image
+    img.load()
+    if img.mode != 'RGB':
+        img = img.convert('RGB')
+    return img
+
+
+@functools.lru_cache(maxsize=1)
+def _placeholder_font() -> Any:
+    """
+    Load the font used for placeholder page numbers
+    
+    Prefers DejaVu Sans at 48px, falling back to Pillow's built-in font
+    (scalable on Pillow 10.1+, bitmap before that).
+    
+    Returns:
+        PIL ImageFont
+    """
+    from PIL import ImageFont
+    
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", _PLACEHOLDER_FONT_SIZE)
+    except OSError:
+        pass
+    try:
+        return ImageFont.load_default(size=_PLACEHOLDER_FONT_SIZE)
+    except TypeError:
+        return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=8)
+def _page_stylesheet(page_size: Tuple[str, str]) -> Any:
+    """
+    Build the page size and text alignment stylesheet for PDF rendering
+    
+    Parsed once per page size (and per worker process) instead of per export.
+    
+    Args:
+        page_size: (width, height) CSS lengths of the page
+        
+    Returns:
+        weasyprint.CSS instance
+    """
+    from weasyprint import CSS
+    
+    width, height = page_size
+    return CSS(string=f'''
+@page {{
+    size: {width} {height};
+    margin: 0;
+}}
+body {{
+    margin: 0;
+    padding: 0;
+}}
+/* Fix text indentation alignment for PDF rendering */
+.text-content {{
+    text-indent: 0 !important;
+    padding-left: 0 !important;
+    margin-left: 0 !important;
+}}
+.text-content::first-line {{
+    text-indent: 0 !important;
+    padding-left: 0 !important;
+    margin-left: 0 !important;
+}}
+.text-block-wrapper .text-content,
+.text-block .text-content {{
+    text-indent: 0 !important;
+    padding-left: 0 !important;
+    margin-left: 0 !important;
+}}
+''')
+
+
+def _render_slide_document(html_file: Path, stylesheet: Any) -> Any:
+    """
+    Lay out one HTML slide with WeasyPrint
+    
+    Args:
+        html_file: HTML slide
+        stylesheet: weasyprint.CSS with the page size and alignment rules
+        
+    Returns:
+        Rendered weasyprint Document
+    """
+    from weasyprint import HTML
+    
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Processing HTML file: %s", html_file.name)
+    html_content = html_file.read_text(encoding='utf-8')
+    html_content = PDFExporter._fix_image_paths(html_content, html_file.parent)
+    return HTML(string=html_content, base_url=str(html_file.parent)).render(stylesheets=[stylesheet])
+
+
+def _render_slide_pdf(html_file: Path, page_size: Tuple[str, str]) -> bytes:
+    """
+    Render one HTML slide to an in-memory PDF
+    
+    Module-level so it can run in a worker process; the page size is passed
+    instead of a stylesheet because WeasyPrint CSS objects do not pickle.
+    
+    Args:
+        html_file: HTML slide
+        page_size: (width, height) CSS lengths of the page
+        
+    Returns:
+        PDF file contents
+    """
+    return _render_slide_document(html_file, _page_stylesheet(page_size)).write_pdf()
+
 
+def _render_pdf(
+    html_files: List[Path],
+    output_path: Path,
+    aspect_ratio: str,
+    image_files: Optional[List[Path]],
+    skip_exist_check: bool = False
+) -> bool:
+    """Worker entry point: run a full PDF export inside a pool process"""
+    return PDFExporter().export_to_pdf(
+        html_files=html_files,
+        output_path=output_path,
+        aspect_ratio=aspect_ratio,
+        image_files=image_files,
+        skip_exist_check=skip_exist_check
+    )
+
+
+def submit_pdf_export(
+    html_files: List[Path],
+    output_path: Path,
+    aspect_ratio: str = "16:9",
+    image_files: Optional[List[Path]] = None,
+    skip_exist_check: bool = False
+) -> Future:
+    """
+    Start a PDF export without blocking the caller
+    
+    PDF assembly is CPU-bound and holds the GIL, so it runs in a worker
+    process once start_pdf_pool has been called; otherwise the export runs
+    synchronously and an already-completed future is returned.
+    
+    Args:
+        html_files: List of HTML file paths (in order)
+        output_path: Path for output PDF
+        aspect_ratio: Aspect ratio for page dimensions
+        image_files: Optional list of pre-rendered PNG images to use instead
+        skip_exist_check: Trust that every image in image_files exists
+        
+    Returns:
+        Future resolving to the export success status
+    """
+    pool = get_pdf_pool()
+    if pool is not None:
+        try:
+            return pool.submit(
+                _render_pdf, html_files, output_path, aspect_ratio, image_files, skip_exist_check
+            )
+        except RuntimeError as e:
+            # Pool is broken or shut down; fall back to exporting in-process
+            logger.warning(f"PDF worker pool unavailable, exporting inline: {e}")
+    
+    future: Future = Future()
+    try:
+        future.set_result(
+            _render_pdf(html_files, output_path, aspect_ratio, image_files, skip_exist_check)
+        )
+    except Exception as e:
+        future.set_exception(e)
+    return future
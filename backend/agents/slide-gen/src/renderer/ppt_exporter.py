@@ -6,7 +6,7 @@ import logging
 import re
 import traceback
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pptx import Presentation
 from pptx.util import Inches, Pt
 from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
@@ -38,27 +38,19 @@ class PPTExporter:
             'accent': RGBColor(0, 113, 227)  # #0071e3 - Apple blue
         }
     
-    def _apply_color_scheme(self, scheme_colors: Dict[str, str]):
+    def _apply_color_scheme(self, scheme_rgb: Dict[str, Tuple[int, int, int]]):
         """
-        Apply color scheme by converting hex colors to RGBColor objects
+        Apply color scheme by converting pre-parsed RGB tuples to RGBColor objects
         
         Args:
-            scheme_colors: Dictionary with hex color values
+            scheme_rgb: Dictionary with (r, g, b) color values
         """
-        def hex_to_rgb(hex_color: str) -> RGBColor:
-            """Convert hex color string to RGBColor"""
-            hex_color = hex_color.lstrip('#')
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            return RGBColor(r, g, b)
-        
         # Update color mappings
-        self.colors['background'] = hex_to_rgb(scheme_colors['background'])
-        self.colors['text'] = hex_to_rgb(scheme_colors['text'])
-        self.colors['title'] = hex_to_rgb(scheme_colors['text'])  # Title uses text color
-        self.colors['accent'] = hex_to_rgb(scheme_colors['accent'])
-        self.colors['section_header'] = hex_to_rgb(scheme_colors['header'])
+        self.colors['background'] = RGBColor(*scheme_rgb['background'])
+        self.colors['text'] = RGBColor(*scheme_rgb['text'])
+        self.colors['title'] = RGBColor(*scheme_rgb['text'])  # Title uses text color
+        self.colors['accent'] = RGBColor(*scheme_rgb['accent'])
+        self.colors['section_header'] = RGBColor(*scheme_rgb['header'])
         
         logger.debug(f"Color scheme applied: background={self.colors['background']}, "
                     f"text={self.colors['text']}, accent={self.colors['accent']}")
@@ -100,8 +92,8 @@ class PPTExporter:
         scheme_colors = ColorScheme.get_scheme(color_scheme)
         logger.debug(f"Color scheme values: {scheme_colors}")
         
-        # Convert hex colors to RGBColor objects
-        self._apply_color_scheme(scheme_colors)
+        # Convert pre-parsed RGB values to RGBColor objects
+        self._apply_color_scheme(ColorScheme.get_scheme_rgb(color_scheme))
         logger.info(f"Applied {scheme_colors['name']} color scheme")
         logger.debug(f"  Background: {scheme_colors['background']}")
         logger.debug(f"  Text: {scheme_colors['text']}")
@@ -142,20 +134,20 @@ class PPTExporter:
             
             prs.save(str(output_path))
             
-            # Verify file was created
-            if output_path.exists():
+            # Verify file was created; stat() doubles as the existence check
+            try:
                 file_size = output_path.stat().st_size
-                logger.info("=" * 60)
-                logger.info("✓ PPT Generation Completed Successfully")
-                logger.info(f"  File: {output_path.name}")
-                logger.info(f"  Size: {file_size / 1024:.2f} KB")
-                logger.info(f"  Slides: {len(slides_data)}")
-                logger.info(f"  Location: {output_path}")
-                logger.info("=" * 60)
-                return True
-            else:
+            except FileNotFoundError:
                 logger.error("PPT file was not created")
                 return False
+            logger.info("=" * 60)
+            logger.info("✓ PPT Generation Completed Successfully")
+            logger.info(f"  File: {output_path.name}")
+            logger.info(f"  Size: {file_size / 1024:.2f} KB")
+            logger.info(f"  Slides: {len(slides_data)}")
+            logger.info(f"  Location: {output_path}")
+            logger.info("=" * 60)
+            return True
                 
         except ImportError as e:
             logger.error("python-pptx library is not installed")
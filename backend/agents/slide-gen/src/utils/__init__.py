@@ -2,8 +2,8 @@
 Utility modules for slide generation
 """
 
-from .config import Config
+from .config import Config, get_config
 from .validators import InputValidator
 
-__all__ = ["Config", "InputValidator"]
+__all__ = ["Config", "get_config", "InputValidator"]
 
@@ -3,13 +3,34 @@ Configuration management using environment variables
 """
 
 import os
-from typing import Optional
+import threading
+from typing import TYPE_CHECKING, Optional
 from pathlib import Path
 from dotenv import load_dotenv
 
+__all__ = ["Config", "get_config", "config"]
+
 
 class Config:
-    """Configuration loader and manager"""
+    """
+    Configuration loader and manager
+    
+    Settings are read once when the instance is created and are read-only
+    afterwards; __slots__ keeps attribute access off a per-instance dict.
+    """
+    
+    __slots__ = (
+        "llm_api_key", "llm_api_url", "llm_model", "llm_context_window",
+        "image_api_key", "image_api_url", "image_model",
+        "use_bridge", "image_http2",
+        "default_timeout", "max_retries", "retry_max_elapsed",
+        "circuit_failure_threshold", "circuit_reset_timeout",
+        "image_concurrency", "slide_concurrency", "llm_batch_size",
+        "image_cache_max_gb", "pdf_workers", "pdf_render_workers",
+        "output_dir", "html_dir", "images_dir", "slide_images_dir",
+        "image_cache_dir", "jinja_cache_dir",
+        "_frozen",
+    )
     
     def __init__(self):
         """Initialize configuration from .env file or environment variables"""
@@ -30,6 +51,8 @@ class Config:
         self.llm_api_key: str = os.getenv("SLIDE_LLM_API_KEY") or os.getenv("LLM_API_KEY", "")
         self.llm_api_url: str = os.getenv("SLIDE_LLM_API_URL") or os.getenv("LLM_API_URL", "https://api.openai.com/v1/chat/completions")
         self.llm_model: str = os.getenv("SLIDE_LLM_MODEL") or os.getenv("LLM_MODEL", "gpt-4")
+        # Context window of the LLM in tokens; when set, max_tokens is capped to what fits (0 disables)
+        self.llm_context_window: int = max(0, int(os.getenv("LLM_CONTEXT_WINDOW", "0")))
         
         # Image Generation Configuration - prioritize SLIDE_* prefixed variables, fall back to non-prefixed
         self.image_api_key: str = os.getenv("SLIDE_IMAGE_API_KEY") or os.getenv("IMAGE_API_KEY", "")
@@ -39,10 +62,29 @@ class Config:
         # Bridge Configuration - USE_BRIDGE controls whether to use internal bridge or HTTP calls
         # Default to False for standalone execution (main.py), set to True when called from Flask
         self.use_bridge: bool = os.getenv("USE_BRIDGE", "false").lower() in ["true", "1", "yes"]
+        # Use an HTTP/2 client (httpx + h2) for image API calls made over HTTP
+        self.image_http2: bool = os.getenv("IMAGE_HTTP2", "false").lower() in ["true", "1", "yes"]
         
         # Generation Settings
         self.default_timeout: int = int(os.getenv("DEFAULT_TIMEOUT", "60"))
         self.max_retries: int = int(os.getenv("MAX_RETRIES", "3"))
+        # Upper bound in seconds on the time spent retrying one API call
+        self.retry_max_elapsed: float = float(os.getenv("RETRY_MAX_ELAPSED", "120"))
+        # Consecutive API failures that pause calls to that endpoint (0 disables), and for how long
+        self.circuit_failure_threshold: int = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+        self.circuit_reset_timeout: float = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30"))
+        # Maximum number of image placeholders generated concurrently per slide
+        self.image_concurrency: int = max(1, int(os.getenv("IMAGE_CONCURRENCY", "4")))
+        # Slides whose images may be generated at the same time (current slide plus lookahead)
+        self.slide_concurrency: int = max(1, int(os.getenv("SLIDE_CONCURRENCY", "2")))
+        # Number of slide layouts requested per LLM call (1 = one call per slide)
+        self.llm_batch_size: int = max(1, int(os.getenv("LLM_BATCH_SIZE", "1")))
+        # Size cap of the generated-image cache in GB (0 disables the cache)
+        self.image_cache_max_gb: float = float(os.getenv("IMAGE_CACHE_MAX_GB", "2"))
+        # Worker processes used to assemble the PDF (0 assembles it in the calling thread)
+        self.pdf_workers: int = max(0, int(os.getenv("PDF_WORKERS", "1")))
+        # Processes rendering individual slides in parallel during PDF export (1 renders them in turn)
+        self.pdf_render_workers: int = max(1, int(os.getenv("PDF_RENDER_WORKERS", "4")))
         
         # Output paths
         # Point to slide-gen/output directory (which is 3 levels up from here, then into slide-gen/output)
@@ -50,13 +92,22 @@ class Config:
         self.html_dir = self.output_dir / "html"
         self.images_dir = self.output_dir / "images"
         self.slide_images_dir = self.output_dir / "slide_images"
+        self.image_cache_dir = self.output_dir / "image_cache"
+        self.jinja_cache_dir = self.output_dir / "jinja_cache"
         
         # Create output directories
         self._create_directories()
+        self._frozen = True
+    
+    def __setattr__(self, name: str, value) -> None:
+        """Reject changes once the configuration has been loaded"""
+        if getattr(self, "_frozen", False):
+            raise AttributeError(f"Config is read-only; cannot set {name!r}")
+        object.__setattr__(self, name, value)
     
     def _create_directories(self) -> None:
         """Create necessary output directories"""
-        for directory in [self.html_dir, self.images_dir, self.slide_images_dir]:
+        for directory in [self.html_dir, self.images_dir, self.slide_images_dir, self.jinja_cache_dir]:
             directory.mkdir(parents=True, exist_ok=True)
     
     def validate(self) -> tuple[bool, Optional[str]]:
@@ -79,8 +130,35 @@ class Config:
 
 
 # Global config instance
-# NOTE: This will be initialized when first imported.
+# NOTE: This is created lazily on first access (``get_config()`` or
+# ``from src.utils.config import config``), so importing the module for
+# tooling does not parse .env files or create output directories.
 # If you need to set environment variables before initialization,
-# set them before importing this module.
-config = Config()
+# set them before the first access.
+_config: Optional[Config] = None
+_config_lock = threading.Lock()
+
+if TYPE_CHECKING:
+    config: Config
+
+
+def get_config() -> Config:
+    """
+    Get the global config instance, creating it on first use
+    
+    Returns:
+        Config: Shared configuration instance
+    """
+    global _config
+    if _config is None:
+        with _config_lock:
+            if _config is None:
+                _config = Config()
+    return _config
+
 
+def __getattr__(name: str):
+    """Resolve the module-level ``config`` attribute lazily (PEP 562)"""
+    if name == "config":
+        return get_config()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,98 @@
+"""
+Shared HTTP session factory for API clients
+"""
+
+import contextlib
+import logging
+from io import BytesIO
+from typing import Any, BinaryIO, Iterator, Optional, Tuple
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+# Exception types raised by either client returned from this module
+TIMEOUT_ERRORS = (requests.exceptions.Timeout,) + ((httpx.TimeoutException,) if httpx else ())
+REQUEST_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+
+def create_session(pool_maxsize: int = 10) -> requests.Session:
+    """
+    Create a requests session with a keep-alive connection pool
+
+    Clients built from the same session reuse TCP/TLS connections to the
+    LLM and image hosts instead of opening a new one per request.
+
+    Args:
+        pool_maxsize: Maximum pooled connections per host
+
+    Returns:
+        requests.Session: Configured session
+    """
+    session = requests.Session()
+    # Retries are handled by the clients themselves
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+@contextlib.contextmanager
+def stream_get(session: Any, url: str, timeout: float) -> Iterator[Tuple[Any, BinaryIO]]:
+    """
+    GET a URL and expose the body as a file object
+    
+    With a requests.Session the body is read straight from the socket
+    (stream=True) instead of being buffered into response.content first.
+    Other clients fall back to an in-memory buffer.
+    
+    Args:
+        session: requests.Session or httpx.Client
+        url: URL to fetch
+        timeout: Request timeout in seconds
+    
+    Yields:
+        tuple: (response, readable binary body)
+    """
+    if isinstance(session, requests.Session):
+        with session.get(url, timeout=timeout, stream=True) as response:
+            response.raw.decode_content = True
+            yield response, response.raw
+    else:
+        response = session.get(url, timeout=timeout)
+        yield response, BytesIO(response.content)
+
+
+def create_http2_client(pool_maxsize: int = 10, timeout: float = 60) -> Optional["httpx.Client"]:
+    """
+    Create an HTTP/2 capable client for the image API
+    
+    Concurrent requests are multiplexed over one TLS connection when the
+    server negotiates h2; otherwise httpx falls back to HTTP/1.1 transparently.
+    The client exposes the same get/post/response surface the API clients use
+    from requests.Session.
+    
+    Args:
+        pool_maxsize: Maximum pooled connections per host
+        timeout: Default request timeout in seconds
+    
+    Returns:
+        httpx.Client, or None when httpx or h2 is not installed
+    """
+    if httpx is None:
+        logger.warning("httpx is not installed, HTTP/2 disabled")
+        return None
+    try:
+        return httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            timeout=timeout
+        )
+    except ImportError:
+        logger.warning("h2 package is not installed, HTTP/2 disabled")
+        return None
@@ -3,125 +3,150 @@ Icon selection utility for slide content
 """
 
 import logging
-from typing import Dict, List, Optional
+from collections import Counter
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
 
+def _build_keyword_index(section_keywords: Mapping[str, Sequence[str]]) -> Dict[str, Tuple[str, ...]]:
+    """
+    Invert the icon -> keywords mapping into keyword -> icons
+    
+    Args:
+        section_keywords: Mapping of icon ID to its trigger keywords
+        
+    Returns:
+        Mapping of each keyword to the icons it triggers, in icon order
+    """
+    index: Dict[str, List[str]] = {}
+    for icon, keywords in section_keywords.items():
+        for keyword in keywords:
+            icons = index.setdefault(keyword, [])
+            if icon not in icons:
+                icons.append(icon)
+    return {keyword: tuple(icons) for keyword, icons in index.items()}
+
+
 class IconSelector:
     """Select appropriate icons based on content context"""
     
     # Keyword mappings for section icon selection
-    SECTION_KEYWORDS = {
-        'icon-lightbulb': [
+    SECTION_KEYWORDS: Mapping[str, Tuple[str, ...]] = MappingProxyType({
+        'icon-lightbulb': (
             'idea', 'concept', 'innovation', 'creative', 'insight', 'inspiration',
             'brainstorm', 'thinking', 'solution', 'approach', 'perspective'
-        ],
-        'icon-chart': [
+        ),
+        'icon-chart': (
             'data', 'analytics', 'metrics', 'results', 'statistics', 'analysis',
             'performance', 'measure', 'growth', 'trend', 'report', 'findings'
-        ],
-        'icon-target': [
+        ),
+        'icon-target': (
             'goal', 'objective', 'aim', 'target', 'mission', 'purpose', 
             'achievement', 'milestone', 'outcome', 'focus', 'priority'
-        ],
-        'icon-book': [
+        ),
+        'icon-book': (
             'learn', 'education', 'study', 'knowledge', 'research', 'academic',
             'literature', 'reference', 'theory', 'background', 'context', 'documentation'
-        ],
-        'icon-checkmark': [
+        ),
+        'icon-checkmark': (
             'benefit', 'advantage', 'feature', 'success', 'achievement', 'complete',
             'done', 'verified', 'approved', 'positive', 'win', 'accomplish'
-        ],
-        'icon-rocket': [
+        ),
+        'icon-rocket': (
             'launch', 'start', 'begin', 'initiate', 'deploy', 'implementation',
             'startup', 'kickoff', 'momentum', 'acceleration', 'growth'
-        ],
-        'icon-trophy': [
+        ),
+        'icon-trophy': (
             'award', 'achievement', 'excellence', 'winner', 'best', 'champion',
             'success', 'recognition', 'accomplishment', 'reward'
-        ],
-        'icon-flag': [
+        ),
+        'icon-flag': (
             'milestone', 'marker', 'checkpoint', 'indicator', 'highlight',
             'important', 'note', 'attention', 'key point'
-        ],
-        'icon-users': [
+        ),
+        'icon-users': (
             'team', 'group', 'people', 'collaboration', 'community', 'social',
             'stakeholder', 'audience', 'participant', 'user', 'customer'
-        ],
-        'icon-brain': [
+        ),
+        'icon-brain': (
             'intelligence', 'cognitive', 'mental', 'thinking', 'mind', 'smart',
             'ai', 'artificial', 'neural', 'learning', 'reasoning'
-        ],
-        'icon-code': [
+        ),
+        'icon-code': (
             'programming', 'software', 'development', 'code', 'coding', 'technical',
             'algorithm', 'script', 'implementation', 'engineering'
-        ],
-        'icon-clipboard': [
+        ),
+        'icon-clipboard': (
             'checklist', 'task', 'todo', 'list', 'requirement', 'specification',
             'criteria', 'plan', 'agenda', 'outline'
-        ],
-        'icon-puzzle': [
+        ),
+        'icon-puzzle': (
             'problem', 'challenge', 'solution', 'complexity', 'component',
             'piece', 'integration', 'system', 'architecture'
-        ],
-        'icon-key': [
+        ),
+        'icon-key': (
             'essential', 'critical', 'important', 'core', 'fundamental', 'primary',
             'access', 'unlock', 'enable', 'security'
-        ],
-        'icon-shield': [
+        ),
+        'icon-shield': (
             'security', 'protection', 'safety', 'defense', 'guard', 'secure',
             'privacy', 'safeguard', 'risk', 'compliance'
-        ],
-        'icon-globe': [
+        ),
+        'icon-globe': (
             'global', 'world', 'international', 'worldwide', 'universal', 'network',
             'internet', 'web', 'online', 'geography'
-        ],
-        'icon-search': [
+        ),
+        'icon-search': (
             'find', 'discover', 'explore', 'investigate', 'research', 'query',
             'locate', 'identify', 'examine', 'inspect'
-        ],
-        'icon-document': [
+        ),
+        'icon-document': (
             'document', 'file', 'paper', 'record', 'report', 'publication',
             'article', 'content', 'text', 'material'
-        ],
-        'icon-heart': [
+        ),
+        'icon-heart': (
             'favorite', 'like', 'love', 'passion', 'care', 'value',
             'preference', 'important', 'priority', 'emotion'
-        ],
-        'icon-database': [
+        ),
+        'icon-database': (
             'storage', 'database', 'repository', 'archive', 'collection',
             'dataset', 'information', 'record', 'warehouse'
-        ],
-        'icon-link': [
+        ),
+        'icon-link': (
             'connection', 'relationship', 'link', 'network', 'integration',
             'association', 'connect', 'tie', 'bridge'
-        ],
-        'icon-warning': [
+        ),
+        'icon-warning': (
             'warning', 'caution', 'alert', 'danger', 'risk', 'issue',
             'problem', 'concern', 'limitation', 'constraint'
-        ],
-        'icon-info': [
+        ),
+        'icon-info': (
             'information', 'detail', 'about', 'description', 'explanation',
             'overview', 'summary', 'introduction', 'background'
-        ],
-        'icon-success': [
+        ),
+        'icon-success': (
             'success', 'complete', 'finished', 'done', 'achieved', 'accomplished',
             'result', 'outcome', 'victory', 'resolution'
-        ],
-        'icon-tools': [
+        ),
+        'icon-tools': (
             'tool', 'utility', 'instrument', 'resource', 'method', 'technique',
             'mechanism', 'process', 'workflow', 'framework'
-        ],
-        'icon-settings': [
+        ),
+        'icon-settings': (
             'configuration', 'setting', 'option', 'preference', 'parameter',
             'control', 'adjustment', 'customize', 'setup'
-        ],
-        'icon-star': [
+        ),
+        'icon-star': (
             'featured', 'highlight', 'special', 'premium', 'quality', 'excellent',
             'rating', 'favorite', 'top', 'outstanding'
-        ]
-    }
+        )
+    })
+    
+    # Inverted keyword -> icons index used by suggest_icon
+    _KEYWORD_TO_ICONS = _build_keyword_index(SECTION_KEYWORDS)
     
     # Default icon for bullet points (used in CSS)
     DEFAULT_BULLET_ICON = 'icon-circle'
@@ -144,16 +169,13 @@ class IconSelector:
             logger.debug("Empty section title, using default icon")
             return IconSelector.DEFAULT_SECTION_ICON
         
-        title_lower = section_title.lower()
-        
-        # Check each icon's keywords
-        for icon, keywords in IconSelector.SECTION_KEYWORDS.items():
-            if any(keyword in title_lower for keyword in keywords):
-                logger.debug(f"Icon '{icon}' selected for section: '{section_title}'")
-                return icon
+        icon = _match_section_icon(section_title.lower())
+        if icon is not None:
+            logger.debug("Icon '%s' selected for section: '%s'", icon, section_title)
+            return icon
         
         # No match found, use default
-        logger.debug(f"No icon match for section: '{section_title}', using default")
+        logger.debug("No icon match for section: '%s', using default", section_title)
         return IconSelector.DEFAULT_SECTION_ICON
     
     @staticmethod
@@ -165,21 +187,32 @@ class IconSelector:
             content_blocks: List of content block dictionaries
             
         Returns:
-            Updated content blocks with 'icon' field added to text blocks
+            Updated content blocks with 'icon' field added to text blocks.
+            Blocks that receive no icon are returned by reference, not copied.
         """
+        match = _match_section_icon
+        default_icon = IconSelector.DEFAULT_SECTION_ICON
+        
+        # Only text blocks with section titles get icons; lower all titles in one sweep
+        lowered_titles = [
+            (i, block['section_title'].lower())
+            for i, block in enumerate(content_blocks)
+            if block.get('type') == 'text' and block.get('section_title')
+        ]
+        icons = {i: match(title) or default_icon for i, title in lowered_titles}
+        
         updated_blocks = []
         
-        for block in content_blocks:
-            # Create a copy to avoid modifying original
-            updated_block = dict(block)
-            
-            # Only process text blocks with section titles
-            if block.get('type') == 'text' and block.get('section_title'):
-                section_title = block.get('section_title', '')
-                selected_icon = IconSelector.select_icon_for_section(section_title)
-                updated_block['icon'] = selected_icon
-                logger.debug(f"Added icon '{selected_icon}' to text block: {section_title[:50]}...")
+        for i, block in enumerate(content_blocks):
+            selected_icon = icons.get(i)
+            if selected_icon is None:
+                updated_blocks.append(block)
+                continue
             
+            # Copy before modifying to leave the original untouched
+            updated_block = dict(block)
+            updated_block['icon'] = selected_icon
+            logger.debug("Added icon '%s' to text block: %.50s...", selected_icon, block['section_title'])
             updated_blocks.append(updated_block)
         
         return updated_blocks
@@ -205,7 +238,7 @@ class IconSelector:
         Returns:
             Description string
         """
-        keywords = IconSelector.SECTION_KEYWORDS.get(icon_id, [])
+        keywords = IconSelector.SECTION_KEYWORDS.get(icon_id, ())
         if keywords:
             return f"Icon for: {', '.join(keywords[:5])}"
         return "Generic icon"
@@ -221,19 +254,42 @@ class IconSelector:
         Returns:
             Suggested icon ID
         """
-        # Count matches for each icon
-        icon_scores: Dict[str, int] = {}
+        # Count matches for each icon (each input keyword scores an icon at most once)
+        icon_scores: Counter = Counter()
         
-        for icon, icon_keywords in IconSelector.SECTION_KEYWORDS.items():
-            score = sum(1 for kw in keywords if any(ikw in kw.lower() for ikw in icon_keywords))
-            if score > 0:
-                icon_scores[icon] = score
+        for kw in [kw.lower() for kw in keywords]:
+            matched = {
+                icon
+                for pattern, icons in IconSelector._KEYWORD_TO_ICONS.items()
+                if pattern in kw
+                for icon in icons
+            }
+            icon_scores.update(matched)
         
         if icon_scores:
-            # Return icon with highest score
-            best_icon = max(icon_scores.items(), key=lambda x: x[1])[0]
-            logger.debug(f"Suggested icon '{best_icon}' based on keywords: {keywords}")
+            # Return icon with highest score (ties resolved by SECTION_KEYWORDS order)
+            best_icon = max(
+                (icon for icon in IconSelector.SECTION_KEYWORDS if icon in icon_scores),
+                key=icon_scores.__getitem__
+            )
+            logger.debug("Suggested icon '%s' based on keywords: %s", best_icon, keywords)
             return best_icon
         
         return IconSelector.DEFAULT_SECTION_ICON
 
+
+@lru_cache(maxsize=1024)
+def _match_section_icon(title_lower: str) -> Optional[str]:
+    """
+    Find the first icon whose keywords occur in an already-lowercased title
+    
+    Args:
+        title_lower: Lowercased section title
+        
+    Returns:
+        Icon ID, or None if no keyword matches
+    """
+    for icon, keywords in IconSelector.SECTION_KEYWORDS.items():
+        if any(keyword in title_lower for keyword in keywords):
+            return icon
+    return None
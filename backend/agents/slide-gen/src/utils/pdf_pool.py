@@ -0,0 +1,93 @@
+"""
+Process pool for PDF export
+
+Kept apart from src.renderer so the pool can be forked at startup without
+importing the renderer package (Jinja2, Playwright, python-pptx) into the
+hosting process; each worker imports the PDF exporter in its initializer.
+"""
+
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+from src.utils.config import config
+
+logger = logging.getLogger(__name__)
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _init_pdf_worker() -> None:
+    """
+    Pool process initializer: give the worker its own log output and load the exporter
+    
+    A forked worker inherits the parent's root handlers. A QueueHandler among
+    them would feed a queue that no listener drains in this process, so
+    records would be dropped; it is replaced by a plain stderr handler.
+    """
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, logging.handlers.QueueHandler):
+            root.removeHandler(handler)
+    if not root.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        root.addHandler(handler)
+    
+    # Import the renderer here, in the worker, rather than in the parent before forking;
+    # a failure surfaces on the export itself instead of breaking the pool
+    try:
+        import src.renderer.pdf_exporter  # noqa: F401
+    except ImportError as e:
+        logger.error(f"PDF worker could not import the exporter: {e}")
+
+
+def start_pdf_pool() -> bool:
+    """
+    Start the shared PDF worker pool
+    
+    Workers are forked so they inherit sys.path and never re-import the
+    hosting application's __main__ module. Forking a multi-threaded process
+    can leave a child holding a copy of a lock some other thread owned, so
+    this must be called at startup, before worker threads, log listeners or
+    CUDA are started. The worker processes are launched here rather than on
+    the first export.
+    
+    Returns:
+        True if the pool is running, False when pooling is disabled or fork
+        is unavailable on this platform (exports then run in-process)
+    """
+    global _pdf_pool
+    if config.pdf_workers <= 0 or "fork" not in multiprocessing.get_all_start_methods():
+        return False
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            pool = ProcessPoolExecutor(
+                max_workers=config.pdf_workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=_init_pdf_worker
+            )
+            # A fork-context pool launches all of its processes on the first submit
+            try:
+                pool.submit(os.getpid).result()
+            except BrokenProcessPool as e:
+                logger.warning(f"PDF worker pool failed to start, exporting in-process: {e}")
+                pool.shutdown(wait=False)
+                return False
+            _pdf_pool = pool
+    return True
+
+
+def get_pdf_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Get the PDF worker pool
+    
+    Returns:
+        The pool, or None if start_pdf_pool has not started one
+    """
+    return _pdf_pool
@@ -0,0 +1,112 @@
+"""
+Retry helpers: jittered backoff and a simple circuit breaker
+"""
+
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 30.0) -> float:
+    """
+    Compute a full-jitter exponential backoff delay
+    
+    Spreading retries uniformly over [0, min(cap, base * 2^attempt)] keeps
+    workers that failed together from retrying in lockstep.
+    
+    Args:
+        attempt: Zero-based retry attempt
+        base: Base delay in seconds
+        cap: Upper bound for the delay in seconds
+    
+    Returns:
+        Delay in seconds
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RetryBudget:
+    """Bounds the total time a retry loop may spend sleeping between attempts"""
+    
+    def __init__(self, max_elapsed: float):
+        """
+        Initialize retry budget
+        
+        Args:
+            max_elapsed: Seconds after which no further retry is started
+        """
+        self.deadline = time.monotonic() + max_elapsed
+    
+    def sleep(self, attempt: int) -> bool:
+        """
+        Sleep for a jittered backoff before the next attempt
+        
+        Args:
+            attempt: Zero-based attempt that just failed
+        
+        Returns:
+            True if the caller should retry, False if the budget is exhausted
+        """
+        delay = backoff_delay(attempt)
+        if time.monotonic() + delay > self.deadline:
+            logger.warning("Retry time budget exhausted, giving up")
+            return False
+        logger.info(f"Retrying in {delay:.1f} seconds...")
+        time.sleep(delay)
+        return True
+
+
+class CircuitBreaker:
+    """Fails fast after repeated consecutive failures against one endpoint"""
+    
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        """
+        Initialize circuit breaker
+        
+        Args:
+            name: Endpoint name used in log messages
+            failure_threshold: Consecutive failures that open the circuit (0 disables it)
+            reset_timeout: Seconds the circuit stays open before a trial call is allowed
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+    
+    def allow(self) -> bool:
+        """
+        Check whether a call may be attempted
+        
+        Returns:
+            False while the circuit is open, True otherwise
+        """
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self._failures < self.failure_threshold:
+                return True
+            return time.monotonic() - self._opened_at >= self.reset_timeout
+    
+    def record_success(self) -> None:
+        """Close the circuit after a successful call"""
+        with self._lock:
+            self._failures = 0
+    
+    def record_failure(self) -> None:
+        """Count a failed call, opening the circuit at the threshold"""
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._failures == self.failure_threshold:
+                    logger.warning(
+                        f"Circuit for {self.name} opened after {self._failures} consecutive failures; "
+                        f"pausing calls for {self.reset_timeout:.0f}s"
+                    )
+                self._opened_at = time.monotonic()
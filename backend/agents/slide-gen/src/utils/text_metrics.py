@@ -3,11 +3,30 @@ Text measurement and font scaling utilities for slide generation
 """
 
 import logging
+from bisect import bisect_left
+from dataclasses import dataclass
 from typing import Dict, List, Any
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class DensityMetrics:
+    """Content density metrics for a single slide"""
+    
+    __slots__ = (
+        'total_chars', 'text_blocks', 'images', 'section_headers',
+        'density_score', 'overflow_risk'
+    )
+    
+    total_chars: int
+    text_blocks: int
+    images: int
+    section_headers: int
+    density_score: float
+    overflow_risk: str  # 'low', 'medium' or 'high'
+
+
 class TextMetrics:
     """Calculate text dimensions and optimal font sizes for slides"""
     
@@ -35,6 +54,13 @@ class TextMetrics:
     DENSITY_HIGH = 1500    # Characters
     DENSITY_EXTREME = 2000 # Characters
     
+    # Density score bands -> base font scale (used by calculate_scale_factor)
+    _DENSITY_THRESHOLDS = (0.4, 0.6, 0.8)
+    _DENSITY_SCALES = (1.0, 0.92, 0.85, 0.75)
+    
+    # Per-template scale multipliers
+    _TEMPLATE_SCALE_MULTIPLIERS = {'two_column': 0.95, 'image_focus': 0.90}
+    
     @staticmethod
     def estimate_text_height(
         text: str,
@@ -74,8 +100,8 @@ class TextMetrics:
         estimated_height = int(total_lines * line_height_px)
         
         logger.debug(
-            f"Text height estimation: {text_length} chars, "
-            f"{total_lines} lines, {estimated_height}px height"
+            "Text height estimation: %d chars, %d lines, %dpx height",
+            text_length, total_lines, estimated_height
         )
         
         return estimated_height
@@ -84,7 +110,7 @@ class TextMetrics:
     def calculate_content_density(
         title: str,
         content_blocks: List[Dict[str, Any]]
-    ) -> Dict[str, Any]:
+    ) -> DensityMetrics:
         """
         Calculate content density metrics for a slide
         
@@ -93,25 +119,26 @@ class TextMetrics:
             content_blocks: List of content blocks
             
         Returns:
-            Dictionary with density metrics
+            DensityMetrics for the slide
         """
-        total_chars = len(title)
-        text_blocks = 0
+        # Partition blocks once, then let len/count/sum run over plain sequences
+        text_contents = []
+        section_titles = []
         images = 0
-        section_headers = 0
-        
         for block in content_blocks:
-            if block.get('type') == 'text':
-                text_blocks += 1
-                content = block.get('content', '')
-                total_chars += len(content)
-                
-                if block.get('section_title'):
-                    section_headers += 1
-                    total_chars += len(block['section_title'])
-            elif block.get('type') == 'image_placeholder':
+            block_type = block.get('type')
+            if block_type == 'text':
+                text_contents.append(block.get('content', ''))
+                section_title = block.get('section_title')
+                if section_title:
+                    section_titles.append(section_title)
+            elif block_type == 'image_placeholder':
                 images += 1
         
+        text_blocks = len(text_contents)
+        section_headers = len(section_titles)
+        total_chars = len(title) + sum(map(len, text_contents)) + sum(map(len, section_titles))
+        
         # Calculate density score (0-1)
         # Based on character count with adjustments for images and sections
         base_density = total_chars / TextMetrics.DENSITY_EXTREME
@@ -133,22 +160,22 @@ class TextMetrics:
             overflow_risk = 'high'
         
         logger.debug(
-            f"Content density: {total_chars} chars, {text_blocks} text blocks, "
-            f"{images} images, density score: {density_score:.2f}"
+            "Content density: %d chars, %d text blocks, %d images, density score: %.2f",
+            total_chars, text_blocks, images, density_score
         )
         
-        return {
-            'total_chars': total_chars,
-            'text_blocks': text_blocks,
-            'images': images,
-            'section_headers': section_headers,
-            'density_score': density_score,
-            'overflow_risk': overflow_risk
-        }
+        return DensityMetrics(
+            total_chars=total_chars,
+            text_blocks=text_blocks,
+            images=images,
+            section_headers=section_headers,
+            density_score=density_score,
+            overflow_risk=overflow_risk
+        )
     
     @staticmethod
     def calculate_scale_factor(
-        content_density: Dict[str, Any],
+        content_density: DensityMetrics,
         available_height: int,
         template_type: str = 'title_and_content'
     ) -> float:
@@ -163,51 +190,35 @@ class TextMetrics:
         Returns:
             Scale factor between MIN_SCALE_FACTOR and MAX_SCALE_FACTOR
         """
-        density_score = content_density['density_score']
-        total_chars = content_density['total_chars']
-        text_blocks = content_density['text_blocks']
-        
-        # Start with base scale
-        scale_factor = TextMetrics.MAX_SCALE_FACTOR
-        
-        # Adjust based on density score
-        if density_score > 0.8:
-            # Very high density - scale down significantly
-            scale_factor = 0.75
-            logger.debug(f"High density detected ({density_score:.2f}), scaling to 0.75")
-        elif density_score > 0.6:
-            # High density - moderate scaling
-            scale_factor = 0.85
-            logger.debug(f"Medium-high density ({density_score:.2f}), scaling to 0.85")
-        elif density_score > 0.4:
-            # Medium density - slight scaling
-            scale_factor = 0.92
-            logger.debug(f"Medium density ({density_score:.2f}), scaling to 0.92")
-        else:
-            # Low density - no scaling needed
-            logger.debug(f"Low density ({density_score:.2f}), no scaling needed")
+        # Bind class constants to locals once for the arithmetic below
+        metrics = TextMetrics
+        min_scale = metrics.MIN_SCALE_FACTOR
+        max_scale = metrics.MAX_SCALE_FACTOR
+        
+        density_score = content_density.density_score
+        text_blocks = content_density.text_blocks
+        
+        # Look up base scale from density bands (strictly above each threshold)
+        scale_factor = metrics._DENSITY_SCALES[
+            bisect_left(metrics._DENSITY_THRESHOLDS, density_score)
+        ]
+        logger.debug("Density %.2f, base scale %.2f", density_score, scale_factor)
         
         # Template-specific adjustments
-        if template_type == 'two_column':
-            # Two column needs more aggressive scaling
-            scale_factor *= 0.95
-            logger.debug(f"Two-column template adjustment: {scale_factor:.2f}")
-        elif template_type == 'image_focus':
-            # Image focus has less text space
-            if text_blocks > 2:
-                scale_factor *= 0.90
-                logger.debug(f"Image focus with multiple text blocks: {scale_factor:.2f}")
+        # (image_focus has less text space, but only matters with several text blocks)
+        if template_type != 'image_focus' or text_blocks > 2:
+            scale_factor *= metrics._TEMPLATE_SCALE_MULTIPLIERS.get(template_type, 1.0)
         
         # Ensure within bounds
-        scale_factor = max(TextMetrics.MIN_SCALE_FACTOR, min(TextMetrics.MAX_SCALE_FACTOR, scale_factor))
+        scale_factor = max(min_scale, min(max_scale, scale_factor))
         
-        logger.info(f"Calculated font scale factor: {scale_factor:.2f}")
+        logger.info("Calculated font scale factor: %.2f", scale_factor)
         
         return scale_factor
     
     @staticmethod
     def get_recommendations(
-        content_density: Dict[str, Any],
+        content_density: DensityMetrics,
         scale_factor: float
     ) -> List[str]:
         """
@@ -222,8 +233,8 @@ class TextMetrics:
         """
         recommendations = []
         
-        total_chars = content_density['total_chars']
-        overflow_risk = content_density['overflow_risk']
+        total_chars = content_density.total_chars
+        overflow_risk = content_density.overflow_risk
         
         # Scaling warnings
         if scale_factor < TextMetrics.SCALE_WARNING_THRESHOLD:
@@ -261,7 +272,7 @@ class TextMetrics:
     @staticmethod
     def log_scaling_analysis(
         slide_number: int,
-        content_density: Dict[str, Any],
+        content_density: DensityMetrics,
         scale_factor: float,
         template_type: str
     ):
@@ -279,11 +290,11 @@ class TextMetrics:
             extra={
                 'slide_number': slide_number,
                 'template_type': template_type,
-                'total_chars': content_density['total_chars'],
-                'text_blocks': content_density['text_blocks'],
-                'images': content_density['images'],
-                'density_score': content_density['density_score'],
-                'overflow_risk': content_density['overflow_risk'],
+                'total_chars': content_density.total_chars,
+                'text_blocks': content_density.text_blocks,
+                'images': content_density.images,
+                'density_score': content_density.density_score,
+                'overflow_risk': content_density.overflow_risk,
                 'scale_factor': scale_factor
             }
         )
@@ -292,8 +303,8 @@ class TextMetrics:
         if scale_factor < TextMetrics.SCALE_WARNING_THRESHOLD:
             logger.warning(
                 f"Slide {slide_number}: Font scaled down to {scale_factor:.0%} "
-                f"({content_density['total_chars']} chars, "
-                f"density: {content_density['density_score']:.2f})"
+                f"({content_density.total_chars} chars, "
+                f"density: {content_density.density_score:.2f})"
             )
         
         # Get and log recommendations
@@ -302,4 +313,3 @@ class TextMetrics:
             logger.info(f"Slide {slide_number} recommendations:")
             for i, rec in enumerate(recommendations, 1):
                 logger.info(f"  {i}. {rec}")
-
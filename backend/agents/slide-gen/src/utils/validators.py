@@ -3,10 +3,23 @@ Input validation utilities
 """
 
 import logging
-from typing import Dict, Any, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, FrozenSet, Mapping, Optional, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Suffix appended by InputValidator.truncate_text
+_ELLIPSIS = "..."
+_ELLIPSIS_LEN = len(_ELLIPSIS)
+
+
+def _hex_to_rgb(hex_color: str) -> Tuple[int, int, int]:
+    """Convert a '#rrggbb' color string to an (r, g, b) tuple"""
+    hex_color = hex_color.lstrip('#')
+    return int(hex_color[0:2], 16), int(hex_color[2:4], 16), int(hex_color[4:6], 16)
+
+
 
 class ColorScheme:
     """Color scheme definitions with background and text colors"""
@@ -50,8 +63,20 @@ class ColorScheme:
         }
     }
     
+    # Schemes with hex colors pre-parsed into (r, g, b) tuples
+    SCHEMES_RGB: Dict[str, Dict[str, Tuple[int, int, int]]] = {
+        name: {
+            key: _hex_to_rgb(value) for key, value in scheme.items() if value.startswith("#")
+        }
+        for name, scheme in SCHEMES.items()
+    }
+    
+    # Scheme names, computed once (ordered for display, frozen for membership)
+    _SCHEME_NAMES_TUPLE: Tuple[str, ...] = tuple(SCHEMES)
+    _SCHEME_NAMES: FrozenSet[str] = frozenset(SCHEMES)
+    
     @staticmethod
-    def get_scheme(scheme_name: str) -> Dict[str, str]:
+    def get_scheme(scheme_name: str) -> Mapping[str, str]:
         """
         Get color scheme by name
         
@@ -59,34 +84,122 @@ class ColorScheme:
             scheme_name: Name of the color scheme
             
         Returns:
-            Dictionary with color values
+            Read-only mapping with color values (shared between callers)
         """
-        return ColorScheme.SCHEMES.get(scheme_name, ColorScheme.SCHEMES["light_blue"])
+        return _resolve_scheme(scheme_name)
     
     @staticmethod
-    def get_available_schemes() -> list:
+    def get_scheme_rgb(scheme_name: str) -> Dict[str, Tuple[int, int, int]]:
         """
-        Get list of available color scheme names
+        Get color scheme by name with colors as (r, g, b) tuples
         
+        Args:
+            scheme_name: Name of the color scheme
+            
         Returns:
-            List of scheme names
+            Dictionary with RGB color values
         """
-        return list(ColorScheme.SCHEMES.keys())
+        return ColorScheme.SCHEMES_RGB.get(scheme_name, ColorScheme.SCHEMES_RGB["light_blue"])
+    
+    @staticmethod
+    def get_available_schemes() -> Tuple[str, ...]:
+        """
+        Get available color scheme names
+        
+        Returns:
+            Tuple of scheme names
+        """
+        return ColorScheme._SCHEME_NAMES_TUPLE
+
+
+@lru_cache(maxsize=16)
+def _resolve_scheme(scheme_name: str) -> Mapping[str, str]:
+    """
+    Resolve a color scheme name to a read-only view of its colors
+    
+    Args:
+        scheme_name: Name of the color scheme (unknown names fall back to light_blue)
+        
+    Returns:
+        Read-only mapping with color values
+    """
+    scheme = ColorScheme.SCHEMES.get(scheme_name, ColorScheme.SCHEMES["light_blue"])
+    return MappingProxyType(scheme)
 
 
 class InputValidator:
     """Validates input parameters for slide generation"""
     
-    VALID_ASPECT_RATIOS = ["16:9", "4:3", "16:10", "3:4"]
-    VALID_STYLES = ["professional", "creative", "minimal", "academic"]
-    VALID_CONTENT_RICHNESS = ["concise", "moderate", "detailed"]
-    VALID_COLOR_SCHEMES = ColorScheme.get_available_schemes()
+    # Ordered values (used in error messages)
+    VALID_ASPECT_RATIOS_ORDERED: Tuple[str, ...] = ("16:9", "4:3", "16:10", "3:4")
+    VALID_STYLES_ORDERED: Tuple[str, ...] = ("professional", "creative", "minimal", "academic")
+    VALID_CONTENT_RICHNESS_ORDERED: Tuple[str, ...] = ("concise", "moderate", "detailed")
+    VALID_COLOR_SCHEMES_ORDERED: Tuple[str, ...] = ColorScheme.get_available_schemes()
+    REQUIRED_PARAMS: Tuple[str, ...] = ("base_text", "num_slides", "aspect_ratio", "style", "content_richness")
+    
+    # Membership sets (used for validation)
+    VALID_ASPECT_RATIOS: FrozenSet[str] = frozenset(VALID_ASPECT_RATIOS_ORDERED)
+    VALID_STYLES: FrozenSet[str] = frozenset(VALID_STYLES_ORDERED)
+    VALID_CONTENT_RICHNESS: FrozenSet[str] = frozenset(VALID_CONTENT_RICHNESS_ORDERED)
+    VALID_COLOR_SCHEMES: FrozenSet[str] = ColorScheme._SCHEME_NAMES
+    _REQUIRED_PARAM_SET: FrozenSet[str] = frozenset(REQUIRED_PARAMS)
+    
+    # Parameters that affect validation (keys of the validation cache)
+    _VALIDATED_FIELDS: Tuple[str, ...] = (
+        "base_text", "num_slides", "aspect_ratio", "style", "content_richness", "color_scheme"
+    )
     
     @staticmethod
     def validate_parameters(params: Dict[str, Any]) -> tuple[bool, Optional[str]]:
         """
         Validate slide generation parameters
         
+        Results are cached per distinct set of validated values, so repeated
+        identical payloads are validated with a single dict lookup.
+        
+        Args:
+            params: Dictionary of input parameters
+            
+        Returns:
+            tuple: (is_valid, error_message)
+        """
+        try:
+            return _validate_parameters_cached(InputValidator._validation_key(params))
+        except TypeError:
+            # Unhashable parameter values cannot be cached
+            return InputValidator._validate_parameters_uncached(params)
+    
+    @staticmethod
+    def _validation_key(params: Dict[str, Any]) -> tuple:
+        """
+        Build a hashable cache key from the parameters that affect validation
+        
+        base_text only needs to be a non-empty string, so it is keyed on that
+        flag rather than the full text. Values are paired with their type so that
+        e.g. 1 and 1.0 (equal and hash-equal) do not share a result.
+        
+        Args:
+            params: Dictionary of input parameters
+            
+        Returns:
+            Tuple of (field, type, value) entries
+        """
+        key = []
+        for field in InputValidator._VALIDATED_FIELDS:
+            if field not in params:
+                continue
+            value = params[field]
+            if field == "base_text":
+                value = isinstance(value, str) and bool(value.strip())
+            key.append((field, type(value), value))
+        hash(tuple(key))  # Raise TypeError early for unhashable values
+        return tuple(key)
+    
+    @staticmethod
+    def _validate_parameters_uncached(params: Dict[str, Any]) -> tuple[bool, Optional[str]]:
+        """
+        Validate slide generation parameters without caching
+        
         Args:
             params: Dictionary of input parameters
             
@@ -94,10 +207,9 @@ class InputValidator:
             tuple: (is_valid, error_message)
         """
         # Check required parameters
-        required = ["base_text", "num_slides", "aspect_ratio", "style", "content_richness"]
-        for param in required:
-            if param not in params:
-                return False, f"Missing required parameter: {param}"
+        if not params.keys() >= InputValidator._REQUIRED_PARAM_SET:
+            missing = next(param for param in InputValidator.REQUIRED_PARAMS if param not in params)
+            return False, f"Missing required parameter: {missing}"
         
         # Validate base_text
         if not isinstance(params["base_text"], str) or not params["base_text"].strip():
@@ -113,11 +225,11 @@ class InputValidator:
         # Validate aspect_ratio
         aspect_ratio = params.get("aspect_ratio")
         logger.debug(f"Validating aspect ratio: {aspect_ratio}")
-        logger.debug(f"Available aspect ratios: {InputValidator.VALID_ASPECT_RATIOS}")
+        logger.debug(f"Available aspect ratios: {list(InputValidator.VALID_ASPECT_RATIOS_ORDERED)}")
         
         if aspect_ratio not in InputValidator.VALID_ASPECT_RATIOS:
-            logger.warning(f"Invalid aspect ratio '{aspect_ratio}' provided. Must be one of {InputValidator.VALID_ASPECT_RATIOS}")
-            return False, f"aspect_ratio must be one of {InputValidator.VALID_ASPECT_RATIOS}"
+            logger.warning(f"Invalid aspect ratio '{aspect_ratio}' provided. Must be one of {list(InputValidator.VALID_ASPECT_RATIOS_ORDERED)}")
+            return False, f"aspect_ratio must be one of {list(InputValidator.VALID_ASPECT_RATIOS_ORDERED)}"
         
         logger.debug(f"Aspect ratio '{aspect_ratio}' validated successfully")
         if aspect_ratio == "3:4":
@@ -125,16 +237,16 @@ class InputValidator:
         
         # Validate style
         if params["style"] not in InputValidator.VALID_STYLES:
-            return False, f"style must be one of {InputValidator.VALID_STYLES}"
+            return False, f"style must be one of {list(InputValidator.VALID_STYLES_ORDERED)}"
         
         # Validate content_richness
         if params["content_richness"] not in InputValidator.VALID_CONTENT_RICHNESS:
-            return False, f"content_richness must be one of {InputValidator.VALID_CONTENT_RICHNESS}"
+            return False, f"content_richness must be one of {list(InputValidator.VALID_CONTENT_RICHNESS_ORDERED)}"
         
         # Validate color_scheme (optional parameter)
         if "color_scheme" in params and params["color_scheme"]:
             if params["color_scheme"] not in InputValidator.VALID_COLOR_SCHEMES:
-                return False, f"color_scheme must be one of {InputValidator.VALID_COLOR_SCHEMES}"
+                return False, f"color_scheme must be one of {list(InputValidator.VALID_COLOR_SCHEMES_ORDERED)}"
         
         return True, None
     
@@ -169,6 +281,22 @@ class InputValidator:
         """
         if len(text) <= max_length:
             return text
-        return text[:max_length - 3] + "..."
+        return text[:max_length - _ELLIPSIS_LEN] + _ELLIPSIS
 
 
+@lru_cache(maxsize=256)
+def _validate_parameters_cached(key: tuple) -> tuple[bool, Optional[str]]:
+    """
+    Validate parameters reconstructed from a validation cache key
+    
+    Args:
+        key: Key built by InputValidator._validation_key
+        
+    Returns:
+        tuple: (is_valid, error_message)
+    """
+    params = {field: value for field, _, value in key}
+    if "base_text" in params:
+        # Stand-in text with the same validity as the original
+        params["base_text"] = "text" if params["base_text"] else ""
+    return InputValidator._validate_parameters_uncached(params)
@@ -0,0 +1,82 @@
+"""
+Tests for TaskPoller's fallback from the batch status endpoint
+"""
+
+import sys
+import unittest
+from pathlib import Path
+
+# Make the slide-gen root importable as in main.py
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.image.poller import TaskPoller
+
+
+class FakeResponse:
+    """Minimal stand-in for requests.Response"""
+
+    def __init__(self, body, status_code=200):
+        self.body = body
+        self.status_code = status_code
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise RuntimeError(f"HTTP {self.status_code}")
+
+    def json(self):
+        return self.body
+
+
+class FakeSession:
+    """Session serving one response per URL path and recording requested paths"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requested = []
+
+    def get(self, url, params=None, timeout=None):
+        path = url.replace("http://api", "")
+        self.requested.append(path)
+        return self.responses[path]
+
+
+TASK_RESPONSE = FakeResponse({"code": 200, "message": "success", "data": {"status": "processing"}})
+
+
+class TestBatchFallback(unittest.TestCase):
+    """Servers without /api/tasks must be polled per task, not marked failed"""
+
+    def _fetch(self, batch_response):
+        session = FakeSession({"/api/tasks": batch_response, "/api/task/t1": TASK_RESPONSE})
+        poller = TaskPoller(session, "http://api")
+        statuses = poller._fetch_statuses(["t1"])
+        return poller, session, statuses
+
+    def test_http_404_falls_back(self):
+        poller, session, statuses = self._fetch(FakeResponse({}, status_code=404))
+        self.assertFalse(poller._batch_supported)
+        self.assertEqual(statuses, {"t1": {"status": "processing"}})
+
+    def test_body_code_404_falls_back(self):
+        # create_error_response answers unknown routes with HTTP 200 and the code in the body
+        body = {"code": 404, "message": "接口不存在", "data": {}}
+        poller, session, statuses = self._fetch(FakeResponse(body))
+        self.assertFalse(poller._batch_supported)
+        self.assertEqual(session.requested, ["/api/tasks", "/api/task/t1"])
+        self.assertEqual(statuses, {"t1": {"status": "processing"}})
+
+    def test_missing_data_falls_back(self):
+        poller, session, statuses = self._fetch(FakeResponse({"code": 200}))
+        self.assertFalse(poller._batch_supported)
+        self.assertEqual(statuses, {"t1": {"status": "processing"}})
+
+    def test_batch_endpoint_used_when_supported(self):
+        body = {"code": 200, "message": "success", "data": {"tasks": {"t1": {"status": "completed"}}}}
+        poller, session, statuses = self._fetch(FakeResponse(body))
+        self.assertTrue(poller._batch_supported)
+        self.assertEqual(session.requested, ["/api/tasks"])
+        self.assertEqual(statuses, {"t1": {"status": "completed"}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -2,15 +2,18 @@
 Flask主应用
 提供图像生成API服务
 """
+import atexit
+import json
 import logging
+import logging.handlers
 import queue
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, Response, request, jsonify, send_file, stream_with_context
 from flask_cors import CORS
 from pathlib import Path
 import config
-from model_manager import ModelManager
+from model_manager import ModelManager, get_model_manager
 from task_queue import TaskQueueManager, TaskStatus
-from slide_generator import get_slide_generator
+from slide_generator import get_slide_generator, start_pdf_workers
 from slide_task_queue import SlideTaskQueueManager, SlideTaskStatus
 
 # 配置日志
@@ -176,16 +179,50 @@ def get_task_status(task_id: str):
         if not task:
             return create_error_response(404, "任务不存在")
         
-        # 更新队列位置
-        task_queue_manager.update_queue_positions()
-        
-        return create_response(data=task.to_dict())
+        # 状态和队列位置不变时响应内容不变；客户端携带相同ETag轮询时直接返回304，省去序列化和传输
+        etag = f"{task.status.value}-{task.queue_position}"
+        if request.if_none_match.contains_weak(etag):
+            response = Response(status=304)
+        else:
+            response = create_response(data=task.to_dict())
+        response.set_etag(etag, weak=True)
+        return response
         
     except Exception as e:
         logger.error(f"查询任务状态失败: {e}", exc_info=True)
         return create_error_response(500, f"服务器内部错误: {str(e)}")
 
 
+@app.route('/api/tasks', methods=['GET'])
+def get_tasks_status():
+    """
+    批量查询任务状态
+    
+    Query参数:
+        ids: 逗号分隔的任务ID列表（最多100个）
+        
+    Returns:
+        JSON: {"tasks": {task_id: 任务状态信息或null}}
+    """
+    try:
+        task_ids = [task_id for task_id in request.args.get('ids', '').split(',') if task_id]
+        if not task_ids:
+            return create_error_response(400, "缺少ids参数")
+        if len(task_ids) > 100:
+            return create_error_response(400, "单次最多查询100个任务")
+        
+        tasks = {}
+        for task_id in task_ids:
+            task = task_queue_manager.get_task(task_id)
+            tasks[task_id] = task.to_dict() if task else None
+        
+        return create_response(data={"tasks": tasks})
+        
+    except Exception as e:
+        logger.error(f"批量查询任务状态失败: {e}", exc_info=True)
+        return create_error_response(500, f"服务器内部错误: {str(e)}")
+
+
 @app.route('/api/result/<task_id>', methods=['GET'])
 def get_task_result(task_id: str):
     """
@@ -380,9 +417,6 @@ def get_slide_task_status(task_id: str):
         if not task:
             return create_error_response(404, "任务不存在")
         
-        # 更新队列位置
-        slide_task_queue_manager.update_queue_positions()
-        
         logger.debug(f"查询Slide任务状态: {task_id} - {task.status.value}")
         
         return create_response(data=task.to_dict())
@@ -516,25 +550,19 @@ def get_slide_image(task_id: str, slide_number: int):
         if not task:
             return create_error_response(404, "任务不存在")
         
-        # 如果任务未完成
-        if task.status != SlideTaskStatus.COMPLETED:
+        # 任务处理中时，已导出的幻灯片可提前获取（见 /api/slide/stream）
+        if task.status == SlideTaskStatus.COMPLETED:
+            # 验证幻灯片编号
+            if slide_number < 1 or slide_number > task.num_slides:
+                return create_error_response(400, f"幻灯片编号必须在1-{task.num_slides}之间")
+        elif task.status != SlideTaskStatus.PROCESSING or slide_number not in task.slide_images:
             return create_error_response(400, "任务尚未完成")
         
-        # 验证幻灯片编号
-        if slide_number < 1 or slide_number > task.slides_generated:
-            return create_error_response(400, f"幻灯片编号必须在1-{task.slides_generated}之间")
-        
-        # 查找对应的图片文件
-        if not task.slide_image_paths:
-            return create_error_response(404, "幻灯片图片不存在")
-        
-        # 幻灯片编号从1开始，数组索引从0开始
-        image_index = slide_number - 1
-        
-        if image_index >= len(task.slide_image_paths):
+        # 按幻灯片编号查找图片，部分幻灯片导出失败时编号与列表位置不一致
+        image_path = task.slide_images.get(slide_number)
+        if image_path is None:
             return create_error_response(404, f"幻灯片 {slide_number} 的图片不存在")
-        
-        image_path = Path(task.slide_image_paths[image_index])
+        image_path = Path(image_path)
         
         if not image_path.exists():
             logger.warning(f"幻灯片图片文件不存在: {image_path}")
@@ -554,6 +582,38 @@ def get_slide_image(task_id: str, slide_number: int):
         return create_error_response(500, f"服务器内部错误: {str(e)}")
 
 
+@app.route('/api/slide/stream/<task_id>', methods=['GET'])
+def stream_slide_task(task_id: str):
+    """
+    以Server-Sent Events流式推送Slide任务进度
+    
+    每张幻灯片图片导出后立即推送slide事件，客户端可随即通过
+    /api/slide/result/<task_id>/image/<slide_number> 获取图片，
+    任务结束时推送completed或failed事件后关闭连接。
+    
+    Args:
+        task_id: 任务ID
+        
+    Returns:
+        text/event-stream响应
+    """
+    if not slide_task_queue_manager or not slide_task_queue_manager.get_task(task_id):
+        return create_error_response(404, "任务不存在")
+    
+    def event_stream():
+        for event in slide_task_queue_manager.iter_slide_events(task_id):
+            if event["event"] == "slide":
+                event["image_url"] = f"/api/slide/result/{task_id}/image/{event['slide_number']}"
+            yield f"event: {event['event']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+    
+    logger.debug(f"开始推送Slide任务进度: {task_id}")
+    return Response(
+        stream_with_context(event_stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/slide/status', methods=['GET'])
 def get_slide_system_status():
     """
@@ -595,14 +655,37 @@ def internal_error(error):
     return create_error_response(500, "服务器内部错误")
 
 
+def _start_log_listener():
+    """
+    将根日志器的处理器移到后台监听线程
+    
+    记录日志的线程只把记录放入队列，控制台/文件写出（系统调用及处理器锁）由监听线程完成；
+    消息与异常堆栈的格式化仍在记录日志的线程中进行（QueueHandler.prepare）。
+    在应用启动时调用，而非模块导入时，之后fork出的子进程需自行恢复日志处理器。
+    """
+    log_queue = queue.SimpleQueue()
+    root_logger = logging.getLogger()
+    listener = logging.handlers.QueueListener(
+        log_queue, *root_logger.handlers, respect_handler_level=True
+    )
+    root_logger.handlers = [logging.handlers.QueueHandler(log_queue)]
+    listener.start()
+    atexit.register(listener.stop)
+
+
 def initialize_app():
     """初始化应用"""
     global model_manager, task_queue_manager, slide_generator, slide_task_queue_manager
     
+    # PDF导出进程池通过fork创建，须在启动日志监听线程、worker线程和加载模型之前启动
+    if config.ENABLE_SLIDE_GENERATION and start_pdf_workers():
+        logger.info("✓ PDF导出进程池已启动")
+    
+    _start_log_listener()
     logger.info("开始初始化应用...")
     
     # 初始化模型管理器
-    model_manager = ModelManager()
+    model_manager = get_model_manager()
     if not model_manager.load_model():
         logger.error("模型加载失败，应用无法正常启动")
         raise RuntimeError("模型加载失败")
@@ -631,7 +714,10 @@ def initialize_app():
                 # 初始化Slide任务队列管理器
                 slide_task_queue_manager = SlideTaskQueueManager(
                     slide_generator,
-                    max_queue_size=config.SLIDE_MAX_QUEUE_SIZE
+                    max_queue_size=config.SLIDE_MAX_QUEUE_SIZE,
+                    max_finished_tasks=config.SLIDE_MAX_FINISHED_TASKS,
+                    retention_hours=config.TASK_RETENTION_HOURS,
+                    worker_cpus=config.SLIDE_WORKER_CPUS
                 )
                 logger.info("✓ Slide生成服务初始化成功")
             else:
@@ -0,0 +1,305 @@
+"""
+任务队列管理基础模块
+图像任务队列与Slide任务队列共用的排队、状态计数、位置计算和worker线程逻辑
+"""
+import logging
+import os
+import queue
+import threading
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# worker处理完任务后，按此间隔（秒）清理超过保留时间的已结束任务
+_CLEANUP_INTERVAL = 600
+
+
+class TaskStatus(Enum):
+    """任务状态枚举"""
+    PENDING = "pending"  # 排队中
+    PROCESSING = "processing"  # 生成中
+    COMPLETED = "completed"  # 已完成
+    FAILED = "failed"  # 失败
+
+
+class BaseTaskQueueManager:
+    """
+    任务队列管理器基类
+    
+    子类实现_process处理单个出队的任务。任务对象需提供task_id、status、
+    queue_position属性及update_status(status, error_message)方法。
+    """
+    
+    # worker线程名称，同时用于日志
+    worker_name = "TaskWorker"
+    
+    def __init__(
+        self,
+        max_queue_size: int,
+        max_finished_tasks: int,
+        retention_hours: int,
+        worker_cpus: Optional[Iterable[int]] = None
+    ):
+        """
+        初始化任务队列管理器
+        
+        Args:
+            max_queue_size: 最大排队任务数（0表示不限制）
+            max_finished_tasks: 保留的已结束任务记录上限
+            retention_hours: 已结束任务的最长保留时间（小时）
+            worker_cpus: worker线程绑定的CPU编号，为空表示不绑定
+        """
+        self.max_queue_size = max_queue_size
+        self.max_finished_tasks = max_finished_tasks
+        self.retention_hours = retention_hours
+        self.worker_cpus = set(worker_cpus or ())
+        
+        # SimpleQueue由C实现，put/get不经过Python层的锁和条件变量；
+        # 队列长度上限在提交时按排队中任务数检查
+        self.task_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self.tasks: Dict[str, Any] = {}
+        self.lock = threading.RLock()
+        # 各状态的任务数，随状态变化增减，查询队列状态时无需遍历全部任务
+        self._status_counts: Dict[TaskStatus, int] = {status: 0 for status in TaskStatus}
+        # 计数变化时整体替换的只读快照，查询队列状态时按引用读取，无需加锁
+        self._status_view: Dict[str, int] = {}
+        self._publish_status()
+        # 排队中任务ID，按提交顺序排列，用于计算队列位置而无需遍历全部任务
+        self._pending_order: Deque[str] = deque()
+        # 排队任务有增减时置位，读取任务时才重新计算队列位置
+        self._positions_dirty = False
+        # 已结束任务的(结束时刻monotonic_ns, 任务ID)，按结束顺序排列，
+        # 用于限制保留的任务记录数量及按整数比较清理过期任务
+        self._finished_order: Deque[Tuple[int, str]] = deque()
+        self._last_cleanup = time.monotonic()
+        
+        self.worker_thread: Optional[threading.Thread] = None
+        self.is_running = False
+    
+    def start_worker(self):
+        """启动worker线程"""
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            logger.warning(f"{self.worker_name}线程已在运行")
+            return
+        
+        self.is_running = True
+        self.worker_thread = threading.Thread(
+            target=self._worker_loop,
+            daemon=True,
+            name=self.worker_name
+        )
+        self.worker_thread.start()
+        logger.info(f"✓ {self.worker_name}线程已启动")
+    
+    def stop_worker(self):
+        """停止worker线程"""
+        self.is_running = False
+        if self.worker_thread is not None and self.worker_thread.is_alive():
+            # 放入哨兵唤醒阻塞在队列上的worker
+            self.task_queue.put(None)
+            self.worker_thread.join(timeout=5)
+        logger.info(f"{self.worker_name}线程已停止")
+    
+    def _worker_loop(self):
+        """Worker线程主循环"""
+        logger.info(f"{self.worker_name}线程开始运行")
+        self._pin_worker()
+        
+        while self.is_running:
+            try:
+                # 阻塞等待任务，stop_worker放入的None哨兵使其退出
+                task = self._next_task()
+                if task is None:
+                    break
+                
+                self._process(task)
+                
+                # 顺带清理过期任务，无需单独的定时线程
+                if time.monotonic() - self._last_cleanup >= _CLEANUP_INTERVAL:
+                    self._last_cleanup = time.monotonic()
+                    self.cleanup_old_tasks(self.retention_hours)
+            
+            except Exception as e:
+                logger.error(f"{self.worker_name}线程处理任务时出错: {e}", exc_info=True)
+        
+        logger.info(f"{self.worker_name}线程已退出")
+    
+    def _pin_worker(self):
+        """将当前worker线程绑定到指定CPU，减少线程在核间迁移造成的缓存失效"""
+        if not self.worker_cpus:
+            return
+        try:
+            # Linux上pid 0表示调用线程本身，不影响进程内其他线程
+            os.sched_setaffinity(0, self.worker_cpus)
+            logger.info(f"{self.worker_name}线程已绑定CPU: {sorted(self.worker_cpus)}")
+        except (AttributeError, OSError) as e:
+            logger.warning(f"{self.worker_name}线程绑定CPU失败，继续运行: {e}")
+    
+    def _next_task(self):
+        """
+        取出下一个待处理的任务（阻塞）
+        
+        Returns:
+            任务对象，收到停止哨兵时返回None
+        """
+        return self.task_queue.get()
+    
+    def _process(self, task):
+        """
+        处理一个出队的任务，由子类实现
+        
+        Args:
+            task: 任务对象
+        """
+        raise NotImplementedError
+    
+    def _enqueue(self, task):
+        """
+        登记新任务并放入队列
+        
+        Args:
+            task: 状态为PENDING的任务对象
+        
+        Raises:
+            queue.Full: 如果队列已满
+        """
+        with self.lock:
+            if 0 < self.max_queue_size <= len(self._pending_order):
+                logger.warning(f"任务队列已满，拒绝任务: {task.task_id}")
+                raise queue.Full("任务队列已满，请稍后重试")
+            self.tasks[task.task_id] = task
+            self._status_counts[TaskStatus.PENDING] += 1
+            self._pending_order.append(task.task_id)
+            self._positions_dirty = True
+            self._publish_status()
+        
+        self.task_queue.put(task)
+    
+    def _transition(self, task, status: TaskStatus, error_message: Optional[str] = None):
+        """
+        更新任务状态并同步各状态的任务计数
+        
+        Args:
+            task: 任务对象
+            status: 新状态
+            error_message: 错误信息（如果状态为FAILED）
+        """
+        with self.lock:
+            tracked = task.task_id in self.tasks
+            finished_before = task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED)
+            if tracked:
+                self._status_counts[task.status] -= 1
+                self._status_counts[status] += 1
+                if task.status == TaskStatus.PENDING and status != TaskStatus.PENDING:
+                    # 队列先进先出，离开排队的任务通常位于队首
+                    try:
+                        self._pending_order.remove(task.task_id)
+                    except ValueError:
+                        pass
+                    task.queue_position = 0
+                    self._positions_dirty = True
+            task.update_status(status, error_message=error_message)
+            
+            if tracked and not finished_before and status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                self._finished_order.append((time.monotonic_ns(), task.task_id))
+                # 超出保留数量时移除最早结束的任务
+                while len(self._finished_order) > self.max_finished_tasks:
+                    self._forget(self._finished_order.popleft()[1])
+            
+            if tracked:
+                self._publish_status()
+    
+    def _publish_status(self):
+        """
+        根据当前计数生成新的状态快照并替换引用（调用方需持有lock）
+        
+        快照生成后不再修改，属性赋值在GIL下是原子的，读取方总能拿到完整的一份
+        """
+        counts = self._status_counts
+        self._status_view = {
+            "pending_tasks": counts[TaskStatus.PENDING],
+            "processing_tasks": counts[TaskStatus.PROCESSING],
+            "completed_tasks": counts[TaskStatus.COMPLETED],
+            "failed_tasks": counts[TaskStatus.FAILED],
+            "total_tasks": len(self.tasks),
+        }
+    
+    def _forget(self, task_id: str):
+        """
+        移除已结束任务的记录（调用方需持有lock）
+        
+        Args:
+            task_id: 任务ID
+        """
+        task = self.tasks.pop(task_id, None)
+        if task is not None:
+            self._status_counts[task.status] -= 1
+    
+    def update_queue_positions(self):
+        """更新所有待处理任务的队列位置（排队任务无变化时直接返回）"""
+        with self.lock:
+            if not self._positions_dirty:
+                return
+            self._positions_dirty = False
+            
+            # 队列位置从1开始；离开排队的任务在状态变化时已置为0
+            for position, task_id in enumerate(self._pending_order, start=1):
+                self.tasks[task_id].queue_position = position
+    
+    def get_task(self, task_id: str):
+        """
+        获取任务信息
+        
+        Args:
+            task_id: 任务ID
+        
+        Returns:
+            任务对象，如果不存在返回None
+        """
+        # 已结束的任务不再变化，字典读取在GIL下是原子的，无需加锁
+        task = self.tasks.get(task_id)
+        if task is not None and task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+            return task
+        
+        with self.lock:
+            # 队列位置在读取时按需更新
+            self.update_queue_positions()
+            return self.tasks.get(task_id)
+    
+    def get_queue_status(self) -> Dict[str, Any]:
+        """
+        获取队列状态信息
+        
+        Returns:
+            dict: 队列状态字典
+        """
+        return {
+            "queue_size": self.task_queue.qsize(),
+            "max_queue_size": self.max_queue_size,
+            **self._status_view,
+        }
+    
+    def cleanup_old_tasks(self, max_age_hours: int = 24):
+        """
+        清理超过保留时间的已结束任务（worker定期调用，防止内存泄漏）
+        
+        Args:
+            max_age_hours: 最大保留时间（小时）
+        """
+        # 使用单调时钟，系统时间调整不会导致误删或漏删
+        cutoff_ns = time.monotonic_ns() - max_age_hours * 3_600_000_000_000
+        with self.lock:
+            # 已结束任务按结束时间排列，从最早的开始移除，遇到未过期的即停止
+            removed = 0
+            while self._finished_order and self._finished_order[0][0] < cutoff_ns:
+                task_id = self._finished_order.popleft()[1]
+                if task_id in self.tasks:
+                    self._forget(task_id)
+                    removed += 1
+            
+            if removed:
+                self._publish_status()
+                logger.info(f"清理了 {removed} 个旧任务")
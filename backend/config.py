@@ -17,42 +17,62 @@ if env_path.exists():
 else:
     print(f"⚠ 未找到.env文件: {env_path}，将使用环境变量或默认值")
 
+# 环境变量快照（在加载.env之后获取），后续配置项从普通dict读取，避免逐项访问os.environ
+_ENV = dict(os.environ)
+
 # GPU配置
-GPU_DEVICE_ID = int(os.getenv("GPU_DEVICE_ID", "0"))
-CUDA_AVAILABLE = os.getenv("CUDA_AVAILABLE", "true").lower() == "true"
+GPU_DEVICE_ID = int(_ENV.get("GPU_DEVICE_ID", "0"))
+CUDA_AVAILABLE = _ENV.get("CUDA_AVAILABLE", "true").lower() == "true"
 
 # 模型配置
-MODEL_NAME = os.getenv("MODEL_NAME", "Tongyi-MAI/Z-Image-Turbo")
-MODEL_TORCH_DTYPE = os.getenv("MODEL_TORCH_DTYPE", "bfloat16")  # float16, bfloat16, float32
-LOW_CPU_MEM_USAGE = os.getenv("LOW_CPU_MEM_USAGE", "false").lower() == "true"
+MODEL_NAME = _ENV.get("MODEL_NAME", "Tongyi-MAI/Z-Image-Turbo")
+MODEL_TORCH_DTYPE = _ENV.get("MODEL_TORCH_DTYPE", "bfloat16")  # float16, bfloat16, float32
+LOW_CPU_MEM_USAGE = _ENV.get("LOW_CPU_MEM_USAGE", "false").lower() == "true"
 
 # 模型优化选项
-ENABLE_FLASH_ATTENTION = os.getenv("ENABLE_FLASH_ATTENTION", "true").lower() == "true"
-FLASH_ATTENTION_BACKEND = os.getenv("FLASH_ATTENTION_BACKEND", "flash")  # flash, _flash_3
-ENABLE_MODEL_COMPILE = os.getenv("ENABLE_MODEL_COMPILE", "false").lower() == "true"
-ENABLE_CPU_OFFLOAD = os.getenv("ENABLE_CPU_OFFLOAD", "false").lower() == "true"
+ENABLE_FLASH_ATTENTION = _ENV.get("ENABLE_FLASH_ATTENTION", "true").lower() == "true"
+FLASH_ATTENTION_BACKEND = _ENV.get("FLASH_ATTENTION_BACKEND", "flash")  # flash, _flash_3
+ENABLE_MODEL_COMPILE = _ENV.get("ENABLE_MODEL_COMPILE", "false").lower() == "true"
+# 启用模型编译时预热的分辨率列表（宽x高），为每个尺寸预先编译，避免首个真实请求触发重新编译
+COMPILE_WARMUP_SHAPES = [
+    tuple(int(v) for v in shape.lower().split("x"))
+    for shape in _ENV.get("COMPILE_WARMUP_SHAPES", "1024x1024,1280x720,1024x768,1280x800").split(",")
+    if shape.strip()
+]
+ENABLE_CPU_OFFLOAD = _ENV.get("ENABLE_CPU_OFFLOAD", "false").lower() == "true"
+ENABLE_CUDA_GRAPH = _ENV.get("ENABLE_CUDA_GRAPH", "false").lower() == "true"  # 以CUDA Graph重放DiT前向（隐含启用模型编译）
+ENABLE_CHANNELS_LAST = _ENV.get("ENABLE_CHANNELS_LAST", "true").lower() == "true"  # transformer/VAE使用channels_last内存布局
+MODEL_QUANT = _ENV.get("MODEL_QUANT", "none").lower()  # none, fp8, int8（需要安装torchao）
 
 # 图像输出配置
-OUTPUT_DIR = Path(os.getenv("OUTPUT_DIR", BASE_DIR / "outputs"))
+OUTPUT_DIR = Path(_ENV.get("OUTPUT_DIR", BASE_DIR / "outputs"))
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
 # 任务队列配置
-MAX_QUEUE_SIZE = int(os.getenv("MAX_QUEUE_SIZE", "100"))
-TASK_TIMEOUT = int(os.getenv("TASK_TIMEOUT", "300"))  # 秒
+MAX_QUEUE_SIZE = int(_ENV.get("MAX_QUEUE_SIZE", "100"))
+TASK_TIMEOUT = int(_ENV.get("TASK_TIMEOUT", "300"))  # 秒
+MAX_FINISHED_TASKS = int(_ENV.get("MAX_FINISHED_TASKS", "500"))  # 保留的已结束任务记录上限，超出时移除最早结束的任务
+TASK_RETENTION_HOURS = int(_ENV.get("TASK_RETENTION_HOURS", "24"))  # 已结束任务记录的最长保留时间（小时）
+IMAGE_BATCH_SIZE = int(_ENV.get("IMAGE_BATCH_SIZE", "4"))  # 单次推理合并的最大任务数（1表示不合并）
+IMAGE_BATCH_WINDOW_MS = int(_ENV.get("IMAGE_BATCH_WINDOW_MS", "20"))  # 等待凑批的最长时间（毫秒）
+IMAGE_SAVE_WORKERS = int(_ENV.get("IMAGE_SAVE_WORKERS", "2"))  # 后台保存图像的线程数，与下一次推理重叠（0表示在worker线程内保存）
+BATCH_VRAM_PER_MEGAPIXEL_GB = float(_ENV.get("BATCH_VRAM_PER_MEGAPIXEL_GB", "2.5"))  # 批量推理时每百万像素单张图像预估占用的显存（GB）
+# 图像worker线程绑定的CPU编号（逗号分隔，如"0,1"），为空表示不绑定；多路NUMA服务器建议绑定到GPU所在插槽的CPU（仅Linux）
+IMAGE_WORKER_CPUS = [int(cpu) for cpu in _ENV.get("IMAGE_WORKER_CPUS", "").split(",") if cpu.strip()]
 
 # Flask服务配置
-HOST = os.getenv("HOST", "0.0.0.0")
-PORT = int(os.getenv("PORT", "5000"))
-DEBUG = os.getenv("DEBUG", "false").lower() == "true"
+HOST = _ENV.get("HOST", "0.0.0.0")
+PORT = int(_ENV.get("PORT", "5000"))
+DEBUG = _ENV.get("DEBUG", "false").lower() == "true"
 
 # 默认生成参数
-DEFAULT_HEIGHT = int(os.getenv("DEFAULT_HEIGHT", "1024"))
-DEFAULT_WIDTH = int(os.getenv("DEFAULT_WIDTH", "1024"))
-DEFAULT_NUM_INFERENCE_STEPS = int(os.getenv("DEFAULT_NUM_INFERENCE_STEPS", "9"))
-DEFAULT_GUIDANCE_SCALE = float(os.getenv("DEFAULT_GUIDANCE_SCALE", "0.0"))
+DEFAULT_HEIGHT = int(_ENV.get("DEFAULT_HEIGHT", "1024"))
+DEFAULT_WIDTH = int(_ENV.get("DEFAULT_WIDTH", "1024"))
+DEFAULT_NUM_INFERENCE_STEPS = int(_ENV.get("DEFAULT_NUM_INFERENCE_STEPS", "9"))
+DEFAULT_GUIDANCE_SCALE = float(_ENV.get("DEFAULT_GUIDANCE_SCALE", "0.0"))
 
 # 日志配置
-LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVEL = _ENV.get("LOG_LEVEL", "INFO")
 LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 
 # ========================================
@@ -62,25 +82,35 @@ LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 # 请通过环境变量设置或直接修改默认值
 
 # 基础配置
-SLIDE_MAX_QUEUE_SIZE = int(os.getenv("SLIDE_MAX_QUEUE_SIZE", "50"))
-SLIDE_OUTPUT_DIR = Path(os.getenv("SLIDE_OUTPUT_DIR", BASE_DIR / "slide-gen" / "output"))
-ENABLE_SLIDE_GENERATION = os.getenv("ENABLE_SLIDE_GENERATION", "true").lower() == "true"
+SLIDE_MAX_QUEUE_SIZE = int(_ENV.get("SLIDE_MAX_QUEUE_SIZE", "50"))
+SLIDE_MAX_FINISHED_TASKS = int(_ENV.get("SLIDE_MAX_FINISHED_TASKS", "200"))  # 保留的已结束Slide任务记录上限
+SLIDE_WORKER_CPUS = [int(cpu) for cpu in _ENV.get("SLIDE_WORKER_CPUS", "").split(",") if cpu.strip()]  # Slide worker线程绑定的CPU编号，为空表示不绑定
+SLIDE_OUTPUT_DIR = Path(_ENV.get("SLIDE_OUTPUT_DIR", BASE_DIR / "slide-gen" / "output"))
+SLIDE_OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+ENABLE_SLIDE_GENERATION = _ENV.get("ENABLE_SLIDE_GENERATION", "true").lower() == "true"
 
 # LLM配置（用于生成幻灯片内容）
 # 必需：SLIDE_LLM_API_KEY - LLM服务的API密钥（如OpenAI API Key）
-SLIDE_LLM_API_KEY = os.getenv("SLIDE_LLM_API_KEY", "")
-SLIDE_LLM_API_URL = os.getenv("SLIDE_LLM_API_URL", "https://api.openai.com/v1/chat/completions")
-SLIDE_LLM_MODEL = os.getenv("SLIDE_LLM_MODEL", "gpt-4")
+SLIDE_LLM_API_KEY = _ENV.get("SLIDE_LLM_API_KEY", "")
+SLIDE_LLM_API_URL = _ENV.get("SLIDE_LLM_API_URL", "https://api.openai.com/v1/chat/completions")
+SLIDE_LLM_MODEL = _ENV.get("SLIDE_LLM_MODEL", "gpt-4")
+SLIDE_LLM_CONTEXT_WINDOW = int(_ENV.get("SLIDE_LLM_CONTEXT_WINDOW", "0"))  # 模型上下文长度（token），设置后按提示词长度收紧max_tokens，0表示不限制
 
 # 图像生成配置（用于生成幻灯片中的图片）
 # 必需：SLIDE_IMAGE_API_KEY - 图像生成服务的API密钥
 # 必需：SLIDE_IMAGE_API_URL - 图像生成服务的API地址
 # 注意：如果使用本地服务，设置为 http://localhost:5000 或保持空字符串使用internal bridge
-SLIDE_IMAGE_API_KEY = os.getenv("SLIDE_IMAGE_API_KEY", "dummy-key-for-internal-bridge")
-SLIDE_IMAGE_API_URL = os.getenv("SLIDE_IMAGE_API_URL", "http://localhost:5000")
-SLIDE_IMAGE_MODEL = os.getenv("SLIDE_IMAGE_MODEL", "stable-diffusion-xl")
+SLIDE_IMAGE_API_KEY = _ENV.get("SLIDE_IMAGE_API_KEY", "dummy-key-for-internal-bridge")
+SLIDE_IMAGE_API_URL = _ENV.get("SLIDE_IMAGE_API_URL", "http://localhost:5000")
+SLIDE_IMAGE_MODEL = _ENV.get("SLIDE_IMAGE_MODEL", "stable-diffusion-xl")
 
 # 其他设置
-SLIDE_DEFAULT_TIMEOUT = int(os.getenv("SLIDE_DEFAULT_TIMEOUT", "60"))  # API请求超时时间（秒）
-SLIDE_MAX_RETRIES = int(os.getenv("SLIDE_MAX_RETRIES", "3"))  # API请求重试次数
+SLIDE_DEFAULT_TIMEOUT = int(_ENV.get("SLIDE_DEFAULT_TIMEOUT", "60"))  # API请求超时时间（秒）
+SLIDE_MAX_RETRIES = int(_ENV.get("SLIDE_MAX_RETRIES", "3"))  # API请求重试次数
+SLIDE_LLM_BATCH_SIZE = int(_ENV.get("SLIDE_LLM_BATCH_SIZE", "1"))  # 单次LLM请求生成的幻灯片布局数量（1表示逐页请求，大于1时需设置SLIDE_LLM_CONTEXT_WINDOW）
+SLIDE_IMAGE_CONCURRENCY = int(_ENV.get("SLIDE_IMAGE_CONCURRENCY", "4"))  # 单张幻灯片内并发生成图片的最大数量
+SLIDE_CONCURRENCY = int(_ENV.get("SLIDE_CONCURRENCY", "2"))  # 同时生成图片的幻灯片数量（当前页+已获得布局的后续页）
+SLIDE_IMAGE_CACHE_MAX_GB = float(_ENV.get("SLIDE_IMAGE_CACHE_MAX_GB", "2"))  # 图片缓存容量上限（GB），0表示禁用缓存
+SLIDE_PDF_WORKERS = int(_ENV.get("SLIDE_PDF_WORKERS", "1"))  # 合成PDF的后台进程数，0表示在当前线程中合成
+SLIDE_PDF_RENDER_WORKERS = int(_ENV.get("SLIDE_PDF_RENDER_WORKERS", "4"))  # 导出PDF时并行渲染单页的进程数，1表示逐页渲染
 
@@ -8,6 +8,7 @@ on the same Flask server.
 使用注册模式避免循环导入和重复加载模型的问题。
 """
 import logging
+import threading
 import time
 from typing import Optional, Tuple, Dict, Any
 from pathlib import Path
@@ -27,10 +28,32 @@ class InternalImageBridge:
     避免在这里import app导致循环依赖和重复初始化。
     """
     
+    _instance: Optional["InternalImageBridge"] = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def get_instance(cls) -> "InternalImageBridge":
+        """
+        Get the process-wide bridge instance, creating it on first use.
+        
+        Uses double-checked locking so concurrent first calls from Flask
+        and worker threads share one instance (and one registration).
+        
+        Returns:
+            InternalImageBridge instance
+        """
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = cls()
+        return cls._instance
+    
     def __init__(self):
         """Initialize the bridge"""
         self._task_queue_manager = None
-        self.poll_interval = 2  # Poll every 2 seconds
+        self.initial_poll_interval = 0.05  # First poll delay (fallback polling only)
+        self.poll_interval = 1.0  # Maximum delay between polls
+        self.poll_backoff = 1.5  # Delay multiplier per poll
         self.max_wait_time = 300  # Maximum wait time: 5 minutes
     
     def register_task_queue_manager(self, task_queue_manager):
@@ -96,7 +119,7 @@ class InternalImageBridge:
                 num_inference_steps=num_inference_steps
             )
             
-            logger.debug(f"Internal task submitted: {task_id}")
+            logger.debug("Internal task submitted: %s", task_id)
             return task_id
             
         except Exception as e:
@@ -132,21 +155,81 @@ class InternalImageBridge:
             return None
     
     def wait_for_completion(self, task_id: str) -> Tuple[bool, Optional[str]]:
+        """
+        Wait until the task completes.
+        
+        Blocks on the task's completion event when the registered queue manager
+        provides one, so the caller wakes as soon as the worker finishes;
+        otherwise falls back to polling the task status.
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            tuple: (success, error_message)
+        """
+        queue_manager = self._get_task_queue_manager()
+        get_completion_event = getattr(queue_manager, 'get_completion_event', None)
+        if get_completion_event is None:
+            return self._poll_for_completion(task_id)
+        
+        try:
+            completion_event = get_completion_event(task_id)
+            if completion_event is None:
+                return False, "Task not found"
+            
+            if not completion_event.wait(timeout=self.max_wait_time):
+                return False, "Task timeout"
+            
+            return self._check_final_status(task_id)
+            
+        except Exception as e:
+            logger.error(f"Error waiting for internal task: {e}")
+            return False, str(e)
+    
+    def _check_final_status(self, task_id: str) -> Tuple[bool, Optional[str]]:
+        """
+        Read the status of a finished task once.
+        
+        Args:
+            task_id: Task ID
+            
+        Returns:
+            tuple: (success, error_message)
+        """
+        task_status = self.get_task_status(task_id)
+        if not task_status:
+            return False, "Task not found"
+        
+        status = task_status.get('status')
+        if status == "completed":
+            return True, None
+        elif status == "failed":
+            return False, task_status.get('error_message', 'Task failed')
+        return False, f"Unknown status: {status}"
+    
+    def _poll_for_completion(self, task_id: str) -> Tuple[bool, Optional[str]]:
         """
         Poll task status until completion.
         
+        The delay between polls grows from initial_poll_interval up to
+        poll_interval, so short tasks are noticed quickly while long ones are
+        not polled aggressively. Uses the monotonic clock for the deadline.
+        
         Args:
             task_id: Task ID
             
         Returns:
             tuple: (success, error_message)
         """
-        start_time = time.time()
+        deadline = time.monotonic() + self.max_wait_time
+        attempt = 0
+        last_status = None
         
         while True:
             try:
                 # Check timeout
-                if time.time() - start_time > self.max_wait_time:
+                if time.monotonic() > deadline:
                     return False, "Task timeout"
                 
                 # Get task status
@@ -164,8 +247,17 @@ class InternalImageBridge:
                     return False, error_msg
                 elif status in ["pending", "processing"]:
                     # Still processing, wait and retry
-                    logger.debug(f"Internal task {task_id} status: {status}")
-                    time.sleep(self.poll_interval)
+                    logger.debug("Internal task %s status: %s", task_id, status)
+                    if status != last_status:
+                        # Restart the backoff when the task starts running
+                        attempt = 0
+                        last_status = status
+                    delay = min(
+                        self.poll_interval,
+                        self.initial_poll_interval * (self.poll_backoff ** attempt)
+                    )
+                    attempt += 1
+                    time.sleep(delay)
                 else:
                     return False, f"Unknown status: {status}"
                     
@@ -173,15 +265,19 @@ class InternalImageBridge:
                 logger.error(f"Error polling internal task status: {e}")
                 return False, str(e)
     
-    def get_task_result(self, task_id: str) -> Optional[bytes]:
+    def get_task_result_path(self, task_id: str) -> Optional[Path]:
         """
-        Get task result image data directly.
+        Get the path of the task's generated image file.
+        
+        Lets callers open or copy the file themselves instead of pulling the
+        whole image through Python bytes. The file is not stat()ed here;
+        callers opening it should handle FileNotFoundError.
         
         Args:
             task_id: Task ID
             
         Returns:
-            Image bytes or None
+            Image file path or None
         """
         try:
             queue_manager = self._get_task_queue_manager()
@@ -192,24 +288,37 @@ class InternalImageBridge:
             if not task or not task.image_path:
                 return None
             
-            # Read image file
-            output_path = Path(task.image_path)
-            if not output_path.exists():
-                logger.error(f"Output file not found: {output_path}")
-                return None
+            return Path(task.image_path)
+                
+        except Exception as e:
+            logger.error(f"Failed to get task result path: {e}")
+            return None
+    
+    def get_task_result(self, task_id: str) -> Optional[bytes]:
+        """
+        Get task result image data directly.
+        
+        Args:
+            task_id: Task ID
             
+        Returns:
+            Image bytes or None
+        """
+        output_path = self.get_task_result_path(task_id)
+        if output_path is None:
+            return None
+        
+        try:
             with open(output_path, 'rb') as f:
                 return f.read()
-                
+        except FileNotFoundError:
+            logger.error("Output file not found: %s", output_path)
+            return None
         except Exception as e:
             logger.error(f"Failed to get task result: {e}")
             return None
 
 
-# Global singleton
-_internal_bridge_instance: Optional[InternalImageBridge] = None
-
-
 def get_internal_bridge() -> InternalImageBridge:
     """
     Get the InternalImageBridge singleton instance.
@@ -217,10 +326,4 @@ def get_internal_bridge() -> InternalImageBridge:
     Returns:
         InternalImageBridge instance
     """
-    global _internal_bridge_instance
-    
-    if _internal_bridge_instance is None:
-        _internal_bridge_instance = InternalImageBridge()
-    
-    return _internal_bridge_instance
-
+    return InternalImageBridge.get_instance()
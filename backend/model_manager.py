@@ -2,25 +2,65 @@
 模型管理模块
 负责模型的加载、管理和图像生成
 """
+import contextlib
 import logging
+import functools
+import threading
 import torch
-from diffusers import ZImagePipeline
-from typing import Optional, Dict, Any
+from typing import TYPE_CHECKING, Optional, Dict, Any, List
 import config
 
+if TYPE_CHECKING:
+    from diffusers import ZImagePipeline
+
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
+def _get_pipeline_cls() -> type:
+    """
+    延迟导入ZImagePipeline，仅在加载模型时才导入diffusers
+    
+    Returns:
+        type: ZImagePipeline类
+    """
+    from diffusers import ZImagePipeline
+    return ZImagePipeline
+
+
 class ModelManager:
     """模型管理器，负责加载和管理Z-Image-Turbo模型"""
     
     def __init__(self):
         """初始化模型管理器"""
-        self.pipe: Optional[ZImagePipeline] = None
+        self.pipe: Optional["ZImagePipeline"] = None
         self.device = f"cuda:{config.GPU_DEVICE_ID}" if config.CUDA_AVAILABLE and torch.cuda.is_available() else "cpu"
         self.is_loaded = False
-        self._load_lock = torch.cuda.Stream() if torch.cuda.is_available() else None
+        # 推理专用CUDA流；所有推理均由任务队列的单个worker线程发起，
+        # 与默认流之间的先后顺序由_inference_context保证
+        self._infer_stream: Optional[torch.cuda.Stream] = None
+        # transformer是否已通过torch.compile编译（决定预热时覆盖的尺寸）
+        self._compiled = False
+        
+    @contextlib.contextmanager
+    def _inference_context(self):
+        """
+        推理上下文：在专用CUDA流上执行，CPU设备时为空上下文
         
+        进入时推理流先等待默认流上已排队的操作（权重拷贝、channels_last转换、量化等），
+        退出时同步推理流，交还给调用方的输出及释放回缓存分配器的显存不再被推理kernel使用。
+        """
+        if self._infer_stream is None:
+            yield
+            return
+        
+        self._infer_stream.wait_stream(torch.cuda.current_stream(self.device))
+        try:
+            with torch.cuda.stream(self._infer_stream):
+                yield
+        finally:
+            self._infer_stream.synchronize()
+    
     def load_model(self) -> bool:
         """
         加载模型到GPU
@@ -45,7 +85,7 @@ class ModelManager:
                 torch_dtype = torch.float32
                 
             # 加载pipeline
-            self.pipe = ZImagePipeline.from_pretrained(
+            self.pipe = _get_pipeline_cls().from_pretrained(
                 config.MODEL_NAME,
                 torch_dtype=torch_dtype,
                 low_cpu_mem_usage=config.LOW_CPU_MEM_USAGE,
@@ -54,6 +94,22 @@ class ModelManager:
             # 移动到指定设备
             self.pipe.to(self.device)
             
+            if self.device.startswith("cuda"):
+                self._infer_stream = torch.cuda.Stream(device=self.device)
+            
+            # channels_last内存布局（如果启用）：VAE解码以卷积为主且受带宽限制，
+            # NHWC布局可配合融合内核减少DiT与VAE之间的布局转换拷贝
+            if config.ENABLE_CHANNELS_LAST and self.device.startswith("cuda"):
+                for name in ("transformer", "vae"):
+                    module = getattr(self.pipe, name, None)
+                    if module is None:
+                        continue
+                    try:
+                        module.to(memory_format=torch.channels_last)
+                        logger.info(f"已启用channels_last内存布局: {name}")
+                    except Exception as e:
+                        logger.warning(f"设置{name}的channels_last内存布局失败: {e}")
+            
             # 配置Flash Attention（如果启用）
             if config.ENABLE_FLASH_ATTENTION and hasattr(self.pipe, 'transformer'):
                 try:
@@ -62,11 +118,32 @@ class ModelManager:
                 except Exception as e:
                     logger.warning(f"启用Flash Attention失败: {e}")
             
+            # Transformer低精度量化（如果启用，需在编译之前完成）
+            if config.MODEL_QUANT != "none" and hasattr(self.pipe, 'transformer'):
+                self._quantize_transformer(config.MODEL_QUANT)
+            
+            # CUDA Graph（如果启用）：通过torch.compile的reduce-overhead模式按尺寸捕获并重放
+            # DiT前向，消除逐步的kernel启动开销；与CPU Offloading不兼容
+            use_cuda_graph = config.ENABLE_CUDA_GRAPH and self.device.startswith("cuda")
+            if use_cuda_graph and config.ENABLE_CPU_OFFLOAD:
+                logger.warning("CUDA Graph与CPU Offloading不兼容，已跳过CUDA Graph")
+                use_cuda_graph = False
+            
             # 模型编译（如果启用）
-            if config.ENABLE_MODEL_COMPILE and hasattr(self.pipe, 'transformer'):
+            if (config.ENABLE_MODEL_COMPILE or use_cuda_graph) and hasattr(self.pipe, 'transformer'):
                 try:
-                    self.pipe.transformer.compile()
-                    logger.info("已启用模型编译")
+                    # 每个预热尺寸各占一份编译缓存；开启FX图缓存使编译产物可跨进程复用
+                    torch._dynamo.config.cache_size_limit = max(
+                        torch._dynamo.config.cache_size_limit, 4 * len(config.COMPILE_WARMUP_SHAPES)
+                    )
+                    torch._inductor.config.fx_graph_cache = True
+                    if use_cuda_graph:
+                        self.pipe.transformer.compile(mode="reduce-overhead")
+                        logger.info("已启用模型编译（CUDA Graph: reduce-overhead）")
+                    else:
+                        self.pipe.transformer.compile()
+                        logger.info("已启用模型编译")
+                    self._compiled = True
                 except Exception as e:
                     logger.warning(f"模型编译失败: {e}")
             
@@ -91,18 +168,67 @@ class ModelManager:
             self.is_loaded = False
             return False
     
+    def _quantize_transformer(self, quant: str):
+        """
+        使用torchao量化DiT transformer，VAE和文本编码器保持原精度
+        
+        fp8需要计算能力8.9及以上的GPU（Ada/Hopper），否则退回int8仅权重量化。
+        
+        Args:
+            quant: 量化方式，"fp8" 或 "int8"
+        """
+        try:
+            from torchao.quantization import (
+                quantize_,
+                float8_dynamic_activation_float8_weight,
+                int8_weight_only,
+            )
+        except ImportError:
+            logger.warning("未安装torchao，跳过模型量化")
+            return
+        
+        if quant == "fp8":
+            if not self.device.startswith("cuda") or torch.cuda.get_device_capability(self.device) < (8, 9):
+                logger.warning("当前设备不支持FP8计算，改用INT8仅权重量化")
+                quant = "int8"
+        
+        try:
+            if quant == "fp8":
+                quantize_(self.pipe.transformer, float8_dynamic_activation_float8_weight())
+                logger.info("已启用Transformer量化: torchao float8_dynamic_activation_float8_weight")
+            elif quant == "int8":
+                quantize_(self.pipe.transformer, int8_weight_only())
+                logger.info("已启用Transformer量化: torchao int8_weight_only")
+            else:
+                logger.warning(f"未知的量化方式: {quant}，跳过模型量化")
+        except Exception as e:
+            logger.warning(f"模型量化失败: {e}")
+    
     def _warmup_model(self):
-        """预热模型，执行一次快速推理以初始化"""
+        """
+        预热模型，执行快速推理以初始化
+        
+        模型已编译时按COMPILE_WARMUP_SHAPES中的每个尺寸各推理一步，
+        使torch.compile提前为实际使用的分辨率生成内核（及CUDA Graph）。
+        """
+        if self._compiled:
+            shapes = config.COMPILE_WARMUP_SHAPES or [(config.DEFAULT_WIDTH, config.DEFAULT_HEIGHT)]
+        else:
+            shapes = [(512, 512)]
+        
         try:
-            logger.info("开始模型预热...")
-            _ = self.pipe(
-                prompt="warmup",
-                height=512,
-                width=512,
-                num_inference_steps=1,
-                guidance_scale=config.DEFAULT_GUIDANCE_SCALE,
-                generator=torch.Generator(self.device).manual_seed(42),
-            ).images[0]
+            logger.info(f"开始模型预热，尺寸: {', '.join(f'{w}x{h}' for w, h in shapes)}")
+            generator = torch.Generator(self.device)
+            with self._inference_context():
+                for width, height in shapes:
+                    _ = self.pipe(
+                        prompt="warmup",
+                        height=height,
+                        width=width,
+                        num_inference_steps=1,
+                        guidance_scale=config.DEFAULT_GUIDANCE_SCALE,
+                        generator=generator.manual_seed(42),
+                    ).images[0]
             logger.info("模型预热完成")
         except Exception as e:
             logger.warning(f"模型预热失败: {e}")
@@ -143,14 +269,15 @@ class ModelManager:
             # 生成图像
             logger.info(f"开始生成图像: prompt={prompt[:50]}..., height={height}, width={width}, steps={num_inference_steps}")
             
-            result = self.pipe(
-                prompt=prompt,
-                height=height,
-                width=width,
-                num_inference_steps=num_inference_steps,
-                guidance_scale=config.DEFAULT_GUIDANCE_SCALE,
-                generator=generator,
-            )
+            with self._inference_context():
+                result = self.pipe(
+                    prompt=prompt,
+                    height=height,
+                    width=width,
+                    num_inference_steps=num_inference_steps,
+                    guidance_scale=config.DEFAULT_GUIDANCE_SCALE,
+                    generator=generator,
+                )
             
             image = result.images[0]
             logger.info("图像生成成功")
@@ -161,6 +288,105 @@ class ModelManager:
             logger.error(f"图像生成失败: {e}", exc_info=True)
             raise RuntimeError(f"图像生成失败: {str(e)}")
     
+    def generate_images_batch(
+        self,
+        prompts: List[str],
+        height: int = config.DEFAULT_HEIGHT,
+        width: int = config.DEFAULT_WIDTH,
+        num_inference_steps: int = config.DEFAULT_NUM_INFERENCE_STEPS,
+        seeds: Optional[List[Optional[int]]] = None,
+    ) -> List[Any]:
+        """
+        批量生成图像，多个提示词共用一次pipeline调用（共享DiT前向计算）
+        
+        Args:
+            prompts: 文本提示词列表
+            height: 图像高度（批内所有图像相同）
+            width: 图像宽度（批内所有图像相同）
+            num_inference_steps: 推理步数
+            seeds: 与prompts一一对应的随机种子列表，None表示随机
+            
+        Returns:
+            List[PIL.Image]: 与prompts顺序一致的图像列表
+            
+        Raises:
+            RuntimeError: 如果模型未加载或生成失败
+        """
+        if not self.is_loaded or self.pipe is None:
+            raise RuntimeError("模型未加载，请先调用load_model()")
+        
+        if seeds is None:
+            seeds = [None] * len(prompts)
+        
+        try:
+            # 每个提示词使用独立的生成器，保证与单张生成时的种子语义一致
+            generators = []
+            for seed in seeds:
+                generator = torch.Generator(self.device)
+                if seed is not None:
+                    generator.manual_seed(seed)
+                generators.append(generator)
+            
+            logger.info(f"开始批量生成图像: batch_size={len(prompts)}, height={height}, width={width}, steps={num_inference_steps}")
+            
+            # 按当前空闲显存拆分为若干子批次，避免大尺寸+高并发时OOM
+            chunk_size = max(1, self._max_safe_batch(height, width, len(prompts)))
+            if chunk_size < len(prompts):
+                logger.info(f"显存不足以一次处理整批，拆分为每批 {chunk_size} 张")
+            
+            images = []
+            for start in range(0, len(prompts), chunk_size):
+                if start > 0 and self.device.startswith("cuda"):
+                    free_bytes, total_bytes = torch.cuda.mem_get_info(torch.device(self.device))
+                    if free_bytes < 0.1 * total_bytes:
+                        torch.cuda.empty_cache()
+                
+                with self._inference_context():
+                    result = self.pipe(
+                        prompt=prompts[start:start + chunk_size],
+                        height=height,
+                        width=width,
+                        num_inference_steps=num_inference_steps,
+                        guidance_scale=config.DEFAULT_GUIDANCE_SCALE,
+                        num_images_per_prompt=1,
+                        generator=generators[start:start + chunk_size],
+                    )
+                images.extend(result.images)
+            
+            logger.info(f"批量图像生成成功: {len(images)} 张")
+            
+            return images
+            
+        except Exception as e:
+            logger.error(f"批量图像生成失败: {e}", exc_info=True)
+            raise RuntimeError(f"批量图像生成失败: {str(e)}")
+    
+    def _max_safe_batch(self, height: int, width: int, batch_size: int) -> int:
+        """
+        根据当前空闲显存估算一次推理可容纳的最大批次
+        
+        Args:
+            height: 图像高度
+            width: 图像宽度
+            batch_size: 请求的批次大小
+            
+        Returns:
+            int: 不超过batch_size的安全批次（至少为1）；非CUDA设备不做限制
+        """
+        if not self.device.startswith("cuda"):
+            return batch_size
+        
+        try:
+            free_bytes, _ = torch.cuda.mem_get_info(torch.device(self.device))
+        except Exception as e:
+            logger.warning(f"读取空闲显存失败，按单张推理: {e}")
+            return 1
+        
+        per_sample_bytes = (height * width / 1e6) * config.BATCH_VRAM_PER_MEGAPIXEL_GB * 1024**3
+        max_batch = max(1, min(batch_size, int(free_bytes // per_sample_bytes)))
+        logger.debug(f"空闲显存 {free_bytes / 1024**3:.2f}GB，单张预估 {per_sample_bytes / 1024**3:.2f}GB，最大批次 {max_batch}")
+        return max_batch
+    
     def get_gpu_info(self) -> Dict[str, Any]:
         """
         获取GPU使用信息
@@ -204,3 +430,26 @@ class ModelManager:
         """
         return self.is_loaded and self.pipe is not None
 
+
+# 全局单例
+_model_manager_instance: Optional[ModelManager] = None
+_model_manager_lock = threading.Lock()
+
+
+def get_model_manager() -> ModelManager:
+    """
+    获取ModelManager单例
+    
+    使用双重检查锁定，保证进程内只有一个模型管理器占用GPU。
+    
+    Returns:
+        ModelManager: 模型管理器实例
+    """
+    global _model_manager_instance
+    
+    if _model_manager_instance is None:
+        with _model_manager_lock:
+            if _model_manager_instance is None:
+                _model_manager_instance = ModelManager()
+    
+    return _model_manager_instance
@@ -2,11 +2,13 @@
 Slide Generation Wrapper
 包装slide-gen Agent以供Flask服务调用
 """
+import functools
 import logging
 import os
 import sys
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, Optional, Tuple
 import traceback
 
 # Import main config first
@@ -14,18 +16,29 @@ import config
 
 # Set environment variables for slide-gen before importing its modules
 # This allows slide-gen to read configuration from the main config.py
-os.environ["LLM_API_KEY"] = config.SLIDE_LLM_API_KEY
-os.environ["LLM_API_URL"] = config.SLIDE_LLM_API_URL
-os.environ["LLM_MODEL"] = config.SLIDE_LLM_MODEL
-os.environ["IMAGE_API_KEY"] = config.SLIDE_IMAGE_API_KEY
-os.environ["IMAGE_API_URL"] = config.SLIDE_IMAGE_API_URL
-os.environ["IMAGE_MODEL"] = config.SLIDE_IMAGE_MODEL
-os.environ["DEFAULT_TIMEOUT"] = str(config.SLIDE_DEFAULT_TIMEOUT)
-os.environ["MAX_RETRIES"] = str(config.SLIDE_MAX_RETRIES)
-
-# Enable bridge mode when called from Flask service
-# This allows the agent to use internal_image_bridge instead of HTTP calls
-os.environ["USE_BRIDGE"] = "true"
+# The guard skips the work on re-import (e.g. Flask reloader child processes)
+if not os.environ.get("SLIDE_ENV_BOOTSTRAPPED"):
+    os.environ.update({
+        "LLM_API_KEY": config.SLIDE_LLM_API_KEY,
+        "LLM_API_URL": config.SLIDE_LLM_API_URL,
+        "LLM_MODEL": config.SLIDE_LLM_MODEL,
+        "LLM_CONTEXT_WINDOW": str(config.SLIDE_LLM_CONTEXT_WINDOW),
+        "IMAGE_API_KEY": config.SLIDE_IMAGE_API_KEY,
+        "IMAGE_API_URL": config.SLIDE_IMAGE_API_URL,
+        "IMAGE_MODEL": config.SLIDE_IMAGE_MODEL,
+        "DEFAULT_TIMEOUT": str(config.SLIDE_DEFAULT_TIMEOUT),
+        "MAX_RETRIES": str(config.SLIDE_MAX_RETRIES),
+        "LLM_BATCH_SIZE": str(config.SLIDE_LLM_BATCH_SIZE),
+        "IMAGE_CONCURRENCY": str(config.SLIDE_IMAGE_CONCURRENCY),
+        "SLIDE_CONCURRENCY": str(config.SLIDE_CONCURRENCY),
+        "IMAGE_CACHE_MAX_GB": str(config.SLIDE_IMAGE_CACHE_MAX_GB),
+        "PDF_WORKERS": str(config.SLIDE_PDF_WORKERS),
+        "PDF_RENDER_WORKERS": str(config.SLIDE_PDF_RENDER_WORKERS),
+        # Enable bridge mode when called from Flask service
+        # This allows the agent to use internal_image_bridge instead of HTTP calls
+        "USE_BRIDGE": "true",
+    })
+    os.environ["SLIDE_ENV_BOOTSTRAPPED"] = "1"
 
 # Log configuration status for debugging
 _logger = logging.getLogger(__name__)
@@ -39,19 +52,30 @@ slide_gen_path = Path(__file__).parent / "agents" / "slide-gen"
 if str(slide_gen_path) not in sys.path:
     sys.path.insert(0, str(slide_gen_path))
 
-# Now import slide-gen modules (they will read from the environment variables we just set)
-# NOTE: We import slide_config INSIDE the class to ensure env vars are set first
-try:
-    from src.agent.graph import SlideGenerationAgent
-    from src.utils.validators import InputValidator
-except ImportError as e:
-    logging.error(f"Failed to import slide-gen modules: {e}")
-    SlideGenerationAgent = None
-    InputValidator = None
-
 logger = logging.getLogger(__name__)
 
 
+@functools.lru_cache(maxsize=1)
+def _get_slide_classes() -> Tuple[Optional[type], Optional[type]]:
+    """
+    延迟导入slide-gen模块
+    
+    slide-gen会间接加载langgraph、langchain、playwright、weasyprint等重量级依赖，
+    推迟到首次使用时导入，避免不使用Slide功能的进程也承担启动时间和内存开销。
+    导入时会读取上面设置的环境变量。
+    
+    Returns:
+        tuple: (SlideGenerationAgent, InputValidator)，导入失败时为 (None, None)
+    """
+    try:
+        from src.agent.graph import SlideGenerationAgent
+        from src.utils.validators import InputValidator
+    except ImportError as e:
+        logger.error(f"Failed to import slide-gen modules: {e}")
+        return None, None
+    return SlideGenerationAgent, InputValidator
+
+
 class SlideGenerator:
     """
     Slide生成器类
@@ -63,6 +87,7 @@ class SlideGenerator:
         self.agent = None
         self.is_ready = False
         
+        SlideGenerationAgent, _ = _get_slide_classes()
         if SlideGenerationAgent is None:
             logger.error("SlideGenerationAgent未能正确导入，Slide生成功能不可用")
             return
@@ -110,6 +135,7 @@ class SlideGenerator:
         Returns:
             tuple: (是否有效, 错误消息)
         """
+        _, InputValidator = _get_slide_classes()
         if not InputValidator:
             return False, "参数验证器未初始化"
         
@@ -126,7 +152,8 @@ class SlideGenerator:
         aspect_ratio: str,
         style: str,
         content_richness: str,
-        color_scheme: str = "light_blue"
+        color_scheme: str = "light_blue",
+        on_slide_ready: Optional[Callable[[int, str], None]] = None
     ) -> Dict[str, Any]:
         """
         生成幻灯片
@@ -138,6 +165,7 @@ class SlideGenerator:
             style: 视觉风格 ("professional", "creative", "minimal", "academic")
             content_richness: 内容详细程度 ("concise", "moderate", "detailed")
             color_scheme: 配色方案 ("light_blue", "dark_slate", "warm_cream", "dark_navy", "soft_green")
+            on_slide_ready: 可选回调，每张幻灯片图片导出后立即以 (slide_number, image_path) 调用
             
         Returns:
             Dict: 生成结果
@@ -148,6 +176,7 @@ class SlideGenerator:
                 - slides_generated: int - 生成的幻灯片数量
                 - errors: List[str] - 错误列表
                 - slide_image_paths: List[str] - 单个幻灯片图片路径列表
+                - slide_images: Dict[int, str] - 幻灯片编号到图片路径的映射
         """
         if not self.is_generator_ready():
             logger.error("SlideGenerator未就绪，无法生成幻灯片")
@@ -159,7 +188,8 @@ class SlideGenerator:
                 'ppt_path': None,
                 'slides_generated': 0,
                 'errors': ['Slide生成器未初始化或配置错误'],
-                'slide_image_paths': []
+                'slide_image_paths': [],
+                'slide_images': {}
             }
         
         # 验证参数
@@ -183,7 +213,8 @@ class SlideGenerator:
                 'ppt_path': None,
                 'slides_generated': 0,
                 'errors': [error],
-                'slide_image_paths': []
+                'slide_image_paths': [],
+                'slide_images': {}
             }
         
         # 执行生成
@@ -206,31 +237,44 @@ class SlideGenerator:
                 aspect_ratio=aspect_ratio,
                 style=style,
                 content_richness=content_richness,
-                color_scheme=color_scheme
+                color_scheme=color_scheme,
+                on_slide_ready=on_slide_ready
             )
             
             logger.debug("Agent执行完成，开始处理结果")
             
             # 收集所有生成的幻灯片图片路径
             slide_image_paths = []
+            slide_images = {}
             if result.get('success'):
-                output_path = Path(result['output_path'])
-                slide_images_dir = output_path / 'slide_images'
+                output_path = result['output_path']
+                slide_images_dir = os.path.join(output_path, 'slide_images')
                 
                 logger.debug(f"检查输出目录: {output_path}")
                 logger.debug(f"幻灯片图片目录: {slide_images_dir}")
                 
-                if slide_images_dir.exists():
+                # 一次目录扫描代替逐张exists()检查
+                try:
+                    with os.scandir(slide_images_dir) as entries:
+                        present = {
+                            entry.name: entry.path for entry in entries
+                            if entry.name.startswith("slide_") and entry.name.endswith(".png")
+                        }
+                except FileNotFoundError:
+                    present = None
+                    logger.warning(f"幻灯片图片目录不存在: {slide_images_dir}")
+                
+                if present is not None:
                     # 按顺序收集所有幻灯片图片
                     for i in range(1, num_slides + 1):
-                        slide_img = slide_images_dir / f"slide_{i}.png"
-                        if slide_img.exists():
-                            slide_image_paths.append(str(slide_img))
-                            logger.debug(f"找到幻灯片图片: {slide_img.name}")
+                        slide_name = f"slide_{i}.png"
+                        slide_img = present.get(slide_name)
+                        if slide_img is not None:
+                            slide_image_paths.append(slide_img)
+                            slide_images[i] = slide_img
+                            logger.debug(f"找到幻灯片图片: {slide_name}")
                         else:
-                            logger.warning(f"未找到幻灯片图片: {slide_img.name}")
-                else:
-                    logger.warning(f"幻灯片图片目录不存在: {slide_images_dir}")
+                            logger.warning(f"未找到幻灯片图片: {slide_name}")
                 
                 logger.info(f"✓ 幻灯片生成成功")
                 logger.info(f"✓ 生成了 {len(slide_image_paths)} 张幻灯片图片")
@@ -246,6 +290,7 @@ class SlideGenerator:
             
             # 添加幻灯片图片路径到结果
             result['slide_image_paths'] = slide_image_paths
+            result['slide_images'] = slide_images
             
             return result
             
@@ -262,25 +307,49 @@ class SlideGenerator:
                 'ppt_path': None,
                 'slides_generated': 0,
                 'errors': [error_msg],
-                'slide_image_paths': []
+                'slide_image_paths': [],
+                'slide_images': {}
             }
 
 
 # 全局单例
 _slide_generator_instance: Optional[SlideGenerator] = None
+_slide_generator_lock = threading.Lock()
 
 
 def get_slide_generator() -> SlideGenerator:
     """
     获取SlideGenerator单例
     
+    使用双重检查锁定，多线程下并发的首次调用也只会创建一个实例。
+    
     Returns:
         SlideGenerator: 生成器实例
     """
     global _slide_generator_instance
     
     if _slide_generator_instance is None:
-        _slide_generator_instance = SlideGenerator()
+        with _slide_generator_lock:
+            if _slide_generator_instance is None:
+                _slide_generator_instance = SlideGenerator()
     
     return _slide_generator_instance
 
+
+
+def start_pdf_workers() -> bool:
+    """
+    启动PDF导出进程池
+    
+    进程池通过fork创建，须在应用启动时、其他线程和CUDA初始化之前调用，
+    避免子进程继承其他线程持有的锁。
+    
+    Returns:
+        bool: 进程池是否已启动；未启用或导入失败时返回False，PDF在生成线程中合成
+    """
+    try:
+        from src.utils.pdf_pool import start_pdf_pool
+    except ImportError as e:
+        logger.error(f"Failed to import slide-gen modules: {e}")
+        return False
+    return start_pdf_pool()
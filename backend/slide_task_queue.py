@@ -4,25 +4,19 @@ Slide任务队列管理器
 """
 import logging
 import threading
-import queue
 import uuid
-from dataclasses import dataclass, asdict, field
+from dataclasses import dataclass, field
 from datetime import datetime
-from enum import Enum
-from typing import Dict, Optional, List
+from typing import ClassVar, Dict, Iterator, Optional, List
 from pathlib import Path
 
+from base_task_queue import BaseTaskQueueManager, TaskStatus
 from slide_generator import SlideGenerator
 
 logger = logging.getLogger(__name__)
 
-
-class SlideTaskStatus(Enum):
-    """Slide任务状态枚举"""
-    PENDING = "pending"
-    PROCESSING = "processing"
-    COMPLETED = "completed"
-    FAILED = "failed"
+# Slide任务与图像任务共用同一套状态
+SlideTaskStatus = TaskStatus
 
 
 @dataclass
@@ -36,9 +30,10 @@ class SlideTask:
     style: str
     content_richness: str
     color_scheme: str
-    created_at: str
-    started_at: Optional[str] = None
-    completed_at: Optional[str] = None
+    # 时间以datetime保存，仅在to_dict时格式化为ISO字符串
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
     queue_position: int = 0
     
     # 输出结果
@@ -46,167 +41,253 @@ class SlideTask:
     pdf_path: Optional[str] = None
     ppt_path: Optional[str] = None
     slide_image_paths: List[str] = field(default_factory=list)
+    # 幻灯片编号 -> 图片路径；导出可能失败或乱序完成，按编号而非列表位置查找
+    slide_images: Dict[int, str] = field(default_factory=dict)
     slides_generated: int = 0
     
     # 错误信息
     error_message: Optional[str] = None
     errors: List[str] = field(default_factory=list)
     
+    # 已结束任务的字典缓存（ClassVar不属于数据字段，实例上按需赋值）
+    _dict_cache: ClassVar[Optional[Dict]] = None
+    
+    def update_status(self, status: SlideTaskStatus, error_message: Optional[str] = None):
+        """
+        更新任务状态（由队列管理器在持有lock时调用）
+        
+        Args:
+            status: 新状态
+            error_message: 错误信息（如果状态为FAILED）
+        """
+        if status == SlideTaskStatus.PROCESSING:
+            self.started_at = datetime.now()
+        elif status in (SlideTaskStatus.COMPLETED, SlideTaskStatus.FAILED):
+            self.completed_at = datetime.now()
+        if error_message:
+            self.error_message = error_message
+        self.status = status
+        self._dict_cache = None
+    
     def to_dict(self) -> Dict:
-        """转换为字典格式"""
-        data = asdict(self)
-        data['status'] = self.status.value
+        """
+        转换为字典格式
+        
+        已结束（完成或失败）的任务不再变化，首次序列化的结果会被缓存，
+        之后的轮询只返回其浅拷贝，不再对全部字段做深拷贝。
+        """
+        if self._dict_cache is not None:
+            return dict(self._dict_cache)
+        # 逐字段构建，避免asdict对每个字段递归深拷贝
+        data = {
+            'task_id': self.task_id,
+            'status': self.status.value,
+            'base_text': self.base_text,
+            'num_slides': self.num_slides,
+            'aspect_ratio': self.aspect_ratio,
+            'style': self.style,
+            'content_richness': self.content_richness,
+            'color_scheme': self.color_scheme,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'queue_position': self.queue_position,
+            'output_path': self.output_path,
+            'pdf_path': self.pdf_path,
+            'ppt_path': self.ppt_path,
+            'slide_image_paths': list(self.slide_image_paths),
+            'slides_generated': self.slides_generated,
+            'error_message': self.error_message,
+            'errors': list(self.errors),
+        }
+        if self.status in (SlideTaskStatus.COMPLETED, SlideTaskStatus.FAILED):
+            self._dict_cache = data
+            return dict(data)
         return data
 
 
-class SlideTaskQueueManager:
+class SlideTaskQueueManager(BaseTaskQueueManager):
     """
     Slide任务队列管理器
     管理slide生成任务的提交、执行和状态追踪
     """
     
-    def __init__(self, slide_generator: SlideGenerator, max_queue_size: int = 50):
+    worker_name = "SlideTaskWorker"
+    
+    def __init__(
+        self,
+        slide_generator: SlideGenerator,
+        max_queue_size: int = 50,
+        max_finished_tasks: int = 200,
+        retention_hours: int = 24,
+        worker_cpus: Optional[List[int]] = None
+    ):
         """
         初始化任务队列管理器
         
         Args:
             slide_generator: Slide生成器实例
             max_queue_size: 最大队列长度
+            max_finished_tasks: 保留的已结束任务记录上限
+            retention_hours: 已结束任务的最长保留时间（小时）
+            worker_cpus: worker线程绑定的CPU编号，为空表示不绑定
         """
+        super().__init__(
+            max_queue_size=max_queue_size,
+            max_finished_tasks=max_finished_tasks,
+            retention_hours=retention_hours,
+            worker_cpus=worker_cpus
+        )
         self.slide_generator = slide_generator
-        self.max_queue_size = max_queue_size
-        
-        # 任务队列和存储
-        self.task_queue = queue.Queue(maxsize=max_queue_size)
-        self.tasks: Dict[str, SlideTask] = {}
-        self.lock = threading.RLock()
-        
-        # 工作线程
-        self.worker_thread = None
-        self.is_running = False
+        # 任务进度变化（新幻灯片就绪或任务结束）时通知等待中的流式订阅者
+        self.progress = threading.Condition(self.lock)
         
         # 启动工作线程
-        self._start_worker()
+        self.start_worker()
         
         logger.info(f"✓ SlideTaskQueueManager初始化完成 (最大队列: {max_queue_size})")
     
-    def _start_worker(self):
-        """启动工作线程"""
-        if self.worker_thread is None or not self.worker_thread.is_alive():
-            self.is_running = True
-            self.worker_thread = threading.Thread(
-                target=self._worker_loop,
-                daemon=True,
-                name="SlideTaskWorker"
-            )
-            self.worker_thread.start()
-            logger.info("✓ Slide任务工作线程已启动")
-    
-    def _worker_loop(self):
-        """工作线程主循环"""
-        logger.info("Slide任务工作线程开始运行")
+    def _process(self, task: SlideTask):
+        """
+        执行单个Slide生成任务
         
-        while self.is_running:
-            try:
-                # 从队列获取任务 (超时1秒以便检查is_running)
-                try:
-                    task_id = self.task_queue.get(timeout=1.0)
-                except queue.Empty:
-                    continue
-                
-                # 获取任务
-                with self.lock:
-                    task = self.tasks.get(task_id)
-                    if not task:
-                        logger.warning(f"任务 {task_id} 不存在，跳过")
-                        continue
+        Args:
+            task: 已从队列取出的任务
+        """
+        task_id = task.task_id
+        self._transition(task, SlideTaskStatus.PROCESSING)
+        
+        logger.info(f"开始处理Slide任务: {task_id}")
+        logger.info(f"  主题: {task.base_text[:80]}...")
+        logger.info(f"  幻灯片数量: {task.num_slides}")
+        logger.info(f"  配色方案: {task.color_scheme}")
+        
+        # 执行生成
+        try:
+            result = self.slide_generator.generate_slides(
+                base_text=task.base_text,
+                num_slides=task.num_slides,
+                aspect_ratio=task.aspect_ratio,
+                style=task.style,
+                content_richness=task.content_richness,
+                color_scheme=task.color_scheme,
+                on_slide_ready=lambda slide_number, image_path, task=task: self._on_slide_ready(
+                    task, slide_number, image_path
+                )
+            )
+            
+            # 更新任务状态
+            with self.lock:
+                # 结果字段先于状态写入，已结束任务的to_dict缓存不会缺少结果
+                if result.get('success'):
+                    task.output_path = result.get('output_path')
+                    task.pdf_path = result.get('pdf_path')
+                    task.ppt_path = result.get('ppt_path')
+                    task.slides_generated = result.get('slides_generated', 0)
+                    task.slide_image_paths = result.get('slide_image_paths', [])
+                    task.slide_images = result.get('slide_images', {})
+                    task.errors = result.get('errors', [])
+                    self._transition(task, SlideTaskStatus.COMPLETED)
                     
-                    # 更新任务状态为处理中
-                    task.status = SlideTaskStatus.PROCESSING
-                    task.started_at = datetime.now().isoformat()
-                    task.queue_position = 0
-                
-                logger.info(f"开始处理Slide任务: {task_id}")
-                logger.info(f"  主题: {task.base_text[:80]}...")
-                logger.info(f"  幻灯片数量: {task.num_slides}")
-                logger.info(f"  配色方案: {task.color_scheme}")
-                
-                # 执行生成
-                try:
-                    result = self.slide_generator.generate_slides(
-                        base_text=task.base_text,
-                        num_slides=task.num_slides,
-                        aspect_ratio=task.aspect_ratio,
-                        style=task.style,
-                        content_richness=task.content_richness,
-                        color_scheme=task.color_scheme
-                    )
+                    logger.info(f"✓ 任务完成: {task_id}")
+                    logger.info(f"  生成了 {task.slides_generated} 张幻灯片")
+                    if task.pdf_path:
+                        logger.info(f"  PDF: {Path(task.pdf_path).name}")
+                    if task.ppt_path:
+                        logger.info(f"  PPTX: {Path(task.ppt_path).name}")
+                else:
+                    # Get error message from result
+                    # First check for 'error' field (single error message)
+                    error = result.get('error')
                     
-                    # 更新任务状态
-                    with self.lock:
-                        task.completed_at = datetime.now().isoformat()
-                        
-                        if result.get('success'):
-                            task.status = SlideTaskStatus.COMPLETED
-                            task.output_path = result.get('output_path')
-                            task.pdf_path = result.get('pdf_path')
-                            task.ppt_path = result.get('ppt_path')
-                            task.slides_generated = result.get('slides_generated', 0)
-                            task.slide_image_paths = result.get('slide_image_paths', [])
-                            task.errors = result.get('errors', [])
-                            
-                            logger.info(f"✓ 任务完成: {task_id}")
-                            logger.info(f"  生成了 {task.slides_generated} 张幻灯片")
-                            if task.pdf_path:
-                                logger.info(f"  PDF: {Path(task.pdf_path).name}")
-                            if task.ppt_path:
-                                logger.info(f"  PPTX: {Path(task.ppt_path).name}")
+                    # If no single error, check for 'errors' list
+                    if not error:
+                        errors_list = result.get('errors', [])
+                        if errors_list:
+                            # Join multiple errors with semicolon
+                            error = '; '.join(errors_list)
                         else:
-                            task.status = SlideTaskStatus.FAILED
-                            
-                            # Get error message from result
-                            # First check for 'error' field (single error message)
-                            error = result.get('error')
-                            
-                            # If no single error, check for 'errors' list
-                            if not error:
-                                errors_list = result.get('errors', [])
-                                if errors_list:
-                                    # Join multiple errors with semicolon
-                                    error = '; '.join(errors_list)
-                                else:
-                                    # Fallback to generic message
-                                    error = '幻灯片生成失败，未返回详细错误信息'
-                            
-                            task.error_message = error
-                            task.errors = result.get('errors', [error])
-                            
-                            logger.error(f"✗ 任务失败: {task_id}")
-                            logger.error(f"  错误: {error}")
-                
-                except Exception as e:
-                    # 处理异常
-                    with self.lock:
-                        task.status = SlideTaskStatus.FAILED
-                        task.completed_at = datetime.now().isoformat()
-                        error_msg = f"执行异常: {str(e)}"
-                        task.error_message = error_msg
-                        task.errors = [error_msg]
+                            # Fallback to generic message
+                            error = '幻灯片生成失败，未返回详细错误信息'
                     
-                    logger.error(f"✗ 任务执行异常: {task_id}")
-                    logger.error(f"  异常: {e}", exc_info=True)
-                
-                finally:
-                    # 标记任务完成
-                    self.task_queue.task_done()
+                    task.error_message = error
+                    task.errors = result.get('errors', [error])
+                    self._transition(task, SlideTaskStatus.FAILED)
                     
-                    # 更新队列位置
-                    self.update_queue_positions()
+                    logger.error(f"✗ 任务失败: {task_id}")
+                    logger.error(f"  错误: {error}")
+        
+        except Exception as e:
+            # 处理异常
+            with self.lock:
+                error_msg = f"执行异常: {str(e)}"
+                task.error_message = error_msg
+                task.errors = [error_msg]
+                self._transition(task, SlideTaskStatus.FAILED)
             
-            except Exception as e:
-                logger.error(f"工作线程异常: {e}", exc_info=True)
+            logger.error(f"✗ 任务执行异常: {task_id}")
+            logger.error(f"  异常: {e}", exc_info=True)
         
-        logger.info("Slide任务工作线程已停止")
+        finally:
+            # 通知流式订阅者任务已结束
+            with self.progress:
+                self.progress.notify_all()
+    
+    def _on_slide_ready(self, task: SlideTask, slide_number: int, image_path: str):
+        """
+        记录生成过程中已就绪的幻灯片图片并通知流式订阅者
+        
+        Args:
+            task: 所属任务
+            slide_number: 幻灯片编号（从1开始）
+            image_path: 幻灯片图片路径
+        """
+        with self.progress:
+            task.slide_images[slide_number] = image_path
+            task.slide_image_paths = [task.slide_images[n] for n in sorted(task.slide_images)]
+            self.progress.notify_all()
+        logger.debug(f"任务 {task.task_id} 幻灯片 {slide_number} 已就绪")
+    
+    def iter_slide_events(self, task_id: str, timeout: float = 30.0) -> Iterator[Dict]:
+        """
+        按导出完成的顺序逐个产出幻灯片就绪事件（携带实际的幻灯片编号），任务结束时产出最终状态事件
+        
+        Args:
+            task_id: 任务ID
+            timeout: 两次事件之间的最长等待时间（秒），超时产出心跳事件
+            
+        Yields:
+            Dict: {"event": "slide", "slide_number": n} /
+                  {"event": "heartbeat", "status": ...} /
+                  {"event": "completed" | "failed", "task": 任务信息}
+        """
+        sent = set()
+        while True:
+            with self.progress:
+                task = self.tasks.get(task_id)
+                if task is None:
+                    return
+                
+                ready = [n for n in task.slide_images if n not in sent]
+                finished = task.status in (SlideTaskStatus.COMPLETED, SlideTaskStatus.FAILED)
+                if not ready and not finished:
+                    self.progress.wait(timeout)
+                    ready = [n for n in task.slide_images if n not in sent]
+                    finished = task.status in (SlideTaskStatus.COMPLETED, SlideTaskStatus.FAILED)
+                status = task.status.value
+                final = task.to_dict() if finished else None
+            
+            if not ready and not finished:
+                yield {"event": "heartbeat", "status": status}
+                continue
+            
+            for slide_number in ready:
+                sent.add(slide_number)
+                yield {"event": "slide", "slide_number": slide_number}
+            
+            if finished:
+                yield {"event": status, "task": final}
+                return
     
     def submit_task(
         self,
@@ -247,112 +328,25 @@ class SlideTaskQueueManager:
             style=style,
             content_richness=content_richness,
             color_scheme=color_scheme,
-            created_at=datetime.now().isoformat()
+            created_at=datetime.now()
         )
         
         # 添加到存储和队列
-        with self.lock:
-            self.tasks[task_id] = task
-            
-            try:
-                # 尝试将任务ID加入队列 (非阻塞)
-                self.task_queue.put(task_id, block=False)
-                
-                # 更新队列位置
-                self.update_queue_positions()
-                
-                logger.info(f"✓ Slide任务已提交: {task_id}")
-                logger.debug(f"  主题: {base_text[:80]}...")
-                logger.debug(f"  幻灯片数量: {num_slides}")
-                logger.debug(f"  配色方案: {color_scheme}")
-                logger.debug(f"  队列位置: {task.queue_position}")
-                
-                return task_id
-                
-            except queue.Full:
-                # 队列已满，删除任务
-                del self.tasks[task_id]
-                logger.warning(f"任务队列已满，拒绝任务: {task_id}")
-                raise
-    
-    def get_task(self, task_id: str) -> Optional[SlideTask]:
-        """
-        获取任务详情
+        self._enqueue(task)
         
-        Args:
-            task_id: 任务ID
-            
-        Returns:
-            SlideTask: 任务对象，不存在则返回None
-        """
-        with self.lock:
-            return self.tasks.get(task_id)
-    
-    def update_queue_positions(self):
-        """更新所有pending任务的队列位置"""
-        with self.lock:
-            # 获取队列中的任务ID列表（不移除）
-            queue_items = []
-            temp_list = []
-            
-            # 从队列中取出所有项
-            while not self.task_queue.empty():
-                try:
-                    item = self.task_queue.get_nowait()
-                    temp_list.append(item)
-                except queue.Empty:
-                    break
-            
-            # 放回队列
-            for item in temp_list:
-                try:
-                    self.task_queue.put_nowait(item)
-                    queue_items.append(item)
-                except queue.Full:
-                    break
-            
-            # 更新队列位置（从1开始）
-            for position, task_id in enumerate(queue_items, start=1):
-                task = self.tasks.get(task_id)
-                if task and task.status == SlideTaskStatus.PENDING:
-                    task.queue_position = position
-            
-            # 处理中的任务位置为0
-            for task in self.tasks.values():
-                if task.status == SlideTaskStatus.PROCESSING:
-                    task.queue_position = 0
-    
-    def get_queue_status(self) -> Dict:
-        """
-        获取队列状态统计
+        logger.info(f"✓ Slide任务已提交: {task_id}")
+        logger.debug(f"  主题: {base_text[:80]}...")
+        logger.debug(f"  幻灯片数量: {num_slides}")
+        logger.debug(f"  配色方案: {color_scheme}")
+        logger.debug(f"  队列位置: {len(self._pending_order)}")
         
-        Returns:
-            Dict: 队列状态信息
-        """
-        with self.lock:
-            pending_count = sum(1 for t in self.tasks.values() if t.status == SlideTaskStatus.PENDING)
-            processing_count = sum(1 for t in self.tasks.values() if t.status == SlideTaskStatus.PROCESSING)
-            completed_count = sum(1 for t in self.tasks.values() if t.status == SlideTaskStatus.COMPLETED)
-            failed_count = sum(1 for t in self.tasks.values() if t.status == SlideTaskStatus.FAILED)
-            
-            return {
-                "queue_size": self.task_queue.qsize(),
-                "max_queue_size": self.max_queue_size,
-                "pending_tasks": pending_count,
-                "processing_tasks": processing_count,
-                "completed_tasks": completed_count,
-                "failed_tasks": failed_count,
-                "total_tasks": len(self.tasks)
-            }
+        return task_id
     
     def shutdown(self):
         """关闭任务队列管理器"""
         logger.info("正在关闭SlideTaskQueueManager...")
         
-        self.is_running = False
-        
-        if self.worker_thread and self.worker_thread.is_alive():
-            self.worker_thread.join(timeout=5.0)
+        self.stop_worker()
         
         logger.info("✓ SlideTaskQueueManager已关闭")
 
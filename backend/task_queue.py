@@ -5,27 +5,28 @@
 import logging
 import threading
 import queue
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Optional, Any
-from enum import Enum
+from typing import Dict, List, Optional, Any
 import config
+from base_task_queue import BaseTaskQueueManager, TaskStatus
 from model_manager import ModelManager
 
 logger = logging.getLogger(__name__)
 
 
-class TaskStatus(Enum):
-    """任务状态枚举"""
-    PENDING = "pending"  # 排队中
-    PROCESSING = "processing"  # 生成中
-    COMPLETED = "completed"  # 已完成
-    FAILED = "failed"  # 失败
-
-
 class Task:
     """任务对象"""
     
+    # 已完成的任务会保留到清理为止，使用__slots__省去每个实例的__dict__
+    __slots__ = (
+        "task_id", "prompt", "height", "width", "num_inference_steps", "seed",
+        "status", "created_at", "started_at", "completed_at", "error_message",
+        "image_path", "queue_position", "completion_event",
+    )
+    
     def __init__(
         self,
         task_id: str,
@@ -61,24 +62,29 @@ class Task:
         self.image_path: Optional[str] = None
         self.queue_position: int = 0
         
-        self._lock = threading.Lock()
+        # 任务结束（完成或失败）时置位，供进程内调用方等待而无需轮询
+        self.completion_event = threading.Event()
     
     def update_status(self, status: TaskStatus, error_message: Optional[str] = None):
         """
         更新任务状态
         
+        状态只由队列管理器在持有lock时修改，单个属性赋值在GIL下是原子的，
+        无需任务自身的锁。时间戳和错误信息先于状态写入，读到新状态时它们已就绪。
+        
         Args:
             status: 新状态
             error_message: 错误信息（如果状态为FAILED）
         """
-        with self._lock:
-            self.status = status
-            if status == TaskStatus.PROCESSING:
-                self.started_at = datetime.now()
-            elif status in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
-                self.completed_at = datetime.now()
-            if error_message:
-                self.error_message = error_message
+        if status == TaskStatus.PROCESSING:
+            self.started_at = datetime.now()
+        elif status in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
+            self.completed_at = datetime.now()
+        if error_message:
+            self.error_message = error_message
+        self.status = status
+        if status in [TaskStatus.COMPLETED, TaskStatus.FAILED]:
+            self.completion_event.set()
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -87,34 +93,35 @@ class Task:
         Returns:
             dict: 任务信息字典
         """
-        with self._lock:
-            result = {
-                "task_id": self.task_id,
-                "status": self.status.value,
-                "prompt": self.prompt,
-                "height": self.height,
-                "width": self.width,
-                "num_inference_steps": self.num_inference_steps,
-                "seed": self.seed,
-                "created_at": self.created_at.isoformat(),
-                "queue_position": self.queue_position,
-            }
-            
-            if self.started_at:
-                result["started_at"] = self.started_at.isoformat()
-            if self.completed_at:
-                result["completed_at"] = self.completed_at.isoformat()
-            if self.error_message:
-                result["error_message"] = self.error_message
-            if self.image_path:
-                result["image_path"] = self.image_path
-                
-            return result
+        result = {
+            "task_id": self.task_id,
+            "status": self.status.value,
+            "prompt": self.prompt,
+            "height": self.height,
+            "width": self.width,
+            "num_inference_steps": self.num_inference_steps,
+            "seed": self.seed,
+            "created_at": self.created_at.isoformat(),
+            "queue_position": self.queue_position,
+        }
+        
+        if self.started_at:
+            result["started_at"] = self.started_at.isoformat()
+        if self.completed_at:
+            result["completed_at"] = self.completed_at.isoformat()
+        if self.error_message:
+            result["error_message"] = self.error_message
+        if self.image_path:
+            result["image_path"] = self.image_path
+        
+        return result
 
 
-class TaskQueueManager:
+class TaskQueueManager(BaseTaskQueueManager):
     """任务队列管理器"""
     
+    worker_name = "ImageTaskWorker"
+    
     def __init__(self, model_manager: ModelManager):
         """
         初始化任务队列管理器
@@ -122,63 +129,139 @@ class TaskQueueManager:
         Args:
             model_manager: 模型管理器实例
         """
+        super().__init__(
+            max_queue_size=config.MAX_QUEUE_SIZE,
+            max_finished_tasks=config.MAX_FINISHED_TASKS,
+            retention_hours=config.TASK_RETENTION_HOURS,
+            worker_cpus=config.IMAGE_WORKER_CPUS
+        )
         self.model_manager = model_manager
-        self.task_queue: queue.Queue = queue.Queue(maxsize=config.MAX_QUEUE_SIZE)
-        self.tasks: Dict[str, Task] = {}
-        self.tasks_lock = threading.Lock()
         
-        self.worker_thread: Optional[threading.Thread] = None
-        self.is_running = False
-        self._stop_event = threading.Event()
+        # 图像编码保存在此线程池中进行，worker线程可立即开始下一次推理
+        self._save_executor: Optional[ThreadPoolExecutor] = None
+        # 凑批时取出但参数不匹配的任务，由worker下一轮优先处理
+        self._carry_over: Optional[Task] = None
         
         # 启动worker线程
         self.start_worker()
     
     def start_worker(self):
-        """启动worker线程"""
+        """启动worker线程及图像保存线程池"""
         if self.worker_thread is not None and self.worker_thread.is_alive():
             logger.warning("Worker线程已在运行")
             return
         
-        self.is_running = True
-        self._stop_event.clear()
-        self.worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self.worker_thread.start()
-        logger.info("Worker线程已启动")
+        if config.IMAGE_SAVE_WORKERS > 0:
+            self._save_executor = ThreadPoolExecutor(
+                max_workers=config.IMAGE_SAVE_WORKERS,
+                thread_name_prefix="image-save"
+            )
+        super().start_worker()
     
     def stop_worker(self):
         """停止worker线程"""
-        self.is_running = False
-        self._stop_event.set()
-        if self.worker_thread is not None:
-            self.worker_thread.join(timeout=5)
-        logger.info("Worker线程已停止")
+        super().stop_worker()
+        if self._save_executor is not None:
+            # 等待已生成的图像保存完毕
+            self._save_executor.shutdown(wait=True)
+            self._save_executor = None
     
-    def _worker_loop(self):
-        """Worker线程主循环"""
-        logger.info("Worker线程开始运行")
+    def _next_task(self) -> Optional[Task]:
+        """
+        取出下一个待处理的任务，优先处理上一轮凑批时取出但参数不匹配的任务
+        
+        Returns:
+            Task: 任务对象，收到停止哨兵时返回None
+        """
+        if self._carry_over is not None:
+            task, self._carry_over = self._carry_over, None
+            return task
+        return self.task_queue.get()
+    
+    def _process(self, task: Task):
+        """
+        收集可合并推理的任务并处理
         
-        while self.is_running and not self._stop_event.is_set():
+        Args:
+            task: 已从队列取出的任务
+        """
+        batch = self._collect_batch(task)
+        if len(batch) == 1:
+            self._process_task(task)
+        else:
+            self._process_batch(batch)
+    
+    def _collect_batch(self, first_task: Task) -> List[Task]:
+        """
+        在短时间窗口内收集与首个任务尺寸、步数相同的任务，合并为一次推理
+        
+        参数不匹配的任务会被暂存，在下一轮循环中优先处理，保持先进先出顺序。
+        
+        Args:
+            first_task: 已从队列取出的首个任务
+            
+        Returns:
+            List[Task]: 待合并处理的任务列表（至少包含first_task）
+        """
+        batch = [first_task]
+        if config.IMAGE_BATCH_SIZE <= 1:
+            return batch
+        
+        batch_key = (first_task.height, first_task.width, first_task.num_inference_steps)
+        deadline = time.monotonic() + config.IMAGE_BATCH_WINDOW_MS / 1000
+        
+        while len(batch) < config.IMAGE_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
             try:
-                # 从队列获取任务（超时1秒，以便检查停止事件）
-                try:
-                    task = self.task_queue.get(timeout=1)
-                except queue.Empty:
-                    continue
-                
-                # 更新队列位置
-                self.update_queue_positions()
-                
-                # 处理任务
+                if remaining > 0:
+                    task = self.task_queue.get(timeout=remaining)
+                else:
+                    # 窗口已过，仅取出已在排队的任务，不再等待
+                    task = self.task_queue.get_nowait()
+            except queue.Empty:
+                break
+            
+            if task is None:
+                # 停止哨兵放回队列，由worker主循环处理
+                self.task_queue.put(None)
+                break
+            
+            if (task.height, task.width, task.num_inference_steps) != batch_key:
+                # 该任务由下一轮循环处理
+                self._carry_over = task
+                break
+            batch.append(task)
+        
+        return batch
+    
+    def _process_batch(self, tasks: List[Task]):
+        """
+        合并处理一批参数相同的任务，失败时退回逐个处理
+        
+        Args:
+            tasks: 要处理的任务列表
+        """
+        logger.info(f"开始批量处理任务: {len(tasks)} 个, 尺寸: {tasks[0].width}x{tasks[0].height}")
+        for task in tasks:
+            self._transition(task, TaskStatus.PROCESSING)
+        
+        try:
+            images = self.model_manager.generate_images_batch(
+                prompts=[task.prompt for task in tasks],
+                height=tasks[0].height,
+                width=tasks[0].width,
+                num_inference_steps=tasks[0].num_inference_steps,
+                seeds=[task.seed for task in tasks],
+            )
+        except Exception as e:
+            # 批量推理失败（如显存不足）时逐个重试，确保单个任务仍能完成
+            logger.warning(f"批量推理失败，改为逐个处理: {e}")
+            for task in tasks:
                 self._process_task(task)
-                
-                # 标记任务完成
-                self.task_queue.task_done()
-                
-            except Exception as e:
-                logger.error(f"Worker线程处理任务时出错: {e}", exc_info=True)
-        
-        logger.info("Worker线程已退出")
+            return
+        
+        for task, image in zip(tasks, images):
+            self._complete_task(task, image)
     
     def _process_task(self, task: Task):
         """
@@ -189,7 +272,7 @@ class TaskQueueManager:
         """
         try:
             logger.info(f"开始处理任务: {task.task_id}")
-            task.update_status(TaskStatus.PROCESSING)
+            self._transition(task, TaskStatus.PROCESSING)
             
             # 生成图像
             image = self.model_manager.generate_image(
@@ -199,35 +282,56 @@ class TaskQueueManager:
                 num_inference_steps=task.num_inference_steps,
                 seed=task.seed,
             )
-            
-            # 保存图像
-            image_filename = f"{task.task_id}.png"
-            image_path = config.OUTPUT_DIR / image_filename
+        except Exception as e:
+            error_msg = str(e)
+            logger.error(f"任务处理失败: {task.task_id}, 错误: {error_msg}", exc_info=True)
+            self._transition(task, TaskStatus.FAILED, error_message=error_msg)
+            return
+        
+        self._complete_task(task, image)
+    
+    def _complete_task(self, task: Task, image):
+        """
+        保存生成的图像并完成任务
+        
+        PNG编码在后台线程中进行（编码时释放GIL），与下一次推理重叠；
+        未启用后台保存或线程池已关闭时在当前线程保存。
+        
+        Args:
+            task: 任务对象
+            image: 生成的PIL图像
+        """
+        if self._save_executor is not None:
+            try:
+                self._save_executor.submit(self._save_image, task, image)
+                return
+            except RuntimeError:
+                # 线程池已关闭
+                pass
+        self._save_image(task, image)
+    
+    def _save_image(self, task: Task, image):
+        """
+        保存图像并更新任务状态
+        
+        Args:
+            task: 任务对象
+            image: 生成的PIL图像
+        """
+        try:
+            image_path = config.OUTPUT_DIR / f"{task.task_id}.png"
             image.save(image_path)
             
             # 更新任务状态
             task.image_path = str(image_path)
-            task.update_status(TaskStatus.COMPLETED)
+            self._transition(task, TaskStatus.COMPLETED)
             
             logger.info(f"任务处理完成: {task.task_id}, 图像保存至: {image_path}")
             
         except Exception as e:
             error_msg = str(e)
             logger.error(f"任务处理失败: {task.task_id}, 错误: {error_msg}", exc_info=True)
-            task.update_status(TaskStatus.FAILED, error_message=error_msg)
-    
-    def update_queue_positions(self):
-        """更新所有待处理任务的队列位置"""
-        with self.tasks_lock:
-            pending_tasks = [
-                (task_id, task) for task_id, task in self.tasks.items()
-                if task.status == TaskStatus.PENDING
-            ]
-            # 按创建时间排序
-            pending_tasks.sort(key=lambda x: x[1].created_at)
-            
-            for position, (task_id, task) in enumerate(pending_tasks, start=1):
-                task.queue_position = position
+            self._transition(task, TaskStatus.FAILED, error_message=error_msg)
     
     def submit_task(
         self,
@@ -266,80 +370,21 @@ class TaskQueueManager:
             seed=seed,
         )
         
-        # 添加到任务字典
-        with self.tasks_lock:
-            self.tasks[task_id] = task
-        
-        # 更新队列位置
-        self.update_queue_positions()
-        
-        # 添加到队列
-        try:
-            self.task_queue.put(task, block=False)
-            logger.info(f"任务已提交: {task_id}, 队列长度: {self.task_queue.qsize()}")
-        except queue.Full:
-            # 从任务字典中移除
-            with self.tasks_lock:
-                self.tasks.pop(task_id, None)
-            raise queue.Full("任务队列已满，请稍后重试")
+        # 添加到任务字典和队列
+        self._enqueue(task)
+        logger.info(f"任务已提交: {task_id}, 队列长度: {self.task_queue.qsize()}")
         
         return task_id
     
-    def get_task(self, task_id: str) -> Optional[Task]:
+    def get_completion_event(self, task_id: str) -> Optional[threading.Event]:
         """
-        获取任务信息
+        获取任务的完成事件（任务完成或失败后置位）
         
         Args:
             task_id: 任务ID
             
         Returns:
-            Task: 任务对象，如果不存在返回None
-        """
-        with self.tasks_lock:
-            return self.tasks.get(task_id)
-    
-    def get_queue_status(self) -> Dict[str, Any]:
-        """
-        获取队列状态信息
-        
-        Returns:
-            dict: 队列状态字典
-        """
-        with self.tasks_lock:
-            pending_count = sum(1 for task in self.tasks.values() if task.status == TaskStatus.PENDING)
-            processing_count = sum(1 for task in self.tasks.values() if task.status == TaskStatus.PROCESSING)
-            completed_count = sum(1 for task in self.tasks.values() if task.status == TaskStatus.COMPLETED)
-            failed_count = sum(1 for task in self.tasks.values() if task.status == TaskStatus.FAILED)
-        
-        return {
-            "queue_size": self.task_queue.qsize(),
-            "max_queue_size": config.MAX_QUEUE_SIZE,
-            "pending_tasks": pending_count,
-            "processing_tasks": processing_count,
-            "completed_tasks": completed_count,
-            "failed_tasks": failed_count,
-            "total_tasks": len(self.tasks),
-        }
-    
-    def cleanup_old_tasks(self, max_age_hours: int = 24):
-        """
-        清理旧任务（可选功能，用于防止内存泄漏）
-        
-        Args:
-            max_age_hours: 最大保留时间（小时）
+            threading.Event: 完成事件，如果任务不存在返回None
         """
-        current_time = datetime.now()
-        with self.tasks_lock:
-            to_remove = []
-            for task_id, task in self.tasks.items():
-                if task.completed_at:
-                    age = (current_time - task.completed_at).total_seconds() / 3600
-                    if age > max_age_hours:
-                        to_remove.append(task_id)
-            
-            for task_id in to_remove:
-                self.tasks.pop(task_id, None)
-            
-            if to_remove:
-                logger.info(f"清理了 {len(to_remove)} 个旧任务")
-
+        task = self.get_task(task_id)
+        return task.completion_event if task else None
@@ -3,16 +3,65 @@ API接口测试文件
 测试所有API接口是否正常工作
 """
 import argparse
+import functools
+import json
+import os
 import sys
+import threading
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, ClassVar, Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import requests_cache
+except ImportError:
+    requests_cache = None
+
+# 请求/响应体JSON编解码；安装了orjson时使用其C实现，轮询时解析更快
+if orjson is not None:
+    _json_dumps = orjson.dumps
+    _json_loads = orjson.loads
+else:
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+    _json_loads = json.loads
+
+# POST请求体预先编码为bytes，随固定的Content-Type请求头发送
+_JSON_HEADERS = {"Content-Type": "application/json"}
+# 参数验证测试使用的固定请求体，模块加载时编码一次
+_MISSING_PROMPT_BODY = _json_dumps({})
+_INVALID_HEIGHT_BODY = _json_dumps({"prompt": "test", "height": -1})
+
+# 设置ZIMAGE_TEST_CACHE=1时，在此目录缓存健康检查和系统状态响应（需要安装requests-cache）
+CACHE_PATH = Path.home() / ".cache" / "zimage_test"
+# 缓存有效期（秒），短时间内重复运行测试时不再请求这两个接口
+CACHE_EXPIRE_SECONDS = 1
+
+# 任务的终止状态，轮询到其中之一即停止
+_TERMINAL_STATUSES = frozenset({"completed", "failed"})
+
+# 轮询任务状态的退避参数：初始间隔（秒）、每次无变化后的放大倍数、间隔上限（秒）
+POLL_INITIAL_INTERVAL = 0.25
+POLL_BACKOFF_FACTOR = 1.5
+POLL_MAX_INTERVAL = 5.0
 
 
 class APITester:
     """API测试类"""
     
+    # 所有测试器实例共用的HTTP会话，测试多个服务地址时复用同一组连接池（按主机分池）
+    _shared_session: ClassVar[Optional[requests.Session]] = None
+    _shared_session_lock: ClassVar[threading.Lock] = threading.Lock()
+    
     def __init__(self, base_url: str):
         """
         初始化测试器
@@ -21,10 +70,66 @@ class APITester:
             base_url: API基础URL，例如: http://localhost:5000
         """
         self.base_url = base_url.rstrip('/')
-        self.session = requests.Session()
+        self.session = self._get_shared_session()
         self.test_results = []
+        # 并行执行的测试共用结果列表，记录与输出需互斥，避免多行输出交错
+        self._results_lock = threading.Lock()
+    
+    @classmethod
+    def _get_shared_session(cls) -> requests.Session:
+        """
+        获取共用的HTTP会话，首次调用时创建并挂载连接池
+        
+        Returns:
+            requests.Session: HTTP会话
+        """
+        with cls._shared_session_lock:
+            if cls._shared_session is None:
+                session = cls._create_session()
+                # 连接池复用TCP连接，轮询时不必每次重新握手；网关类错误仅对幂等的GET重试，
+                # 避免重复提交生成任务
+                adapter = HTTPAdapter(
+                    pool_connections=4,
+                    pool_maxsize=32,
+                    max_retries=Retry(
+                        total=3,
+                        backoff_factor=0.2,
+                        status_forcelist=[502, 503, 504],
+                        allowed_methods=["GET"]
+                    )
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                session.headers.update({"Connection": "keep-alive", "Accept-Encoding": "gzip"})
+                cls._shared_session = session
+            return cls._shared_session
+    
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """
+        创建HTTP会话；启用缓存时仅缓存健康检查和系统状态接口，任务相关请求始终访问服务
+        
+        Returns:
+            requests.Session: HTTP会话
+        """
+        if os.environ.get("ZIMAGE_TEST_CACHE") != "1":
+            return requests.Session()
+        if requests_cache is None:
+            print("⚠ 已设置ZIMAGE_TEST_CACHE=1，但未安装requests-cache，不使用响应缓存")
+            return requests.Session()
         
-    def log_test(self, test_name: str, success: bool, message: str = ""):
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        return requests_cache.CachedSession(
+            cache_name=str(CACHE_PATH),
+            allowable_methods=("GET",),
+            urls_expire_after={
+                "*/health": CACHE_EXPIRE_SECONDS,
+                "*/api/status": CACHE_EXPIRE_SECONDS,
+                "*": requests_cache.DO_NOT_CACHE,
+            },
+        )
+    
+    def log_test(self, test_name: str, success: bool, message: str = "", metadata: Optional[Dict[str, Any]] = None):
         """
         记录测试结果
         
@@ -32,6 +137,7 @@ class APITester:
             test_name: 测试名称
             success: 是否成功
             message: 额外消息
+            metadata: 附加的统计信息（如轮询次数），随结果一起保存
         """
         status = "✅ PASS" if success else "❌ FAIL"
         result = {
@@ -39,10 +145,13 @@ class APITester:
             "success": success,
             "message": message
         }
-        self.test_results.append(result)
-        print(f"{status} - {test_name}")
-        if message:
-            print(f"    {message}")
+        if metadata:
+            result["metadata"] = metadata
+        # 结果行和消息行合并为一次写出
+        lines = f"{status} - {test_name}\n    {message}" if message else f"{status} - {test_name}"
+        with self._results_lock:
+            self.test_results.append(result)
+            print(lines)
     
     def test_health_check(self) -> bool:
         """
@@ -59,7 +168,7 @@ class APITester:
                 self.log_test("健康检查", False, f"状态码错误: {response.status_code}")
                 return False
             
-            data = response.json()
+            data = _json_loads(response.content)
             if data.get("code") != 200:
                 self.log_test("健康检查", False, f"返回码错误: {data.get('code')}")
                 return False
@@ -73,7 +182,7 @@ class APITester:
                 f"服务状态: {health_data.get('status')}, 模型已加载: {model_loaded}"
             )
             return True
-            
+        
         except requests.exceptions.RequestException as e:
             self.log_test("健康检查", False, f"请求异常: {str(e)}")
             return False
@@ -87,7 +196,7 @@ class APITester:
         
         Args:
             prompt: 提示词，如果为None则使用默认值
-            
+        
         Returns:
             str: 任务ID，如果失败返回None
         """
@@ -104,7 +213,7 @@ class APITester:
                 "seed": 42
             }
             
-            response = self.session.post(url, json=data, timeout=30)
+            response = self.session.post(url, data=_json_dumps(data), headers=_JSON_HEADERS, timeout=30)
             
             if response.status_code != 200:
                 self.log_test(
@@ -114,7 +223,7 @@ class APITester:
                 )
                 return None
             
-            result = response.json()
+            result = _json_loads(response.content)
             if result.get("code") != 200:
                 self.log_test(
                     "提交生成任务",
@@ -139,7 +248,7 @@ class APITester:
                 f"任务ID: {task_id}, 状态: {status}, 队列位置: {queue_position}"
             )
             return task_id
-            
+        
         except requests.exceptions.RequestException as e:
             self.log_test("提交生成任务", False, f"请求异常: {str(e)}")
             return None
@@ -153,42 +262,15 @@ class APITester:
         
         Args:
             task_id: 任务ID
-            
+        
         Returns:
             bool: 测试是否通过
         """
         try:
             url = f"{self.base_url}/api/task/{task_id}"
             response = self.session.get(url, timeout=10)
-            
-            if response.status_code != 200:
-                self.log_test(
-                    "查询任务状态",
-                    False,
-                    f"状态码错误: {response.status_code}"
-                )
-                return False
-            
-            result = response.json()
-            if result.get("code") != 200:
-                self.log_test(
-                    "查询任务状态",
-                    False,
-                    f"返回码错误: {result.get('code')}, 消息: {result.get('message')}"
-                )
-                return False
-            
-            task_data = result.get("data", {})
-            status = task_data.get("status")
-            prompt = task_data.get("prompt", "")[:50]
-            
-            self.log_test(
-                "查询任务状态",
-                True,
-                f"任务状态: {status}, 提示词: {prompt}..."
-            )
-            return True
-            
+            return self._check_task_status_response(response)
+        
         except requests.exceptions.RequestException as e:
             self.log_test("查询任务状态", False, f"请求异常: {str(e)}")
             return False
@@ -196,7 +278,111 @@ class APITester:
             self.log_test("查询任务状态", False, f"未知错误: {str(e)}")
             return False
     
-    def test_get_task_result(self, task_id: str, wait_for_completion: bool = True, max_wait_time: int = 300) -> bool:
+    def _check_task_status_response(self, response: requests.Response) -> bool:
+        """
+        检查任务状态接口的响应并记录"查询任务状态"测试结果
+        
+        Args:
+            response: GET /api/task/<task_id> 的响应
+        
+        Returns:
+            bool: 测试是否通过
+        """
+        if response.status_code != 200:
+            self.log_test(
+                "查询任务状态",
+                False,
+                f"状态码错误: {response.status_code}"
+            )
+            return False
+        
+        result = _json_loads(response.content)
+        if result.get("code") != 200:
+            self.log_test(
+                "查询任务状态",
+                False,
+                f"返回码错误: {result.get('code')}, 消息: {result.get('message')}"
+            )
+            return False
+        
+        task_data = result.get("data", {})
+        status = task_data.get("status")
+        prompt = task_data.get("prompt", "")[:50]
+        
+        self.log_test(
+            "查询任务状态",
+            True,
+            f"任务状态: {status}, 提示词: {prompt}..."
+        )
+        return True
+    
+    def _wait_for_terminal_status(
+        self,
+        task_url: str,
+        max_wait_time: int,
+        stats: Dict[str, int],
+        log_status_check: bool = False
+    ) -> Dict[str, Any]:
+        """
+        轮询任务状态直到任务结束（完成或失败）
+        
+        状态变化时恢复快速轮询，状态不变时逐步拉长间隔，减少长任务的请求数；
+        服务端返回ETag时带上If-None-Match，状态未变则返回304，沿用上次解析的任务数据。
+        
+        Args:
+            task_url: 任务状态接口URL
+            max_wait_time: 最大等待时间（秒）
+            stats: 轮询统计，轮询次数累加到stats["polls"]
+            log_status_check: 是否将首次轮询记录为"查询任务状态"测试
+        
+        Returns:
+            dict: 任务结束时的任务数据
+        
+        Raises:
+            TimeoutError: 超过最大等待时间任务仍未结束
+        """
+        deadline = time.monotonic() + max_wait_time
+        interval = POLL_INITIAL_INTERVAL
+        prev_status = None
+        etag = None
+        task_data = {}
+        
+        while time.monotonic() < deadline:
+            headers = {"If-None-Match": etag} if etag else {}
+            response = self.session.get(task_url, headers=headers, timeout=10)
+            stats["polls"] += 1
+            if log_status_check and stats["polls"] == 1:
+                self._check_task_status_response(response)
+            status = None
+            
+            if response.status_code in (200, 304):
+                if response.status_code == 200:
+                    result = _json_loads(response.content)
+                    task_data = result.get("data", {})
+                etag = response.headers.get("ETag", etag)
+                status = task_data.get("status")
+                
+                if status in _TERMINAL_STATUSES:
+                    return task_data
+                if status != prev_status:
+                    print(f"    当前状态: {status}, 等待中...")
+            
+            if status != prev_status:
+                interval = POLL_INITIAL_INTERVAL
+            else:
+                interval = min(interval * POLL_BACKOFF_FACTOR, POLL_MAX_INTERVAL)
+            prev_status = status
+            time.sleep(interval)
+        
+        raise TimeoutError(f"任务超时，超过 {max_wait_time} 秒未完成")
+    
+    def test_get_task_result(
+        self,
+        task_id: str,
+        wait_for_completion: bool = True,
+        max_wait_time: int = 300,
+        log_status_check: bool = False
+    ) -> bool:
         """
         测试获取任务结果接口
         
@@ -204,98 +390,90 @@ class APITester:
             task_id: 任务ID
             wait_for_completion: 是否等待任务完成
             max_wait_time: 最大等待时间（秒）
-            
+            log_status_check: 是否将首次轮询记录为"查询任务状态"测试，省去单独的状态查询请求
+        
         Returns:
             bool: 测试是否通过
         """
         try:
+            task_url = f"{self.base_url}/api/task/{task_id}"
+            result_url = f"{self.base_url}/api/result/{task_id}"
+            # 轮询统计，随结果一起记录
+            stats = {"polls": 0}
             # 如果等待完成，先轮询任务状态
             if wait_for_completion:
                 print(f"    等待任务完成 (最多等待 {max_wait_time} 秒)...")
-                start_time = time.time()
+                start_time = time.monotonic()
+                try:
+                    task_data = self._wait_for_terminal_status(
+                        task_url, max_wait_time, stats, log_status_check=log_status_check
+                    )
+                except TimeoutError as e:
+                    self.log_test("获取任务结果", False, str(e), metadata=stats)
+                    return False
                 
-                while time.time() - start_time < max_wait_time:
-                    url = f"{self.base_url}/api/task/{task_id}"
-                    response = self.session.get(url, timeout=10)
-                    
-                    if response.status_code == 200:
-                        result = response.json()
-                        task_data = result.get("data", {})
-                        status = task_data.get("status")
-                        
-                        if status == "completed":
-                            print(f"    任务已完成，耗时: {int(time.time() - start_time)} 秒")
-                            break
-                        elif status == "failed":
-                            error_msg = task_data.get("error_message", "未知错误")
-                            self.log_test(
-                                "获取任务结果",
-                                False,
-                                f"任务失败: {error_msg}"
-                            )
-                            return False
-                        else:
-                            print(f"    当前状态: {status}, 等待中...")
-                            time.sleep(2)
-                    else:
-                        time.sleep(2)
-                else:
+                if task_data.get("status") == "failed":
+                    error_msg = task_data.get("error_message", "未知错误")
                     self.log_test(
                         "获取任务结果",
                         False,
-                        f"任务超时，超过 {max_wait_time} 秒未完成"
+                        f"任务失败: {error_msg}",
+                        metadata=stats
                     )
                     return False
+                print(f"    任务已完成，耗时: {int(time.monotonic() - start_time)} 秒, 轮询次数: {stats['polls']}")
             
-            # 获取结果
-            url = f"{self.base_url}/api/result/{task_id}"
-            response = self.session.get(url, timeout=30)
-            
-            if response.status_code != 200:
-                self.log_test(
-                    "获取任务结果",
-                    False,
-                    f"状态码错误: {response.status_code}"
-                )
-                return False
-            
-            # 检查是否是图像文件
-            content_type = response.headers.get('content-type', '')
-            if 'image' in content_type:
-                # 保存图像文件
-                output_dir = Path("tests/output")
-                output_dir.mkdir(parents=True, exist_ok=True)
-                output_path = output_dir / f"test_result_{task_id}.png"
-                
-                with open(output_path, 'wb') as f:
-                    f.write(response.content)
-                
-                file_size = len(response.content) / 1024  # KB
-                self.log_test(
-                    "获取任务结果",
-                    True,
-                    f"图像已保存: {output_path}, 大小: {file_size:.2f} KB"
-                )
-                return True
-            else:
-                # 可能是JSON响应（任务未完成）
-                try:
-                    result = response.json()
-                    status = result.get("data", {}).get("status", "unknown")
+            # 获取结果（流式下载，边接收边写入文件，不在内存中缓冲整张图像）
+            with self.session.get(result_url, stream=True, timeout=30) as response:
+                if response.status_code != 200:
                     self.log_test(
                         "获取任务结果",
                         False,
-                        f"任务未完成，状态: {status}"
+                        f"状态码错误: {response.status_code}"
                     )
                     return False
-                except:
+                
+                # 检查是否是图像文件
+                content_type = response.headers.get('content-type', '')
+                if 'image' in content_type:
+                    # 保存图像文件
+                    output_dir = Path("tests/output")
+                    output_dir.mkdir(parents=True, exist_ok=True)
+                    output_path = output_dir / f"test_result_{task_id}.png"
+                    
+                    total_bytes = 0
+                    with open(output_path, 'wb') as f:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            f.write(chunk)
+                            total_bytes += len(chunk)
+                    
+                    file_size = total_bytes / 1024  # KB
                     self.log_test(
                         "获取任务结果",
-                        False,
-                        f"响应格式错误，Content-Type: {content_type}"
+                        True,
+                        f"图像已保存: {output_path}, 大小: {file_size:.2f} KB",
+                        metadata=stats
                     )
-                    return False
-                    
+                    return True
+                else:
+                    # 可能是JSON响应（任务未完成）
+                    try:
+                        result = _json_loads(response.content)
+                        status = result.get("data", {}).get("status", "unknown")
+                        self.log_test(
+                            "获取任务结果",
+                            False,
+                            f"任务未完成，状态: {status}"
+                        )
+                        return False
+                    except:
+                        self.log_test(
+                            "获取任务结果",
+                            False,
+                            f"响应格式错误，Content-Type: {content_type}"
+                        )
+                        return False
+        
         except requests.exceptions.RequestException as e:
             self.log_test("获取任务结果", False, f"请求异常: {str(e)}")
             return False
@@ -322,7 +500,7 @@ class APITester:
                 )
                 return False
             
-            result = response.json()
+            result = _json_loads(response.content)
             if result.get("code") != 200:
                 self.log_test(
                     "查询系统状态",
@@ -350,7 +528,7 @@ class APITester:
             
             self.log_test("查询系统状态", True, message)
             return True
-            
+        
         except requests.exceptions.RequestException as e:
             self.log_test("查询系统状态", False, f"请求异常: {str(e)}")
             return False
@@ -367,11 +545,24 @@ class APITester:
         """
         try:
             url = f"{self.base_url}/api/generate"
+            fake_task_id = "00000000-0000-0000-0000-000000000000"
+            
+            # 三个请求互不依赖，并发发出后按原顺序检查结果，总耗时约为一次往返
+            with ThreadPoolExecutor(max_workers=3) as executor:
+                missing_prompt_future = executor.submit(
+                    self.session.post, url, data=_MISSING_PROMPT_BODY, headers=_JSON_HEADERS, timeout=10
+                )
+                invalid_height_future = executor.submit(
+                    self.session.post, url, data=_INVALID_HEIGHT_BODY, headers=_JSON_HEADERS, timeout=10
+                )
+                missing_task_future = executor.submit(
+                    self.session.get, f"{self.base_url}/api/task/{fake_task_id}", timeout=10
+                )
             
             # 测试缺少prompt参数
-            response = self.session.post(url, json={}, timeout=10)
+            response = missing_prompt_future.result()
             if response.status_code == 200:
-                result = response.json()
+                result = _json_loads(response.content)
                 if result.get("code") == 400:
                     self.log_test("参数验证 - 缺少prompt", True, "正确返回400错误")
                 else:
@@ -390,13 +581,9 @@ class APITester:
                 return False
             
             # 测试无效的height参数
-            response = self.session.post(
-                url,
-                json={"prompt": "test", "height": -1},
-                timeout=10
-            )
+            response = invalid_height_future.result()
             if response.status_code == 200:
-                result = response.json()
+                result = _json_loads(response.content)
                 if result.get("code") == 400:
                     self.log_test("参数验证 - 无效height", True, "正确返回400错误")
                 else:
@@ -408,13 +595,9 @@ class APITester:
                     return False
             
             # 测试不存在的任务ID
-            fake_task_id = "00000000-0000-0000-0000-000000000000"
-            response = self.session.get(
-                f"{self.base_url}/api/task/{fake_task_id}",
-                timeout=10
-            )
+            response = missing_task_future.result()
             if response.status_code == 200:
-                result = response.json()
+                result = _json_loads(response.content)
                 if result.get("code") == 404:
                     self.log_test("参数验证 - 不存在任务", True, "正确返回404错误")
                 else:
@@ -426,7 +609,7 @@ class APITester:
                     return False
             
             return True
-            
+        
         except Exception as e:
             self.log_test("参数验证", False, f"测试异常: {str(e)}")
             return False
@@ -455,34 +638,39 @@ class APITester:
             print("请确保服务已启动并可以访问")
             return
         
-        # 2. 查询系统状态
-        print("【2/6】测试查询系统状态接口...")
-        self.test_get_system_status()
-        print()
-        
-        # 3. 参数验证
-        print("【3/6】测试参数验证...")
-        self.test_invalid_parameters()
-        print()
-        
-        # 4. 提交生成任务
-        print("【4/6】测试提交生成任务接口...")
-        task_id = self.test_generate_task()
+        # 2-4. 查询系统状态、参数验证、提交生成任务互不依赖，并行执行以缩短等待时间
+        print("【2-4/6】并行测试查询系统状态、参数验证、提交生成任务接口...")
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            status_future = executor.submit(self.test_get_system_status)
+            validation_future = executor.submit(self.test_invalid_parameters)
+            generate_future = executor.submit(self.test_generate_task)
+            status_future.result()
+            validation_future.result()
+            task_id = generate_future.result()
         print()
         
         if not task_id:
             print("❌ 提交任务失败，跳过后续测试")
             return
         
-        # 5. 查询任务状态
-        print("【5/6】测试查询任务状态接口...")
-        self.test_get_task_status(task_id)
-        print()
+        # 5. 查询任务状态；随后等待结果时的首次轮询即是同一请求，由其记录本项结果
+        poll_for_result = test_image_generation and wait_for_completion
+        if not poll_for_result:
+            print("【5/6】测试查询任务状态接口...")
+            self.test_get_task_status(task_id)
+            print()
         
         # 6. 获取任务结果（如果启用）
         if test_image_generation:
-            print("【6/6】测试获取任务结果接口...")
-            self.test_get_task_result(task_id, wait_for_completion=wait_for_completion)
+            if poll_for_result:
+                print("【5-6/6】测试查询任务状态和获取任务结果接口...")
+            else:
+                print("【6/6】测试获取任务结果接口...")
+            self.test_get_task_result(
+                task_id,
+                wait_for_completion=wait_for_completion,
+                log_status_check=poll_for_result
+            )
             print()
         else:
             print("【6/6】跳过图像生成测试（使用 --skip-image-generation）")
@@ -493,9 +681,10 @@ class APITester:
         print("测试总结")
         print("=" * 60)
         
+        failed = [r for r in self.test_results if not r["success"]]
         total_tests = len(self.test_results)
-        passed_tests = sum(1 for r in self.test_results if r["success"])
-        failed_tests = total_tests - passed_tests
+        failed_tests = len(failed)
+        passed_tests = total_tests - failed_tests
         
         print(f"总测试数: {total_tests}")
         print(f"通过: {passed_tests} ✅")
@@ -504,9 +693,8 @@ class APITester:
         
         if failed_tests > 0:
             print("失败的测试:")
-            for result in self.test_results:
-                if not result["success"]:
-                    print(f"  - {result['name']}: {result['message']}")
+            for result in failed:
+                print(f"  - {result['name']}: {result['message']}")
         
         print("=" * 60)
         
@@ -514,8 +702,14 @@ class APITester:
         return 0 if failed_tests == 0 else 1
 
 
-def main():
-    """主函数"""
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """
+    构建命令行参数解析器（只构建一次，重复调用main时复用）
+    
+    Returns:
+        argparse.ArgumentParser: 参数解析器
+    """
     parser = argparse.ArgumentParser(
         description="Z-Image-Turbo API接口测试工具",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -561,7 +755,12 @@ def main():
         help='不等待任务完成（仅查询状态，不下载图像）'
     )
     
-    args = parser.parse_args()
+    return parser
+
+
+def main():
+    """主函数"""
+    args = _build_parser().parse_args()
     
     # 构建基础URL
     base_url = f"http://{args.host}:{args.port}"